@@ -0,0 +1,277 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import derived
+import export
+import hit_data
+import instrumentation
+import player_search
+import player_similarity
+import prewarm
+import progression
+import selections
+import similar_hits
+
+# Headless JSON API over one shared, preloaded dataset.
+# Run with: uvicorn api:app --workers 4
+
+# How many rendered responses to keep, and how long clients may reuse them
+RESPONSE_CACHE_SIZE = 1024
+MAX_AGE = 300
+
+_response_cache = OrderedDict()
+
+# Under uvicorn's error logger, so startup messages go where uvicorn's own do
+logger = logging.getLogger('uvicorn.error.api')
+
+
+def _dataset():
+    return hit_data.current_dataset()
+
+
+# NaN-safe conversion of a DataFrame to JSON-ready records
+def _records(frame):
+    return json.loads(frame.to_json(orient='records'))
+
+
+# A malformed query parameter: answered with a 400 instead of a 500
+class BadParameter(ValueError):
+    pass
+
+
+def _float_param(request, name, default):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise BadParameter(f"'{name}' must be a number") from None
+
+
+# Counts (limit, n, k): whole numbers, 0 or more
+def _int_param(request, name, default):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise BadParameter(f"'{name}' must be an integer") from None
+    if value < 0:
+        raise BadParameter(f"'{name}' must not be negative")
+    return value
+
+
+# Serve from the response cache, honouring If-None-Match with a 304. Loading
+# (a live refresh reads new files) and the handlers run in the thread pool, so
+# a slow request doesn't hold up the event loop
+def cached(handler):
+    async def endpoint(request):
+        dataset = await run_in_threadpool(_dataset)
+        key = (dataset.version, request.url.path, tuple(sorted(request.query_params.multi_items())))
+        entry = _response_cache.get(key)
+        instrumentation.cache_lookup('api_responses')
+        if entry is None:
+            instrumentation.cache_miss('api_responses')
+            try:
+                with instrumentation.timed(f'api{request.url.path}'):
+                    payload = await run_in_threadpool(handler, request, dataset)
+            except BadParameter as error:
+                return _error(str(error))
+            if isinstance(payload, Response):
+                return payload
+            body = json.dumps(payload).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            entry = (body, etag)
+            _response_cache[key] = entry
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+        else:
+            _response_cache.move_to_end(key)
+
+        body, etag = entry
+        headers = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}'}
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+    return endpoint
+
+
+def _error(message, status_code=400):
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+# Autocomplete: best-matching player names (prefix, then fuzzy), most prolific first
+@cached
+def players(request, dataset):
+    query = request.query_params.get('q', '')
+    limit = min(_int_param(request, 'limit', player_search.DEFAULT_LIMIT), 100)
+    index = player_search.get_index(dataset)
+    names = index.search(query, limit)
+    if request.query_params.get('titles') == '1':
+        return {'players': [{'name': name, 'home_runs': index.home_runs(name), 'titles': index.titles_for([name])} for name in names]}
+    return {'players': [{'name': name, 'home_runs': index.home_runs(name)} for name in names]}
+
+
+@cached
+def player_stats(request, dataset):
+    player = request.query_params.get('player')
+    if not player:
+        return _error("Missing 'player' parameter")
+    stats = dataset.player_stats(player)
+    if stats is None:
+        return _error(f'Unknown player: {player}', status_code=404)
+    return stats
+
+
+@cached
+def compare(request, dataset):
+    selected = request.query_params.getlist('players')
+    if len(selected) < 2:
+        return _error('Select at least two players to compare')
+    return {'comparison': _records(selections.comparison(dataset, selected))}
+
+
+@cached
+def top_home_runs(request, dataset):
+    n = _int_param(request, 'n', 10)
+    top = dataset.top(n)[['play_id', 'title', 'ExitVelocity', 'HitDistance', 'LaunchAngle', 'video']]
+    return {'top_home_runs': _records(top)}
+
+
+@cached
+def predict(request, dataset):
+    selected = request.query_params.getlist('players')
+    data = selections.rows(dataset, selected) if selected else dataset.data
+    if data.empty:
+        return _error('No hits for the selected players', status_code=404)
+    launch_angle = _float_param(request, 'launch_angle', 22)
+    hit_distance = _float_param(request, 'hit_distance', 410)
+    return {
+        'launch_angle': launch_angle,
+        'hit_distance': hit_distance,
+        'predicted_exit_velocity': selections.prediction(dataset, selected or None, launch_angle, hit_distance),
+    }
+
+
+# "Players like X": nearest batters by home-run profile, with their k-means cluster
+@cached
+def peers(request, dataset):
+    player = request.query_params.get('player')
+    if not player:
+        return _error("Missing 'player' parameter")
+    similarity = player_similarity.get_similarity(dataset)
+    if player not in similarity:
+        return _error(f'Unknown player (or fewer than {player_similarity.MIN_HITS} home runs): {player}', status_code=404)
+    k = min(_int_param(request, 'k', 5), player_similarity.TOP_PEERS)
+    return {'player': player, 'cluster': similarity.cluster_of(player), 'peers': _records(similarity.peers(player, k))}
+
+
+# A batter's home runs in season order, with rolling means and streaks
+@cached
+def player_progression(request, dataset):
+    player = request.query_params.get('player')
+    if not player:
+        return _error("Missing 'player' parameter")
+    season = progression.get_progression(dataset)
+    if player not in season:
+        return _error(f'Unknown player: {player}', status_code=404)
+    hits = season.player(player).drop(columns='player')
+    return {'summary': season.summary(player), 'window': season.window, 'hits': _records(hits)}
+
+
+# Nearest hits to each of the given plays (batch: repeat play_id)
+@cached
+def similar(request, dataset):
+    index = similar_hits.get_index(dataset)
+    positions = index.positions(request.query_params.getlist('play_id'))
+    if len(positions) == 0:
+        return _error('Unknown or missing play_id', status_code=404)
+    k = min(_int_param(request, 'k', similar_hits.DEFAULT_K), 100)
+    scaled = request.query_params.get('scaled', '1') != '0'
+    mask = similar_hits.filter_mask(dataset.data, min_distance=_float_param(request, 'min_distance', None))
+    frame = index.similar_to(positions, k=k, scaled=scaled, mask=mask)
+    return {'similar': _records(frame[['query_play_id', 'rank', 'distance', 'play_id', 'title', *similar_hits.FEATURES, 'video']])}
+
+
+@cached
+def chart_data(request, dataset):
+    selected = request.query_params.getlist('players')
+    x = request.query_params.get('x', 'ExitVelocity')
+    y = request.query_params.get('y', 'HitDistance')
+    if x not in derived.metric_names() or y not in derived.metric_names():
+        return _error(f'Metrics must be one of {derived.metric_names()}')
+    rows = derived.get_columns(dataset).with_metrics(selections.rows(dataset, selected), [x, y])
+    return {'x': x, 'y': y, 'series': hit_data.chart_data(rows, selected, x, y)}
+
+
+# Filtered rows as CSV or Parquet, streamed chunk by chunk (not cached: exports can be large)
+def export_rows(request):
+    fmt = request.query_params.get('format', 'csv')
+    if fmt not in export.MEDIA_TYPES:
+        return _error(f'Format must be one of {list(export.MEDIA_TYPES)}')
+    try:
+        keep = export.row_filter(
+            players=request.query_params.getlist('players'),
+            min_exit_velocity=_float_param(request, 'min_exit_velocity', None),
+            min_distance=_float_param(request, 'min_distance', None),
+        )
+    except BadParameter as error:
+        return _error(str(error))
+    headers = {'Content-Disposition': f'attachment; filename="home_runs.{fmt}"'}
+    return StreamingResponse(export.stream(_dataset().data, fmt, keep), media_type=export.MEDIA_TYPES[fmt], headers=headers)
+
+
+# Plain def: Starlette runs it in the thread pool (a live refresh can read files)
+def health(request):
+    dataset = _dataset()
+    return JSONResponse({'status': 'ok', 'rows': len(dataset.data), 'version': dataset.version})
+
+
+# Prometheus text format; stage histograms are empty unless HIT_METRICS=1
+async def metrics(request):
+    return Response(instrumentation.prometheus_text(), media_type='text/plain; version=0.0.4')
+
+
+# Prewarm the dataset, indexes, models and the most-viewed players' results
+# before accepting traffic (see prewarm.py). It runs in the thread pool, so the
+# event loop stays free, but startup (and serving) waits until it has finished
+@asynccontextmanager
+async def lifespan(app):
+    prewarm.clear_ready()
+    timings = await run_in_threadpool(prewarm.prewarm, pages=False)
+    report = prewarm.format_timings(timings)
+    logger.info('Prewarmed:\n%s', report)
+    if prewarm.failures(timings):
+        logger.warning('Prewarm steps failed: %s', ', '.join(prewarm.failures(timings)))
+    prewarm.mark_ready(text=report)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health),
+        Route('/metrics', metrics),
+        Route('/players', players),
+        Route('/stats', player_stats),
+        Route('/compare', compare),
+        Route('/top-home-runs', top_home_runs),
+        Route('/predict', predict),
+        Route('/similar', similar),
+        Route('/peers', peers),
+        Route('/progression', player_progression),
+        Route('/chart-data', chart_data),
+        Route('/export', export_rows),
+    ],
+    lifespan=lifespan,
+)
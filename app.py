@@ -1,31 +1,22 @@
 
-import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
 
+import hit_data
+import instrumentation
+
 # Streamlit header
 st.title("Baseball Hit Analyzer")
 
-# Correct raw URL of the CSV file
-url = "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv"
-
-# Load the CSV file directly from the URL
-data = pd.read_csv(url)
-
-# Handle missing values
-data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
-data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
-data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
-data['title'] = data['title'].fillna('Unknown')
-
-# Check for duplicates
-data = data.drop_duplicates(subset=['play_id'])
+# Shared dataset, loaded and cleaned once per process (the latest snapshot in live mode)
+data = hit_data.current_dataset().data
 
 # Streamlit controls
 player = st.selectbox('Select Player', data['title'].unique())
 
 # Filter dataset by selected player
-player_data = data[data['title'] == player]
+with instrumentation.timed('filter'):
+    player_data = data[data['title'] == player]
 
 # Plot Exit Velocity vs Hit Distance
 fig, ax = plt.subplots()
@@ -33,7 +24,9 @@ ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'])
 ax.set_xlabel('Exit Velocity (mph)')
 ax.set_ylabel('Hit Distance (feet)')
 ax.set_title(f'Exit Velocity vs Hit Distance for {player}')
-st.pyplot(fig)
+with instrumentation.timed('render'):
+    st.pyplot(fig)
+plt.close(fig)  # pyplot keeps every figure alive until closed
 
 # Show a video of the selected hit
 video_url = player_data.iloc[0]['video']
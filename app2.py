@@ -1,53 +1,35 @@
-import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
-from google.cloud import translate_v2 as translate
-import requests
-from PIL import Image
-from io import BytesIO
+
+import hit_data
+import instrumentation
+import translation
 
 # Streamlit header
 st.title("Baseball Hit Analyzer")
 
-# github url link
-url = "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv"
-
-# Load the CSV file directly from the URL
-data = pd.read_csv(url)
-
-# Handle missing values
-data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
-data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
-data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
-data['title'] = data['title'].fillna('Unknown')
-
-# Check for duplicates
-data = data.drop_duplicates(subset=['play_id'])
+# Shared dataset, loaded and cleaned once per process (the latest snapshot in live mode)
+data = hit_data.current_dataset().data
 
 # Language selection
 language = st.selectbox('Select Language', ['English', 'Spanish', 'Japanese'])
 
-# Function to translate text using Google Cloud Translate
-def translate_text(text, target_language='es'):
-    translate_client = translate.Client()
-    result = translate_client.translate(text, target_lang=target_language)
-    return result['translatedText']
-
 # Streamlit controls for selecting player
 player = st.selectbox('Select Player', data['title'].unique())
 
 # Set the title based on language
 if language == 'Spanish':
-    title = translate_text("Exit Velocity vs Hit Distance for", target_language='es')
+    title = translation.translate_text("Exit Velocity vs Hit Distance for", target_language='es')
     st.title(f"{title} {player}")
 elif language == 'Japanese':
-    title = translate_text("Exit Velocity vs Hit Distance for", target_language='ja')
+    title = translation.translate_text("Exit Velocity vs Hit Distance for", target_language='ja')
     st.title(f"{title} {player}")
 else:
     st.title(f"Exit Velocity vs Hit Distance for {player}")
 
 # Filter dataset by selected player
-player_data = data[data['title'] == player]
+with instrumentation.timed('filter'):
+    player_data = data[data['title'] == player]
 
 # Plot Exit Velocity vs Hit Distance
 fig, ax = plt.subplots()
@@ -55,7 +37,9 @@ ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'])
 ax.set_xlabel('Exit Velocity (mph)')
 ax.set_ylabel('Hit Distance (feet)')
 ax.set_title(f'Exit Velocity vs Hit Distance for {player}')
-st.pyplot(fig)
+with instrumentation.timed('render'):
+    st.pyplot(fig)
+plt.close(fig)  # pyplot keeps every figure alive until closed
 
 # Show video of the selected hit
 video_url = player_data.iloc[0]['video']
@@ -79,7 +63,8 @@ st.write(st.session_state.favorites)
 players = st.multiselect('Select Players to Compare', data['title'].unique())
 
 if len(players) > 1:
-    comparison_data = data[data['title'].isin(players)]
+    with instrumentation.timed('filter'):
+        comparison_data = data[data['title'].isin(players)]
     fig, ax = plt.subplots()
     for player in players:
         player_data = comparison_data[comparison_data['title'] == player]
@@ -88,4 +73,6 @@ if len(players) > 1:
     ax.set_ylabel('Hit Distance (feet)')
     ax.set_title(f'Exit Velocity vs Hit Distance Comparison')
     ax.legend()
-    st.pyplot(fig)
+    with instrumentation.timed('render'):
+        st.pyplot(fig)
+    plt.close(fig)
@@ -1,39 +1,29 @@
-import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-from google.cloud import translate_v2 as translate
-import requests
-from io import BytesIO
-from PIL import Image
+import numpy as np
+import pandas as pd
+
+import bootstrap
+import derived
+import hit_data
+import instrumentation
+import player_search
+import player_similarity
+import percentiles
+import progression
+import rendering
+import selections
+import translation
 
 # Streamlit header
 st.title("Baseball Hit Analyzer")
 
-# GitHub URL for dataset
-url = "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv"
-
-# Load the CSV file directly from the URL
-data = pd.read_csv(url)
-
-# Handle missing values
-data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
-data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
-data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
-data['title'] = data['title'].fillna('Unknown')
-
-# Check for duplicates
-data = data.drop_duplicates(subset=['play_id'])
+# Shared dataset, loaded and cleaned once per process (the latest snapshot in live mode)
+dataset = hit_data.current_dataset()
+data = dataset.data
 
 # Language selection
 language = st.selectbox('Select Language', ['English', 'Spanish', 'Japanese'], key="language_select")
 
-# Function to translate text using Google Cloud Translate
-def translate_text(text, target_language='es'):
-    translate_client = translate.Client()
-    result = translate_client.translate(text, target_lang=target_language)
-    return result['translatedText']
-
 # Show feedback message after language selection
 if language == 'Spanish':
     st.write("Estás viendo la experiencia en Español.")
@@ -42,24 +32,32 @@ elif language == 'Japanese':
 else:
     st.write("You're viewing the experience in English.")
 
-# Streamlit controls for selecting player with a unique key
-player = st.selectbox('Select Player', data['title'].unique(), key="select_player")
+# Streamlit controls for selecting player: search by name, then pick one of their home runs.
+# Only the matching players' titles are sent to the browser, not every title in the dataset.
+search_index = player_search.get_index(dataset)
+query = st.text_input('Search Player', key="player_search", placeholder="e.g. Cespedes, Souza Jr.")
+matches = search_index.search(query)
+if not matches:
+    st.warning(f"No players match '{query}'.")
+    st.stop()
+player = st.selectbox('Select Player', search_index.titles_for(matches), key="select_player")
 
 # Set the title based on language
 if language == 'Spanish':
-    title = translate_text("Exit Velocity vs Hit Distance for", target_language='es')
+    title = translation.translate_text("Exit Velocity vs Hit Distance for", target_language='es')
     st.title(f"{title} {player}")
 elif language == 'Japanese':
-    title = translate_text("Exit Velocity vs Hit Distance for", target_language='ja')
+    title = translation.translate_text("Exit Velocity vs Hit Distance for", target_language='ja')
     st.title(f"{title} {player}")
 else:
     st.title(f"Exit Velocity vs Hit Distance for {player}")
 
 # Filter dataset by selected player
-player_data = data[data['title'] == player]
+with instrumentation.timed('filter'):
+    player_data = selections.rows(dataset, [player])
 
-# Show player stats: average, min, max
-player_avg_stats = player_data[['ExitVelocity', 'HitDistance', 'LaunchAngle']].agg(['mean', 'min', 'max'])
+# Show player stats: average, min, max (shared with other sessions viewing this player)
+player_avg_stats = selections.summary(dataset, [player])
 st.write(f"**{player} Stats**")
 st.write(player_avg_stats)
 
@@ -68,49 +66,78 @@ if 'LaunchAngle' in player_data.columns:
     launch_angle_avg = player_data['LaunchAngle'].mean()
     st.write(f"Launch Angle Average: {launch_angle_avg:.2f}°")
 
+# Where the player's mean EV, median LA and mean distance stand in the league
+player_ranks = percentiles.player_ranks(dataset, [player])
+if player in player_ranks.index:
+    st.write(f"League rank: {percentiles.describe(player_ranks.loc[player])}")
+
+# The sections below are fragments: a widget inside one only reruns that section.
+# Each gets just the data it depends on; the stats, heatmap and video above/below
+# only rerun when the language or player changes.
+
 # Let user select which metric to display
-metric = st.radio("Select Metric to Compare", ['Exit Velocity', 'Hit Distance', 'Launch Angle'], key="metric_select")
-
-# Plot based on selected metric
-fig, ax = plt.subplots()
-if metric == 'Exit Velocity':
-    ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player, alpha=0.6, edgecolors="w", s=100)
-    ax.set_xlabel('Exit Velocity (mph)')
-    ax.set_ylabel('Hit Distance (feet)')
-elif metric == 'Launch Angle':
-    ax.scatter(player_data['LaunchAngle'], player_data['HitDistance'], label=player, alpha=0.6, edgecolors="w", s=100)
-    ax.set_xlabel('Launch Angle (°)')
-    ax.set_ylabel('Hit Distance (feet)')
-else:
-    ax.scatter(player_data['ExitVelocity'], player_data['LaunchAngle'], label=player, alpha=0.6, edgecolors="w", s=100)
-ax.set_title(f'{metric} vs Hit Distance for {player}')
-st.pyplot(fig)
-
-# Plot histogram of Exit Velocity
-st.subheader(f"Histogram of Exit Velocity for {player}")
-fig, ax = plt.subplots()
-ax.hist(player_data['ExitVelocity'], bins=30, color='skyblue', edgecolor='black')
-ax.set_xlabel('Exit Velocity (mph)')
-ax.set_ylabel('Frequency')
-ax.set_title(f'Exit Velocity Distribution for {player}')
-st.pyplot(fig)
+@st.fragment
+def metric_chart(player, player_data):
+    # Derived metrics (by name) are plotted against Hit Distance
+    metric = st.radio("Select Metric to Compare", [*rendering.METRIC_AXES, *derived.REGISTRY], format_func=lambda option: derived.REGISTRY[option].label if option in derived.REGISTRY else option, key="metric_select")
+    player_data = derived.get_columns(dataset).with_metrics(player_data, [metric] if metric in derived.REGISTRY else [])
+
+    # Rendered in the chart pool once per player and metric, then shared with other sessions
+    chart = selections.chart(dataset, [player], ('metric', metric), rendering.metric_scatter, player, player_data, metric)
+    with instrumentation.timed('render'):
+        st.image(chart.result(), width='stretch')
+
+# Plot histogram of Exit Velocity (or any other metric); its metric picker only reruns this section
+@st.fragment
+def histogram_section(player, player_data):
+    heading = st.empty()
+    metric = st.selectbox('Histogram Metric', derived.metric_names(), format_func=derived.metric_label, key='histogram_metric')
+    heading.subheader(f"Histogram of {derived.short_label(metric)} for {player}")
+    values = derived.get_columns(dataset).with_metrics(player_data, [metric])[metric]
+    histogram = selections.chart(dataset, [player], ('histogram', metric), rendering.metric_histogram, player, values, metric)
+    with instrumentation.timed('render'):
+        st.image(histogram.result(), width='stretch')
+
+# Start rendering the heatmap now, so it's drawn in the chart pool while the
+# metric chart and histogram render
+correlation_matrix = selections.correlation(dataset, [player])
+heatmap = selections.chart(dataset, [player], ('correlation',), rendering.correlation_heatmap, player, correlation_matrix, figsize=(8, 6))
+
+metric_chart(player, player_data)
+histogram_section(player, player_data)
 
 # Correlation matrix for various stats
 st.subheader(f"Correlation Matrix for {player}")
-correlation_data = player_data[['ExitVelocity', 'HitDistance', 'LaunchAngle']]
-correlation_matrix = correlation_data.corr()
-
-# Plot the correlation matrix
-fig, ax = plt.subplots(figsize=(8, 6))
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax)
-ax.set_title(f'Correlation Matrix for {player}')
-st.pyplot(fig)
+with instrumentation.timed('render'):
+    st.image(heatmap.result(), width='stretch')
 
 # Show video of the selected hit
 video_url = player_data.iloc[0]['video']
 
 # Display the video using st.video() (since the URL is already a video)
 st.video(video_url)
+st.write(f"This hit league-wide: {percentiles.describe(percentiles.get_ranks(dataset).hit_ranks(player_data.iloc[[0]]).iloc[0])}")
+
+# The batter behind the selected title, for the season-long sections below
+batter = hit_data.parse_titles(pd.Series([player]))['player'].iloc[0]
+
+# How the batter's power evolved over the season (precomputed for every player)
+@st.fragment
+def progression_section(batter):
+    season = progression.get_progression(dataset)
+    if batter not in season:
+        return
+    hits = season.player(batter)
+    st.subheader(f"Season Progression for {batter}")
+    metric = st.selectbox('Progression Metric', hit_data.METRICS, format_func=hit_data.METRIC_LABELS.get, key="progression_metric")
+    chart = hits.set_index('season_hr')[[metric, f'{metric}_rolling']]
+    chart.columns = ['Home run', f'Rolling mean (last {season.window})']
+    st.line_chart(chart)
+    summary = season.summary(batter)
+    st.write(f"Longest streak of {progression.HARD_HIT_EXIT_VELOCITY}+ mph home runs: {summary['longest_hard_hit_streak']}")
+    st.write(f"Longest streak of {progression.LONG_DISTANCE}+ ft home runs: {summary['longest_long_streak']}")
+
+progression_section(batter)
 
 # Session state for favorite players
 if 'favorites' not in st.session_state:
@@ -118,6 +145,8 @@ if 'favorites' not in st.session_state:
 
 # Add player to favorites
 def save_to_firestore(player_name):
+    from google.cloud import firestore
+
     # Initialize Firestore client
     db = firestore.Client()
     doc_ref = db.collection('favorite_players').document(player_name)
@@ -127,56 +156,76 @@ def save_to_firestore(player_name):
     })
     st.write(f"{player_name} added to your favorites!")
 
-if st.button(f"Add {player} to Favorites", key="add_to_favorites"):
-    st.session_state.favorites.append(player)
-    save_to_firestore(player)  # Save to Firestore database
+@st.fragment
+def favorites_section(player):
+    if st.button(f"Add {player} to Favorites", key="add_to_favorites"):
+        st.session_state.favorites.append(player)
+        save_to_firestore(player)  # Save to Firestore database
+
+    # Display favorite players
+    st.write("Your Favorite Players:")
+    st.write(st.session_state.favorites)
 
-# Display favorite players
-st.write("Your Favorite Players:")
-st.write(st.session_state.favorites)
+favorites_section(player)
 
 # Limit number of players to compare (e.g., max 5 players)
 max_players = 5
-players = st.multiselect('Select Players to Compare (Max 5)', data['title'].unique(), key="select_players_to_compare")
-
-if len(players) > 1:
-    if len(players) > max_players:
-        st.warning(f"Please select up to {max_players} players only for comparison.")
-    else:
-        comparison_data = data[data['title'].isin(players)]
-        chart_type = st.selectbox('Select Chart Type', ['Scatter Plot', 'Line Chart', 'Bar Chart'], key="chart_type")
-
-        fig, ax = plt.subplots()
-        if chart_type == 'Scatter Plot':
-            colors = sns.color_palette("hsv", len(players))  # Get a color palette for each player
-            for i, player in enumerate(players):
-                player_data = comparison_data[comparison_data['title'] == player]
-                ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player, color=colors[i], alpha=0.7, edgecolors="w", s=100)
-            ax.set_xlabel('Exit Velocity (mph)')
-            ax.set_ylabel('Hit Distance (feet)')
-            ax.set_title(f'Exit Velocity vs Hit Distance Comparison')
-            ax.legend()
-        elif chart_type == 'Line Chart':
-            for player in players:
-                player_data = comparison_data[comparison_data['title'] == player]
-                ax.plot(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
-            ax.set_xlabel('Exit Velocity (mph)')
-            ax.set_ylabel('Hit Distance (feet)')
-            ax.set_title(f'Exit Velocity vs Hit Distance Line Comparison')
-            ax.legend()
-        elif chart_type == 'Bar Chart':
-            # Aggregate the data by player and take the mean of ExitVelocity and HitDistance
-            comparison_data_mean = comparison_data.groupby('title')[['ExitVelocity', 'HitDistance']].mean().reset_index()
-
-            # Shorten player names (for example: "Mike Trout" -> "M. Trout")
-            comparison_data_mean['title_short'] = comparison_data_mean['title'].apply(lambda x: '. '.join([name[0] + '.' if i > 0 else name for i, name in enumerate(x.split())]))
-
-            # Plot bar chart with shortened player names
-            comparison_data_mean.plot(kind='bar', x='title_short', y=['ExitVelocity', 'HitDistance'], ax=ax)
-            ax.set_ylabel('Average Value')
-            ax.set_title(f'Bar Chart Comparison for {", ".join(players)}')
-
-            # Rotate the x-axis labels for readability
-            ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
-
-        st.pyplot(fig)
+
+@st.fragment
+def comparison_section(data, batter):
+    players = st.multiselect('Select Players to Compare (Max 5)', data['title'].unique(), key="select_players_to_compare")
+
+    # Or let the similarity index pick: the selected batter and their nearest peers, all their home runs each
+    similarity = player_similarity.get_similarity(dataset)
+    peers_mode = batter in similarity and st.checkbox(f"Compare {batter} with their nearest peers", key="compare_peers")
+    if peers_mode:
+        peers = similarity.peers(batter, k=max_players - 1)
+        st.dataframe(peers, hide_index=True)
+        players = [batter, *peers['player']]
+
+    if len(players) > 1:
+        if len(players) > max_players:
+            st.warning(f"Please select up to {max_players} players only for comparison.")
+        else:
+            # Rows and means come from the selection cache shared by all sessions
+            with instrumentation.timed('filter'):
+                if peers_mode:
+                    batters = {title: name for name in players for title in search_index.titles_for([name])}
+                    comparison_data = selections.rows(dataset, batters.keys())
+                    comparison_data = comparison_data.assign(title=comparison_data['title'].map(batters))
+                    groups = {name: [title for title, batter in batters.items() if batter == name] for name in players}
+                else:
+                    comparison_data = selections.rows(dataset, players)
+                    groups = {player: [player] for player in players}
+            chart_type = st.selectbox('Select Chart Type', ['Scatter Plot', 'Line Chart', 'Bar Chart'], key="chart_type")
+            # Any metric, derived ones included (computed once per dataset, then sliced)
+            x_column, y_column = st.columns(2)
+            x = x_column.selectbox('X Metric', derived.metric_names(), index=0, format_func=derived.metric_label, key="comparison_x")
+            y = y_column.selectbox('Y Metric', derived.metric_names(), index=1, format_func=derived.metric_label, key="comparison_y")
+            comparison_data = derived.get_columns(dataset).with_metrics(comparison_data, [x, y])
+
+            if chart_type == 'Scatter Plot':
+                chart = rendering.submit(rendering.comparison_scatter, players, comparison_data, x, y)
+            elif chart_type == 'Line Chart':
+                chart = rendering.submit(rendering.comparison_lines, players, comparison_data, x, y)
+            elif chart_type == 'Bar Chart':
+                # Aggregate the data by player and take the mean of both metrics
+                metrics = list(dict.fromkeys([x, y]))
+                comparison_data_mean = selections.means(dataset, groups, metrics).copy()
+
+                # Shorten player names (for example: "Mike Trout" -> "M. Trout")
+                comparison_data_mean['title_short'] = comparison_data_mean['title'].apply(lambda x: '. '.join([name[0] + '.' if i > 0 else name for i, name in enumerate(x.split())]))
+
+                # Bootstrap 95% confidence intervals as error bars (cached per player); only
+                # metrics whose bootstrapped statistic is the mean get them
+                intervals = bootstrap.get_bootstrap(dataset).intervals(groups).loc[comparison_data_mean['title']]
+                errors = np.array([bootstrap.error_bars(intervals, metric) if bootstrap.STATISTICS.get(metric) == 'mean' else np.zeros((2, len(intervals)))
+                                   for metric in metrics])
+
+                # Bar chart with shortened player names
+                chart = rendering.submit(rendering.comparison_bars, players, comparison_data_mean, errors, metrics)
+
+            with instrumentation.timed('render'):
+                st.image(chart.result(), width='stretch')
+
+comparison_section(data, batter)
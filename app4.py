@@ -1,24 +1,18 @@
-import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
 
+import bootstrap
+import hit_data
+import instrumentation
+import percentiles
+import selections
+
 # Streamlit header
 st.title("Baseball Hit Analyzer")
 
-# Correct raw URL of the CSV file
-url = "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv"
-
-# Load the CSV file directly from the URL
-data = pd.read_csv(url)
-
-# Handle missing values
-data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
-data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
-data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
-data['title'] = data['title'].fillna('Unknown')
-
-# Check for duplicates
-data = data.drop_duplicates(subset=['play_id'])
+# Shared dataset, loaded and cleaned once per process (the latest snapshot in live mode)
+dataset = hit_data.current_dataset()
+data = dataset.data
 
 # Streamlit controls
 # Sidebar for Insights
@@ -32,21 +26,33 @@ st.sidebar.write('Launch angle is the trajectory of the ball off the bat. Ideal
 players = st.multiselect('Select Players', data['title'].unique())
 
 # Filter dataset for selected players
-players_data = data[data['title'].isin(players)]
+with instrumentation.timed('filter'):
+    players_data = selections.rows(dataset, players)
+
+# Bootstrap confidence intervals of each player's stats (cached per player)
+intervals = bootstrap.get_bootstrap(dataset).intervals({player: [player] for player in players})
+
+# League percentile ranks of each player's stats
+ranks = percentiles.player_ranks(dataset, players)
 
 # Plot Exit Velocity vs Hit Distance for selected players
 fig, ax = plt.subplots()
 
-# Add scatter plot for each player
+# Add scatter plot for each player, with its mean and 95% interval in both directions
 for player in players:
     player_data = players_data[players_data['title'] == player]
-    ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
+    points = ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
+    mean = intervals.loc[[player]]
+    ax.errorbar(mean['ExitVelocity'], mean['HitDistance'], xerr=bootstrap.error_bars(mean, 'ExitVelocity'),
+                yerr=bootstrap.error_bars(mean, 'HitDistance'), fmt='D', color=points.get_facecolor()[0], markeredgecolor='black', capsize=4)
 
 ax.set_xlabel('Exit Velocity (mph)')
 ax.set_ylabel('Hit Distance (feet)')
 ax.set_title(f'Exit Velocity vs Hit Distance for Selected Players')
 ax.legend()
-st.pyplot(fig)
+with instrumentation.timed('render'):
+    st.pyplot(fig)
+plt.close(fig)  # pyplot keeps every figure alive until closed
 
 # Statistical summaries
 if players:
@@ -60,8 +66,10 @@ if players:
         
         # Display player stats
         st.write(f"### {player}'s Stats")
-        st.write(f"Average Exit Velocity: {avg_exit_velocity:.2f} mph")
-        st.write(f"Median Launch Angle: {median_launch_angle:.2f}°")
+        st.write(f"Average Exit Velocity: {avg_exit_velocity:.2f} mph {bootstrap.format_interval(intervals.loc[player], 'ExitVelocity')}, "
+                 f"{percentiles.format_percentile(ranks.at[player, 'ExitVelocity_pct'])}")
+        st.write(f"Median Launch Angle: {median_launch_angle:.2f}° {bootstrap.format_interval(intervals.loc[player], 'LaunchAngle')}, "
+                 f"{percentiles.format_percentile(ranks.at[player, 'LaunchAngle_pct'])}")
         st.write(f"Home Runs (Distance > 400 feet): {home_run_count}")
 
 # Allow the user to choose a specific hit based on distance
@@ -70,5 +78,6 @@ if players_data.shape[0] > 0:
     hit_choice = st.selectbox('Select Hit', players_data['HitDistance'].sort_values(ascending=False).head(10))
 
     # Get the video URL for the selected hit
-    hit_video_url = players_data[players_data['HitDistance'] == hit_choice].iloc[0]['video']
-    st.video(hit_video_url)
+    hit = players_data[players_data['HitDistance'] == hit_choice].iloc[[0]]
+    st.video(hit['video'].iloc[0])
+    st.write(f"This hit league-wide: {percentiles.describe(percentiles.get_ranks(dataset).hit_ranks(hit).iloc[0])}")
@@ -1,25 +1,21 @@
-import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
+
+import bootstrap
+import expected_distance
+import export
+import hit_data
+import instrumentation
+import percentiles
+import selections
+import similar_hits
 
 # Streamlit header
 st.title("Baseball Hit Analyzer")
 
-# Correct raw URL of the CSV file
-url = "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv"
-
-# Load the CSV file directly from the URL
-data = pd.read_csv(url)
-
-# Handle missing values
-data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
-data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
-data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
-data['title'] = data['title'].fillna('Unknown')
-
-# Check for duplicates
-data = data.drop_duplicates(subset=['play_id'])
+# Shared dataset, loaded and cleaned once per process (the latest snapshot in live mode)
+dataset = hit_data.current_dataset()
+data = dataset.data
 
 # Sidebar for Insights
 st.sidebar.title('Data Insights')
@@ -45,59 +41,86 @@ elif language == 'Japanese':
     st.sidebar.write("### 打球角度")
     st.sidebar.write("打球角度は、バットからボールが飛び出す軌道です。理想的な角度は20°から30°の間です。")
 
+# League sweet spot next to the launch-angle guidance: expected distance for each
+# exit velocity and launch angle (one table and chart per dataset)
+expected_distances = expected_distance.get_table(dataset)
+st.sidebar.image(expected_distances.heatmap(), width='stretch')
+
 # Allow the user to select multiple players
 players = st.multiselect('Select Players', data['title'].unique())
 
 # Filter dataset for selected players
-players_data = data[data['title'].isin(players)]
+with instrumentation.timed('filter'):
+    players_data = selections.rows(dataset, players)
+
+# Bootstrap confidence intervals of each player's stats (cached per player)
+intervals = bootstrap.get_bootstrap(dataset).intervals({player: [player] for player in players})
+
+# League percentile ranks of each player's stats
+ranks = percentiles.player_ranks(dataset, players)
 
 # Plot Exit Velocity vs Hit Distance for selected players
 fig, ax = plt.subplots()
 
-# Add scatter plot for each player
+# Add scatter plot for each player, with its mean and 95% interval in both directions
 for player in players:
     player_data = players_data[players_data['title'] == player]
-    ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
+    points = ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
+    mean = intervals.loc[[player]]
+    ax.errorbar(mean['ExitVelocity'], mean['HitDistance'], xerr=bootstrap.error_bars(mean, 'ExitVelocity'),
+                yerr=bootstrap.error_bars(mean, 'HitDistance'), fmt='D', color=points.get_facecolor()[0], markeredgecolor='black', capsize=4)
 
 ax.set_xlabel('Exit Velocity (mph)')
 ax.set_ylabel('Hit Distance (feet)')
 ax.set_title(f'Exit Velocity vs Hit Distance for Selected Players')
 ax.legend()
-st.pyplot(fig)
+with instrumentation.timed('render'):
+    st.pyplot(fig)
+plt.close(fig)  # pyplot keeps every figure alive until closed
 
 # Statistical summaries
 if players:
     for player in players:
-        player_data = players_data[players_data['title'] == player]
-        
-        # Calculate statistics
-        avg_exit_velocity = player_data['ExitVelocity'].mean()
-        median_launch_angle = player_data['LaunchAngle'].median()
-        home_run_count = player_data[player_data['HitDistance'] > 400].shape[0]  # Assuming 400 feet is a home run distance
-        
+        # Precomputed statistics (average EV, median LA, 400+ ft home runs)
+        stats = dataset.player_stats(player)
+
         # Display player stats
         st.write(f"### {player}'s Stats")
-        st.write(f"Average Exit Velocity: {avg_exit_velocity:.2f} mph")
-        st.write(f"Median Launch Angle: {median_launch_angle:.2f}°")
-        st.write(f"Home Runs (Distance > 400 feet): {home_run_count}")
+        st.write(f"Average Exit Velocity: {stats['avg_exit_velocity']:.2f} mph {bootstrap.format_interval(intervals.loc[player], 'ExitVelocity')}, "
+                 f"{percentiles.format_percentile(ranks.at[player, 'ExitVelocity_pct'])}")
+        st.write(f"Median Launch Angle: {stats['median_launch_angle']:.2f}° {bootstrap.format_interval(intervals.loc[player], 'LaunchAngle')}, "
+                 f"{percentiles.format_percentile(ranks.at[player, 'LaunchAngle_pct'])}")
+        st.write(f"Home Runs (Distance > 400 feet): {stats['home_runs']}")
 
 # Add "Best of the Best" Section (Top Performances)
 st.write("### Top Home Runs (Exit Velocity > 110 mph and Distance > 400 feet)")
-top_home_runs = data[(data['ExitVelocity'] > 110) & (data['HitDistance'] > 400)].nlargest(10, 'ExitVelocity')
+top_home_runs = dataset.top(10)
 for idx, row in top_home_runs.iterrows():
     st.write(f"Player: {row['title']}, Exit Velocity: {row['ExitVelocity']} mph, Distance: {row['HitDistance']} feet")
 
 # Interactive Player Stat Comparison (Side-by-Side)
 if len(players) > 1:
-    comparison_data = players_data.groupby('title').agg({
-        'ExitVelocity': 'mean',
-        'LaunchAngle': 'median',
-        'HitDistance': 'mean'
-    }).reset_index()
+    comparison_data = selections.comparison(dataset, players)
 
     st.write("### Player Stat Comparison")
     st.bar_chart(comparison_data.set_index('title'))
 
+# Download what's on screen; the file is only written (in chunks) when the button is clicked
+st.write("### Export")
+export_scope = st.radio('Rows', ['Selected players (all hits if none selected)', 'Top home runs'], horizontal=True)
+export_format = st.radio('Format', list(export.MEDIA_TYPES), horizontal=True)
+if export_scope == 'Top home runs':
+    export_data, export_keep = top_home_runs, None
+else:
+    export_data, export_keep = data, export.row_filter(players=players)
+st.download_button(
+    'Download',
+    lambda: export.to_file(export_data, export_format, export_keep),
+    file_name=f'home_runs.{export_format}',
+    mime=export.MEDIA_TYPES[export_format],
+    on_click='ignore',
+)
+
 # Allow users to save favorite players
 if 'favorites' not in st.session_state:
     st.session_state.favorites = []
@@ -112,14 +135,10 @@ st.write(st.session_state.favorites)
 
 # Basic Predictive Model for Exit Velocity
 st.write("### Predict Exit Velocity for a Future Hit")
-X = players_data[['LaunchAngle', 'HitDistance']]  # Features
-y = players_data['ExitVelocity']  # Target
-model = LinearRegression()
-model.fit(X, y)
-
-# Predict Exit Velocity for new data (example: Launch Angle = 22°, Hit Distance = 410 ft)
-predicted_velocity = model.predict([[22, 410]])
-st.write(f"Predicted Exit Velocity for future hit: {predicted_velocity[0]:.2f} mph")
+if players_data.shape[0] > 0:
+    # Predict Exit Velocity for new data (example: Launch Angle = 22°, Hit Distance = 410 ft)
+    predicted_velocity = selections.prediction(dataset, players, launch_angle=22, hit_distance=410)
+    st.write(f"Predicted Exit Velocity for future hit: {predicted_velocity:.2f} mph")
 
 # Allow the user to choose a specific hit based on distance
 if players_data.shape[0] > 0:
@@ -127,5 +146,26 @@ if players_data.shape[0] > 0:
     hit_choice = st.selectbox('Select Hit', players_data['HitDistance'].sort_values(ascending=False).head(10))
 
     # Get the video URL for the selected hit
-    hit_video_url = players_data[players_data['HitDistance'] == hit_choice].iloc[0]['video']
-    st.video(hit_video_url)
+    hit = players_data[players_data['HitDistance'] == hit_choice].iloc[0]
+    st.video(hit['video'])
+    league_ranks = percentiles.get_ranks(dataset)
+    st.write(f"This hit league-wide: {percentiles.describe(league_ranks.hit_ranks(players_data.loc[[hit.name]]).iloc[0])}")
+    expected = expected_distances.residuals(players_data.loc[[hit.name]]).iloc[0]
+    st.write(f"Expected distance at {hit['ExitVelocity']} mph and {hit['LaunchAngle']}°: {expected['expected_distance']:.0f} ± {expected['expected_spread']:.0f} feet "
+             f"(this hit: {expected['distance_over_expected']:+.0f} feet)")
+
+    # Hits league-wide most like the selected one, from a KD-tree built once per dataset
+    st.write("### Similar Hits League-Wide")
+    scaled = st.checkbox('Scale features (weigh mph, degrees and feet equally)', value=True)
+    long_only = st.checkbox(f'Only hits of {hit_data.HOME_RUN_DISTANCE}+ feet')
+    index = similar_hits.get_index(dataset)
+    mask = similar_hits.filter_mask(data, min_distance=hit_data.HOME_RUN_DISTANCE if long_only else None)
+    with instrumentation.timed('similar_hits'):
+        similar = index.similar_to(index.positions([hit['play_id']]), k=10, scaled=scaled, mask=mask)
+    similar = similar.join(league_ranks.hit_ranks(similar)).join(expected_distances.residuals(similar)[['distance_over_expected']])
+    st.dataframe(similar[['title', *similar_hits.FEATURES, *(f'{feature}{percentiles.SUFFIX}' for feature in similar_hits.FEATURES), 'distance_over_expected', 'distance']])
+
+    # Link each result into the video display
+    if not similar.empty:
+        similar_choice = st.selectbox('Watch a Similar Hit', similar.index, format_func=lambda i: similar.at[i, 'title'])
+        st.video(similar.at[similar_choice, 'video'])
@@ -0,0 +1,255 @@
+import io
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+import seaborn as sns
+
+import bootstrap
+import compact
+import derived
+import expected_distance
+import hit_data
+import player_similarity
+import percentiles
+import progression
+import rendering
+import selections
+import similar_hits
+
+# Timings of each stage of app3.py / app5.py at increasing row counts.
+#
+#   pip install pytest-benchmark
+#   python -m pytest benchmarks/bench_analyzer.py --benchmark-autosave
+#   python -m pytest benchmarks/bench_analyzer.py --benchmark-compare --benchmark-compare-fail=mean:20%
+#
+# Results are saved under .benchmarks/ so later runs can be compared against them.
+
+
+def _render(fig):
+    # st.pyplot() saves the figure as PNG (at 200 dpi, cropped), so that is part of the cost
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=rendering.DPI, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def test_load_csv(benchmark, csv_path):
+    benchmark.pedantic(pd.read_csv, args=(csv_path,), rounds=3)
+
+
+def test_clean(benchmark, raw_data):
+    benchmark.pedantic(hit_data.clean_data, setup=lambda: ((raw_data.copy(),), {}), rounds=5)
+
+
+def test_unique_titles(benchmark, data):
+    # Options for every 'Select Player' widget
+    benchmark(data['title'].unique)
+
+
+def test_filter_player(benchmark, data, players):
+    # app3.py: player_data = data[data['title'] == player]
+    benchmark(lambda: data[data['title'] == players[0]])
+
+
+def test_filter_players(benchmark, data, players):
+    # app5.py: players_data = data[data['title'].isin(players)]
+    benchmark(lambda: data[data['title'].isin(players)])
+
+
+def test_filter_players_cached(benchmark, data, players):
+    # app5.py: the same selection from the cross-session cache (rows by position)
+    dataset = hit_data.Dataset(data)
+    selections.rows(dataset, players)
+    benchmark(selections.rows, dataset, players)
+
+
+def test_player_stats_table(benchmark, data, players):
+    # app3.py: stats table and correlation matrix for the selected player
+    def stats():
+        player_data = data[data['title'] == players[0]]
+        return player_data[hit_data.METRICS].agg(['mean', 'min', 'max']), player_data[hit_data.METRICS].corr()
+
+    benchmark(stats)
+
+
+def test_compare_players(benchmark, data, players):
+    # app5.py: side-by-side comparison table
+    benchmark(hit_data.compare_players, data, players)
+
+
+def test_top_home_runs(benchmark, data):
+    benchmark(hit_data.top_home_runs, data)
+
+
+def test_player_aggregates(benchmark, data):
+    # One grouped pass that backs the precomputed stats in hit_data.Dataset
+    benchmark.pedantic(hit_data.player_aggregates, args=(data,), rounds=3)
+
+
+def test_render_player_figures(benchmark, data, players):
+    # app3.py: metric scatter, exit-velocity histogram and correlation heatmap
+    player_data = data[data['title'] == players[0]]
+
+    def render():
+        fig, ax = plt.subplots()
+        ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], alpha=0.6, edgecolors="w", s=100)
+        _render(fig)
+        fig, ax = plt.subplots()
+        ax.hist(player_data['ExitVelocity'], bins=30, color='skyblue', edgecolor='black')
+        _render(fig)
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(player_data[hit_data.METRICS].corr(), annot=True, cmap='coolwarm', ax=ax)
+        _render(fig)
+
+    benchmark.pedantic(render, rounds=5)
+
+
+def test_render_player_figures_pooled(benchmark, data, players):
+    # The same three charts as app3.py draws them: submitted together, rendered in the chart pool
+    player_data = data[data['title'] == players[0]]
+
+    def render():
+        charts = [
+            rendering.submit(rendering.metric_scatter, players[0], player_data, 'Exit Velocity'),
+            rendering.submit(rendering.metric_histogram, players[0], player_data['ExitVelocity'], 'ExitVelocity'),
+            rendering.submit(rendering.correlation_heatmap, players[0], player_data[hit_data.METRICS].corr(), figsize=(8, 6)),
+        ]
+        return [chart.result() for chart in charts]
+
+    benchmark.pedantic(render, rounds=5)
+
+
+def test_render_comparison(benchmark, data, players):
+    # app5.py: Exit Velocity vs Hit Distance for the selected players
+    players_data = data[data['title'].isin(players)]
+
+    def render():
+        fig, ax = plt.subplots()
+        for player in players:
+            player_data = players_data[players_data['title'] == player]
+            ax.scatter(player_data['ExitVelocity'], player_data['HitDistance'], label=player)
+        ax.legend()
+        _render(fig)
+
+    benchmark.pedantic(render, rounds=5)
+
+
+def test_render_league_scatter(benchmark, data):
+    # Worst case: every row on one chart
+    def render():
+        fig, ax = plt.subplots()
+        ax.scatter(data['ExitVelocity'], data['HitDistance'], s=2)
+        _render(fig)
+
+    benchmark.pedantic(render, rounds=1, iterations=1)
+
+
+def test_fit_model_selection(benchmark, data, players):
+    # app5.py: linear model fitted on the selected players' hits
+    players_data = data[data['title'].isin(players)]
+    benchmark(hit_data.predict_exit_velocity, players_data)
+
+
+def test_fit_model_league(benchmark, data):
+    benchmark.pedantic(hit_data.predict_exit_velocity, args=(data,), rounds=3)
+
+
+def test_similar_hits_build(benchmark, data):
+    # app5.py: KD-tree over the whole frame, built once per dataset
+    benchmark.pedantic(lambda: similar_hits.SimilarHitsIndex(data)._tree(True), rounds=1, iterations=1)
+
+
+def test_similar_hits_query(benchmark, data):
+    # app5.py: 10 nearest hits for each of 100 hits, with and without a 400+ ft filter
+    index = similar_hits.SimilarHitsIndex(data)
+    mask = similar_hits.filter_mask(data, min_distance=hit_data.HOME_RUN_DISTANCE)
+    positions = list(range(100))
+    index._tree(True)
+
+    def query():
+        index.similar_to(positions)
+        index.similar_to(positions, mask=mask)
+
+    benchmark(query)
+
+
+def test_player_features(benchmark, data):
+    # app3.py: per-batter feature vectors behind "nearest peers"
+    benchmark.pedantic(player_similarity.player_features, args=(data,), rounds=1, iterations=1)
+
+
+def test_player_peers(benchmark, data):
+    # One player's peers: a single matrix-vector product
+    similarity = player_similarity.PlayerSimilarity.from_data(data)
+    similarity.clusters()
+    benchmark(similarity.peers, similarity.names[0])
+
+
+def test_player_top_peers_table(benchmark, data):
+    # Every player's top peers, from the blocked all-pairs similarity
+    features = player_similarity.player_features(data)
+    benchmark.pedantic(lambda: player_similarity.PlayerSimilarity(features).top_peers(), rounds=1, iterations=1)
+
+
+def test_progression_build(benchmark, data):
+    # app3.py: rolling means and streaks for every player in one sorted pass
+    benchmark.pedantic(progression.build, args=(data,), rounds=1, iterations=1)
+
+
+def test_bootstrap_intervals(benchmark, data, players):
+    # app3.py/app4.py: 10,000 resamples of each selected player, drawn in one batch
+    benchmark(lambda: bootstrap.Bootstrap(data).intervals({player: [player] for player in players}))
+
+
+def test_percentiles_build(benchmark, data):
+    # League ranks: every metric and player stat sorted once per dataset
+    dataset = hit_data.Dataset(data)
+    benchmark.pedantic(percentiles.build, args=(dataset,), rounds=3)
+
+
+def test_percentiles_extend(benchmark, data):
+    # Live mode: a 500-hit batch merged into the sorted league instead of a re-sort
+    ranks = percentiles.LeagueRanks.from_values({metric: data[metric].to_numpy() for metric in hit_data.METRICS},
+                                                {metric: data[metric].to_numpy() for metric in hit_data.PLAYER_STATISTICS})
+    batch = {metric: data[metric].to_numpy()[:500] for metric in hit_data.METRICS}
+    benchmark(ranks.extend, batch, ranks._players)
+
+
+def test_expected_distance_build(benchmark, data):
+    # app5.py: binned EV x LA distance table, rebuilt with every dataset
+    benchmark.pedantic(expected_distance.ExpectedDistance, args=(data,), rounds=3)
+
+
+def test_expected_distance_lookup(benchmark, data):
+    # Every hit's expected distance and over/under, by table lookup
+    table = expected_distance.ExpectedDistance(data)
+    benchmark(table.residuals, data)
+
+
+def test_derived_hit_score(benchmark, data):
+    # app3.py: HitScore column computed on first use (then cached per dataset)
+    benchmark(lambda: derived.DerivedColumns(data).column('HitScore'))
+
+
+def test_compact_encode(benchmark, data):
+    # HIT_COMPACT_STRINGS=1: play_id, title and video encoded once per dataset
+    benchmark.pedantic(compact.compact_frame, args=(data,), rounds=1, iterations=1)
+
+
+@pytest.mark.parametrize('encoding', ['plain', 'compact'])
+def test_drop_duplicate_play_ids(benchmark, data, encoding):
+    frame = compact.compact_frame(data) if encoding == 'compact' else data
+    benchmark(frame.drop_duplicates, subset=['play_id'])
+
+
+@pytest.mark.parametrize('encoding', ['plain', 'compact'])
+def test_parse_titles(benchmark, data, encoding):
+    # Behind player search, peers and progression; compact titles skip the regex
+    titles = compact.compact_frame(data)['title'] if encoding == 'compact' else data['title']
+    parse = compact.parse_titles if encoding == 'compact' else hit_data.parse_titles
+    benchmark.pedantic(parse, args=(titles,), rounds=1, iterations=1)
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+import hit_data
+from benchmarks.synthetic import generate
+
+# Row counts to benchmark; override with e.g. BENCH_SIZES=5000,500000
+SIZES = [int(size) for size in os.environ.get('BENCH_SIZES', '5000,500000,5000000').split(',')]
+
+
+# Session-scoped and parametrized, so each size is generated once and
+# released before the next size is built
+@pytest.fixture(scope='session', params=SIZES, ids=lambda size: f'{size}rows')
+def raw_data(request):
+    return generate(request.param)
+
+
+@pytest.fixture(scope='session')
+def csv_path(raw_data, tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / f'homeruns-{len(raw_data)}.csv'
+    raw_data.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope='session')
+def data(raw_data):
+    return hit_data.clean_data(raw_data.copy())
+
+
+# A selection like the ones made in the apps' player pickers
+@pytest.fixture(scope='session')
+def players(data):
+    return list(data['title'].unique()[:5])
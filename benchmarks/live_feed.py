@@ -0,0 +1,35 @@
+import argparse
+import os
+import time
+
+from benchmarks.synthetic import generate
+
+# Simulated live feed for live mode (see live.py): synthetic batches written
+# into the drop directory at an interval.
+#
+#   python -m benchmarks.live_feed /tmp/hits --rows 20 --interval 2
+
+
+# Write synthetic batches into the drop directory, renaming each into place when complete
+def simulate(directory, rows=20, interval=2.0, batches=None, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    while batches is None or count < batches:
+        path = os.path.join(directory, f'batch-{time.time_ns()}.csv')
+        generate(rows, seed=seed + count).to_csv(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+        count += 1
+        print(f"Wrote {rows} hits to {path}")
+        if batches is None or count < batches:
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulated live feed of home runs')
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=20, help='hits per batch')
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between batches')
+    parser.add_argument('--batches', type=int, help='stop after this many batches')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    simulate(args.directory, args.rows, args.interval, args.batches, args.seed)
@@ -0,0 +1,184 @@
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import hit_data
+from benchmarks.synthetic import write_csv
+
+# Concurrent-session load test for the Streamlit pages, driven by AppTest:
+#
+#   python -m benchmarks.load_test --sessions 16 --iterations 5 --rows 50000
+#
+# Every simulated session runs in its own thread against the same process,
+# like browser tabs on one Streamlit server, and clicks through app3.py and
+# app5.py. The dataset is a local synthetic CSV and the Google Cloud clients
+# are replaced by in-process stand-ins, so only our own code is measured.
+PAGES = ['app3.py', 'app5.py']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# In-process stand-ins for google.cloud.translate_v2 and google.cloud.firestore,
+# with the real clients' signatures so a wrong keyword fails here too
+def install_stand_ins(latency=0.0):
+    class TranslateClient:
+        def translate(self, values, target_language=None, format_=None, source_language=None, customization_ids=(), model=None):
+            time.sleep(latency)
+            return {'translatedText': f'[{target_language}] {values}'}
+
+    class Document:
+        def set(self, data):
+            time.sleep(latency)
+
+    class Collection:
+        def document(self, name):
+            return Document()
+
+    class FirestoreClient:
+        def collection(self, name):
+            return Collection()
+
+    try:
+        import google  # namespace package, also used by protobuf
+    except ImportError:
+        google = types.ModuleType('google')
+        google.__path__ = []
+        sys.modules['google'] = google
+    cloud = types.ModuleType('google.cloud')
+    translate = types.ModuleType('google.cloud.translate_v2')
+    translate.Client = TranslateClient
+    firestore = types.ModuleType('google.cloud.firestore')
+    firestore.Client = FirestoreClient
+    firestore.SERVER_TIMESTAMP = object()
+    cloud.translate_v2, cloud.firestore = translate, firestore
+    google.cloud = cloud
+    sys.modules.update({'google.cloud': cloud, 'google.cloud.translate_v2': translate, 'google.cloud.firestore': firestore})
+
+
+class Session:
+    def __init__(self, page, rng, timeout, cold):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=timeout)
+        self.page = page
+        self.rng = rng
+        self.cold = cold
+        self.timings = []
+
+    # Time one rerun triggered by `action` (a widget interaction or the first load)
+    def rerun(self, action, interact=None):
+        if self.cold:
+            hit_data.get_dataset.cache_clear()
+        if interact is not None:
+            interact(self.app)
+        start = time.perf_counter()
+        self.app.run()
+        self.timings.append((self.page, action, time.perf_counter() - start))
+        if self.app.exception:
+            raise RuntimeError(f'{self.page} raised during {action}: {self.app.exception[0].message}')
+
+    def pick(self, options, k):
+        return [options[i] for i in self.rng.sample(range(len(options)), min(k, len(options)))]
+
+    def click_through_app3(self):
+        self.rerun('load')
+        player = self.pick(self.app.selectbox(key='select_player').options, 1)[0]
+        self.rerun('select player', lambda at: at.selectbox(key='select_player').set_value(player))
+        for metric in ('Hit Distance', 'Launch Angle', 'Exit Velocity'):
+            self.rerun('metric radio', lambda at: at.radio(key='metric_select').set_value(metric))
+        players = self.pick(self.app.multiselect(key='select_players_to_compare').options, 3)
+        self.rerun('compare players', lambda at: at.multiselect(key='select_players_to_compare').set_value(players))
+        for chart_type in ('Line Chart', 'Bar Chart', 'Scatter Plot'):
+            self.rerun('chart type', lambda at: at.selectbox(key='chart_type').set_value(chart_type))
+        self.rerun('favorites', lambda at: at.button(key='add_to_favorites').click())
+
+    def click_through_app5(self):
+        self.rerun('load')
+        players = self.pick(self.app.multiselect[0].options, 3)
+        self.rerun('select players', lambda at: at.multiselect[0].set_value(players))
+        save = next(button for button in self.app.button if button.label == 'Save as Favorite')
+        self.rerun('favorites', lambda at: save.click())
+        hits = [box for box in self.app.selectbox if box.label == 'Select Hit']
+        if hits and len(hits[0].options) > 1:
+            self.rerun('select hit', lambda at: hits[0].set_value(hits[0].options[1]))
+
+    def run(self, iterations):
+        scenario = self.click_through_app3 if self.page == 'app3.py' else self.click_through_app5
+        for _ in range(iterations):
+            scenario()
+        return self.timings
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _summary(name, latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return f'{name:<28} {len(latencies):>7} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f}'
+
+
+def run_load_test(sessions, iterations, rows, pages=PAGES, latency=0.0, timeout=120, cold=False, seed=0):
+    csv_path = os.path.join(tempfile.mkdtemp(), f'homeruns-{rows}.csv')
+    write_csv(rows, csv_path, seed=seed)
+    # The pages load from hit_data.DATA_URL, which HIT_DATA_URL only sets at import
+    hit_data.DATA_URL = csv_path
+    hit_data.get_dataset.cache_clear()
+    install_stand_ins(latency)
+    # AppTest turns global.appTest on by patching config.get_option for the length
+    # of each run; concurrent runs undo each other's patch, and widgets registered
+    # meanwhile lose the state AppTest reads back. Keep it on for the whole test
+    from streamlit import config
+
+    config.set_option('global.appTest', True)
+    rss_before = _peak_rss_mb()
+
+    clients = [
+        Session(pages[i % len(pages)], random.Random(seed + i), timeout, cold)
+        for i in range(sessions)
+    ]
+    lock = threading.Lock()
+    timings = []
+
+    def drive(session):
+        result = session.run(iterations)
+        with lock:
+            timings.extend(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(drive, session) for session in clients]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    print(f'{sessions} sessions x {iterations} iterations on {rows} rows ({", ".join(pages)}), '
+          f'{"cold" if cold else "warm"} dataset cache, {latency * 1000:.0f} ms stand-in latency')
+    print(f'{"":<28} {"reruns":>7} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    print(_summary('all reruns', [t for _, _, t in timings]))
+    for page in pages:
+        for action in dict.fromkeys(a for p, a, _ in timings if p == page):
+            print(_summary(f'{page} {action}', [t for p, a, t in timings if p == page and a == action]))
+    print(f'throughput: {len(timings) / elapsed:.1f} reruns/s over {elapsed:.1f} s')
+    print(f'peak RSS: {_peak_rss_mb():.0f} MB (before sessions: {rss_before:.0f} MB)')
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent-session load test for the Streamlit pages')
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=5037)
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each stand-in cloud call')
+    parser.add_argument('--cold', action='store_true', help='reload the dataset on every rerun, as before caching')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+    run_load_test(args.sessions, args.iterations, args.rows, args.pages, args.latency, args.timeout, args.cold)
@@ -0,0 +1,117 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Synthetic home-run data with the same schema and rough distributions as the
+# 2016 file (before cleaning), for measuring the analyzer at larger scales:
+#
+#   python -m benchmarks.synthetic 500000 /tmp/homeruns-500k.csv
+
+# Shape of the real file: 5,499 raw rows, 462 duplicated play_ids, ~1% missing
+# EV/LA, a few missing titles, and 0 ft distances where Statcast had no reading
+DUPLICATE_RATE = 0.084
+MISSING_METRIC_RATE = 0.009
+MISSING_DISTANCE_RATE = 0.001
+MISSING_TITLE_RATE = 0.0004
+ZERO_DISTANCE_RATE = 0.02
+REVIEW_TITLE_RATE = 0.004
+HOME_RUNS_PER_PLAYER = 12
+
+FIRST_NAMES = ['Mike', 'José', 'Evan', 'Marcus', 'Mark', 'Brian', 'Justin', 'Eddie', 'Nelson', 'Giancarlo',
+               'Kris', 'Adrián', 'Carlos', 'Yoenis', 'Víctor', 'Nolan', 'Edwin', 'Steven', 'Ken', 'Robinson']
+LAST_NAMES = ['Trout', 'Abreu', 'Longoria', 'Semien', 'Trumbo', 'McCann', 'Upton', 'Rosario', 'Cruz', 'Stanton',
+              'Bryant', 'Beltré', 'González', 'Céspedes', 'Martínez', 'Arenado', 'Encarnación', 'Souza', 'Griffey', 'Canó']
+SUFFIXES = ['', '', '', '', '', '', '', '', ' Jr.', ' Jr. ']
+SYLLABLES = ['bar', 'ca', 'del', 'for', 'gon', 'her', 'lin', 'mar', 'nez', 'or', 'per', 'ri', 'san', 'ter', 'vel', 'zo']
+HIT_TYPES = np.array(['fly ball', 'line drive'])
+FIELDS = np.array(['left field', 'left-center field', 'center field', 'right-center field', 'right field'])
+VIDEO_PREFIX = 'https://sporty-clips.mlb.com/'
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype='S1')
+_URL_SAFE = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_', dtype='S1')
+
+
+# Random version-4 UUID strings, built as a byte matrix rather than one uuid4() per row
+def _uuids(rng, n):
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = np.empty((n, 32), dtype='S1')
+    digits[:, 0::2] = _HEX[raw >> 4]
+    digits[:, 1::2] = _HEX[raw & 0x0F]
+    chars = np.full((n, 36), b'-', dtype='S1')
+    chars[:, [i for i in range(36) if i not in (8, 13, 18, 23)]] = digits
+    return chars.view('S36').ravel().astype(str)
+
+
+def _player_names(rng, count):
+    first = pd.Series(rng.choice(FIRST_NAMES, count))
+    # Mix real surnames with made-up ones so large rosters stay mostly distinct
+    syllables = rng.choice(SYLLABLES, size=(count, 3))
+    made_up = pd.Series(syllables[:, 0]).str.capitalize() + syllables[:, 1] + np.where(rng.random(count) < 0.5, syllables[:, 2], '')
+    last = made_up.where(rng.random(count) < 0.7, pd.Series(rng.choice(LAST_NAMES, count)))
+    suffix = pd.Series(rng.choice(SUFFIXES, count))
+    names = first + ' ' + last + suffix
+    # Remaining clashes get a middle initial, as on real rosters
+    repeats = names.groupby(names).cumcount()
+    initials = pd.Series(np.array(list('ABCDEFGHJKLMNPRSTW'))[repeats.values % 18])
+    return names.where(repeats == 0, first + ' ' + initials + '. ' + last + suffix)
+
+
+# Cleaned-looking rows before duplicates and gaps are injected
+def _hits(rng, n):
+    players = _player_names(rng, max(n // HOME_RUNS_PER_PLAYER, 1))
+    # Power is concentrated: a few sluggers hit many more home runs than most players
+    weights = 1 / np.arange(1, len(players) + 1) ** 0.6
+    player = rng.choice(len(players), size=n, p=weights / weights.sum())
+
+    exit_velocity = np.clip(rng.normal(103.3, 4.35, n), 87, 118).round(1)
+    launch_angle = np.clip(rng.normal(28.0, 5.1, n), 14, 48).round()
+    hit_distance = 412 + 6.5 * (exit_velocity - 103.3) - 0.45 * (launch_angle - 28) ** 2 + rng.normal(0, 14, n)
+    hit_distance = np.clip(hit_distance, 300, 504).round()
+    hit_distance[rng.random(n) < ZERO_DISTANCE_RATE] = 0
+
+    # Season home-run number: position of the hit within the player's hits
+    ordinal = pd.Series(player).groupby(player).cumcount().values + 1
+    hit_type = np.where(launch_angle > 24, HIT_TYPES[0], HIT_TYPES[rng.integers(0, 2, n)])
+    field = FIELDS[rng.integers(0, len(FIELDS), n)]
+    titles = (players.values[player] + ' homers (' + ordinal.astype(str) + ') on a ' + hit_type + ' to ' + field + '.')
+    reviewed = rng.random(n) < REVIEW_TITLE_RATE
+    titles[reviewed] = 'Umpire reviewed (home run), call on the field was upheld: ' + titles[reviewed]
+
+    video_ids = rng.choice(_URL_SAFE, size=(n, 44)).view('S44').ravel().astype(str)
+    return pd.DataFrame({
+        'play_id': _uuids(rng, n),
+        'title': titles,
+        'ExitVelocity': exit_velocity,
+        'HitDistance': hit_distance,
+        'LaunchAngle': launch_angle,
+        'video': VIDEO_PREFIX + pd.Series(video_ids) + '.mp4',
+    })
+
+
+# Raw rows as read from the CSV: duplicates and missing values included
+def generate(n, seed=0):
+    rng = np.random.default_rng(seed)
+    unique = max(int(round(n * (1 - DUPLICATE_RATE))), 1)
+    data = _hits(rng, unique)
+    duplicates = data.iloc[rng.integers(0, unique, n - unique)]
+    data = pd.concat([data, duplicates], ignore_index=True)
+    data = data.iloc[rng.permutation(len(data))].reset_index(drop=True)
+
+    for column, rate in (('ExitVelocity', MISSING_METRIC_RATE), ('LaunchAngle', MISSING_METRIC_RATE),
+                         ('HitDistance', MISSING_DISTANCE_RATE), ('title', MISSING_TITLE_RATE)):
+        data.loc[rng.random(n) < rate, column] = np.nan
+    return data
+
+
+def write_csv(n, path, seed=0):
+    generate(n, seed).to_csv(path, index=False)
+    return path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m benchmarks.synthetic ROWS OUTPUT.csv')
+    print(write_csv(int(sys.argv[1]), sys.argv[2]))
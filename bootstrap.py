@@ -0,0 +1,137 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import hit_data
+import instrumentation
+
+# Bootstrap confidence intervals for the comparison stats (mean EV, median LA,
+# mean distance), so players with a handful of home runs aren't read as
+# precisely as players with forty. All resamples of all requested players are
+# drawn as one index matrix (resamples x hits) and reduced per player, with no
+# loop over resamples; intervals are cached per player for the dataset (and
+# carried over to the next live snapshot for players without new hits).
+
+RESAMPLES = 10_000
+CONFIDENCE = 0.95
+STATISTICS = hit_data.PLAYER_STATISTICS
+# Resamples x hits drawn at once; more resamples than that are drawn in chunks
+MAX_DRAWS = 20_000_000
+
+
+# Percentile intervals of each metric's statistic for every group at once.
+# `groups` are (hits x metrics) arrays; returns (groups x metrics) low and high bounds
+def intervals(groups, statistics, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0):
+    sizes = np.array([len(group) for group in groups], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    values = np.concatenate(groups) if len(groups) else np.empty((0, len(statistics)))
+    owner = np.repeat(np.arange(len(groups)), sizes)
+    nonempty = sizes > 0
+    starts = offsets[:-1][nonempty]
+    # Medians read the draws as ranks within each group, over that group's sorted values
+    ordered = {m: values[np.lexsort((values[:, m], owner)), m] for m, statistic in enumerate(statistics) if statistic == 'median'}
+    middle = [starts + (sizes[nonempty] - 1) // 2, starts + sizes[nonempty] // 2]
+
+    # Column j of the index matrix draws a hit of group owner[j], so every resample
+    # of every group is one row of the matrix
+    scale = sizes[owner].astype(np.float32)
+    first = offsets[owner].astype(np.int32)
+    last = (sizes[owner] - 1).astype(np.int32)
+    rng = np.random.default_rng(seed)
+    estimates = np.full((resamples, len(groups), len(statistics)), np.nan)
+    step = max(1, MAX_DRAWS // max(len(values), 1))
+    for start in range(0, resamples, step):
+        rows = slice(start, min(start + step, resamples))
+        draws = (rng.random((rows.stop - start, len(values)), dtype=np.float32) * scale).astype(np.int32)
+        np.minimum(draws, last, out=draws)
+        draws += first
+        sorted_draws = np.sort(draws, axis=1) if ordered else None
+        for m, statistic in enumerate(statistics):
+            if not nonempty.any():
+                break
+            if statistic == 'mean':
+                estimates[rows, nonempty, m] = np.add.reduceat(values[:, m][draws], starts, axis=1) / sizes[nonempty]
+            elif statistic == 'median':
+                # Sorting the draws sorts each group's block in place (blocks don't overlap)
+                low, high = (ordered[m][sorted_draws[:, positions]] for positions in middle)
+                estimates[rows, nonempty, m] = (low + high) / 2
+
+    # Groups without hits keep NaN bounds
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.full((2, len(groups), len(statistics)), np.nan)
+    low[nonempty], high[nonempty] = np.percentile(estimates[:, nonempty], [tail, 100 - tail], axis=0)
+    return low, high
+
+
+class Bootstrap:
+    def __init__(self, data, resamples=RESAMPLES, confidence=CONFIDENCE):
+        self.data = data
+        self.resamples = resamples
+        self.confidence = confidence
+        self._intervals = {}
+
+    # Intervals over `data`, which is this one's rows plus new ones from row `start`:
+    # those of players without new hits are kept
+    def extend(self, data, start):
+        titles = set(data['title'].iloc[start:].astype(str))
+        bootstrap = Bootstrap(data, self.resamples, self.confidence)
+        bootstrap._intervals = {key: result for key, result in self._intervals.items() if titles.isdisjoint(key)}
+        return bootstrap
+
+    # Point estimate, interval bounds and hit count per player, one row per label.
+    # `players` maps a label to its titles ({title: [title]} for plain selections);
+    # only players not seen before are resampled, all of them in one batch
+    def intervals(self, players):
+        players = {label: tuple(titles) for label, titles in players.items()}
+        missing = {label: titles for label, titles in players.items() if titles not in self._intervals}
+        if missing:
+            with instrumentation.timed('bootstrap'):
+                self._compute(missing)
+        return pd.DataFrame([self._intervals[titles] for titles in players.values()], index=list(players))
+
+    def _compute(self, players):
+        titles = [title for group in players.values() for title in group]
+        rows = self.data.loc[self.data['title'].isin(titles), ['title', *STATISTICS]]
+        codes = rows['title'].map({title: i for i, group in enumerate(players.values()) for title in group}).to_numpy()
+        metrics = rows[list(STATISTICS)].to_numpy(dtype=np.float64)
+        groups = [metrics[codes == i] for i in range(len(players))]
+        low, high = intervals(groups, list(STATISTICS.values()), self.resamples, self.confidence)
+
+        for i, key in enumerate(players.values()):
+            result = {'hits': len(groups[i])}
+            for m, (metric, statistic) in enumerate(STATISTICS.items()):
+                values = groups[i][:, m]
+                result[metric] = getattr(np, statistic)(values) if len(values) else np.nan
+                result[f'{metric}_low'] = low[i, m]
+                result[f'{metric}_high'] = high[i, m]
+            self._intervals[key] = result
+
+
+# One interval cache per loaded dataset (Dataset objects are cached per process);
+# live snapshots extend the previous snapshot's instead
+def get_bootstrap(dataset):
+    if hasattr(dataset, 'extend_index'):
+        return dataset.extend_index('bootstrap', lambda snapshot: Bootstrap(snapshot.data),
+                                    lambda bootstrap, snapshot, start: bootstrap.extend(snapshot.data, start))
+    return _get_bootstrap(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_bootstrap(dataset):
+    return Bootstrap(dataset.data)
+
+
+# Error bar lengths below and above each estimate (matplotlib's xerr/yerr); 0 without an interval
+def error_bars(intervals, metric):
+    below = intervals[metric] - intervals[f'{metric}_low']
+    above = intervals[f'{metric}_high'] - intervals[metric]
+    return np.nan_to_num(np.vstack([below.to_numpy(), above.to_numpy()]))
+
+
+# "(95% CI 101.20–104.80, 12 hits)" after a stat panel line
+def format_interval(row, metric, digits=2):
+    hits = int(row['hits'])
+    if hits < 2:
+        return '(a single hit, no interval)' if hits == 1 else ''
+    return f"({CONFIDENCE:.0%} CI {row[f'{metric}_low']:.{digits}f}–{row[f'{metric}_high']:.{digits}f}, {hits} hits)"
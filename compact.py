@@ -0,0 +1,532 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, take
+from pandas.api.indexers import check_array_indexer
+
+import hit_data
+
+# Compact in-memory encoding of the three string columns, which are most of the
+# frame's memory (set HIT_COMPACT_STRINGS=1 to load the dataset this way):
+#
+#   play_id  36-char UUID                     -> 128-bit integer as two uint64 words
+#   title    "{pre}{player}  homers ({n}){post}" -> player code, template code, n
+#   video    "https://.../{stem}.mp4"          -> URL template code, stem packed into uint64 words
+#
+# Each column is a pandas ExtensionArray, so ==, isin, groupby, drop_duplicates,
+# merges, masks and iloc keep working, mostly on the integer fields. Strings are
+# only decoded for the rows actually read (a displayed table, one selected hit).
+# Titles that don't fit the pattern are kept whole in the template dictionary;
+# a play_id or video column with values that don't fit stays plain strings.
+
+TITLE_PATTERN = r'^(?P<pre>(?:.*?: )?)(?P<player>[^:]+?)(?P<mid>\s+homers \()(?P<n>\d+)\)(?P<post>.*)$'
+UUID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+UUID_DASHES = [8, 13, 18, 23]
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+_NIBBLES = np.full(256, 255, dtype=np.uint8)
+_NIBBLES[_HEX] = np.arange(16, dtype=np.uint8)
+
+
+def _fixed_width(strings, width):
+    if not len(strings):
+        return np.empty((0, width), dtype=np.uint8)
+    offsets = np.frombuffer(strings.buffers()[1], dtype=np.int64 if pa.types.is_large_string(strings.type) else np.int32)
+    offsets = offsets[strings.offset:strings.offset + len(strings) + 1]
+    data = np.frombuffer(strings.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    return data.reshape(len(strings), width)
+
+
+# 32 lowercase hex digits per row -> (n, 2) big-endian uint64 words; None if any row isn't hex
+def _pack_hex(digits):
+    nibbles = _NIBBLES[digits]
+    if (nibbles == 255).any():
+        return None
+    packed = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    return np.ascontiguousarray(packed).view('>u8').astype(np.uint64)
+
+
+def _unpack_hex(words):
+    packed = np.ascontiguousarray(words.astype('>u8')).view(np.uint8).reshape(len(words), 16)
+    digits = np.empty((len(words), 32), dtype=np.uint8)
+    digits[:, 0::2] = _HEX[packed >> 4]
+    digits[:, 1::2] = _HEX[packed & 0x0F]
+    return digits
+
+
+def _strings_from_rows(rows):
+    n, width = rows.shape
+    offsets = pa.py_buffer((np.arange(n + 1, dtype=np.int32) * width).tobytes())
+    return pa.Array.from_buffers(pa.string(), n, [None, offsets, pa.py_buffer(np.ascontiguousarray(rows).tobytes())])
+
+
+def _strings(values):
+    if not isinstance(values, (pa.Array, pa.ChunkedArray)):
+        values = pa.array(pd.Series(values, dtype=str), type=pa.string())
+    # Arrow-backed columns (e.g. after a concat) can come back in several chunks
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return values.cast(pa.string())
+
+
+# Exact codes for rows of several integer columns (equal rows, equal code), by
+# hashing one column at a time: no sorting and no tuples
+def _row_codes(*columns):
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(column)
+        codes, uniques = pd.factorize(codes * len(uniques) + column_codes)
+        if len(uniques) == len(codes):
+            break
+    return codes
+
+
+# Hashable 16-byte values of uint64 word rows (identical across arrays, for joins)
+def _word_values(*columns):
+    return np.ascontiguousarray(np.column_stack(columns).astype(np.uint64)).view(f'S{8 * len(columns)}').ravel().astype(object)
+
+
+# Rows of `words` that appear in `other` (a handful of query rows)
+def _word_isin(words, other):
+    mask = np.zeros(len(words), dtype=bool)
+    candidates = np.flatnonzero(np.isin(words[:, 0], other[:, 0]))
+    wanted = set(map(tuple, other.tolist()))
+    mask[candidates] = [tuple(row) in wanted for row in words[candidates].tolist()]
+    return mask
+
+
+class _PlayIdCodec:
+    kind = 'play_id'
+
+    def __init__(self):
+        # A word that alone identifies every encoded play id (random UUIDs: either
+        # one), so one uint64 hash pass does for factorizing and joins
+        self.key_word = None
+
+    def encode(self, strings):
+        words = _uuid_words(strings)
+        if words is None:
+            return None
+        for column in (1, 0):
+            if pd.unique(words[:, column]).size == _row_codes(words[:, 1], words[:, 0]).max(initial=-1) + 1:
+                self.key_word = column
+                break
+        return {'words': words}
+
+    def decode(self, fields):
+        digits = _unpack_hex(fields['words'])
+        rows = np.full((len(digits), 36), ord('-'), dtype=np.uint8)
+        rows[:, [i for i in range(36) if i not in UUID_DASHES]] = digits
+        return _strings_from_rows(rows)
+
+    def codes(self, fields):
+        if self.key_word is not None:
+            return pd.factorize(fields['words'][:, self.key_word])[0]
+        return _row_codes(fields['words'][:, 1], fields['words'][:, 0])
+
+    def keys(self, fields):
+        if self.key_word is not None:
+            return fields['words'][:, self.key_word]
+        return _word_values(fields['words'][:, 0], fields['words'][:, 1])
+
+    def isin(self, fields, values):
+        words = _uuid_words(_strings([value for value in values if UUID_PATTERN.match(value)]))
+        return _word_isin(fields['words'], words)
+
+    @property
+    def nbytes(self):
+        return 0
+
+
+# 36-char UUID strings -> (n, 2) uint64 words; None if any isn't a lowercase UUID
+def _uuid_words(strings):
+    if not len(strings):
+        return np.empty((0, 2), dtype=np.uint64)
+    if strings.null_count or not pc.all(pc.equal(pc.utf8_length(strings), 36)).as_py():
+        return None
+    rows = _fixed_width(strings, 36)
+    if (rows[:, UUID_DASHES] != ord('-')).any():
+        return None
+    return _pack_hex(np.delete(rows, UUID_DASHES, axis=1))
+
+
+# Append-only string dictionary shared by every array of a column
+class _Dictionary:
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self._array = None
+
+    # Codes of `strings` (a pyarrow array without nulls), adding unseen values
+    def encode(self, strings):
+        codes, uniques = pd.factorize(pd.Series(pd.arrays.ArrowExtensionArray(strings)))
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.values)
+                self.values.append(value)
+                self._array = None
+            remap[i] = code
+        return remap[codes]
+
+    # Codes of known values only (-1 for values never seen)
+    def lookup(self, values):
+        return np.array([self._codes.get(value, -1) for value in values], dtype=np.int64)
+
+    @property
+    def array(self):
+        if self._array is None:
+            self._array = pa.array(self.values, type=pa.string())
+        return self._array
+
+    def take(self, codes):
+        return self.array.take(pa.array(codes))
+
+    @property
+    def nbytes(self):
+        return sum(len(value) for value in self.values)
+
+
+# Titles: player name dictionary, (pre, mid, post) template dictionary and the
+# season home-run number; titles without the pattern are stored whole as a
+# template with n = -1 and no player
+class _TitleCodec:
+    kind = 'title'
+
+    def __init__(self):
+        self.players = _Dictionary()
+        self.templates = _Dictionary()
+
+    def encode(self, strings):
+        if strings.null_count or pc.any(pc.match_substring(strings, '\x00')).as_py():
+            return None
+        strings = strings.cast(pa.string())
+        parts = pc.extract_regex(strings, TITLE_PATTERN)
+        digits = pc.fill_null(parts.field('n'), '')
+        parsed = pc.and_(parts.is_valid(), pc.less_equal(pc.utf8_length(digits), 4))
+        fields = self._fields(strings, parts, parsed)
+        # Rows that don't come back verbatim (e.g. "homers (07)") are stored whole
+        mismatched = pc.invert(pc.equal(self.decode(fields), strings))
+        if pc.any(mismatched).as_py():
+            fields = self._fields(strings, parts, pc.and_(parsed, pc.invert(mismatched)))
+        return fields
+
+    def _fields(self, strings, parts, parsed):
+        raw = pc.binary_join_element_wise(strings, '', '', '\x01', '\x00')
+        keys = pc.if_else(parsed, pc.binary_join_element_wise(parts.field('pre'), parts.field('mid'), parts.field('post'), '', '\x00'), raw)
+        mask = parsed.to_numpy(zero_copy_only=False)
+        player = np.full(len(strings), -1, dtype=np.int32)
+        player[mask] = self.players.encode(parts.field('player').filter(parsed))
+        n = np.full(len(strings), -1, dtype=np.int16)
+        n[mask] = pc.cast(parts.field('n').filter(parsed), pa.int16()).to_numpy()
+        return {'player': player, 'template': self.templates.encode(keys), 'n': n}
+
+    def decode(self, fields):
+        keys = self.templates.take(fields['template'])
+        pieces = pc.split_pattern(keys, '\x00')
+        pre = pc.list_element(pieces, 0)
+        raw = pc.equal(pc.list_element(pieces, 3), '\x01')
+        if not len(self.players.values):
+            return pre
+        names = self.players.take(np.maximum(fields['player'], 0))
+        parsed = pc.binary_join_element_wise(pre, names, pc.list_element(pieces, 1), pc.cast(fields['n'], pa.string()),
+                                             ')', pc.list_element(pieces, 2), '')
+        return pc.if_else(raw, pre, parsed)
+
+    def codes(self, fields):
+        return pd.factorize(self.keys(fields))[0]
+
+    def keys(self, fields):
+        return (fields['template'].astype(np.int64) << 40) | ((fields['player'].astype(np.int64) + 1) << 16) | (fields['n'].astype(np.int64) + 1)
+
+    def isin(self, fields, values):
+        if not values:
+            return np.zeros(len(fields['template']), dtype=bool)
+        # Encode the query with a scratch codec, then map its codes onto ours
+        scratch = _TitleCodec()
+        encoded = scratch.encode(_strings(values))
+        if encoded is None:
+            return np.isin(np.asarray(self.decode(fields).to_pylist(), dtype=object), values)
+        players = np.append(self.players.lookup(scratch.players.values), -1)
+        templates = self.templates.lookup(scratch.templates.values)
+        query = {'player': players[encoded['player']], 'template': templates[encoded['template']], 'n': encoded['n']}
+        known = (query['template'] >= 0) & ((query['player'] >= 0) | (encoded['player'] < 0))
+        return np.isin(self.keys(fields), self.keys({name: field[known] for name, field in query.items()}))
+
+    @property
+    def nbytes(self):
+        return self.players.nbytes + self.templates.nbytes
+
+
+# Videos: (prefix, extension) dictionary around a fixed-width stem. Hex stems
+# are packed two digits a byte; any other stem is kept as its raw bytes. Either
+# way the stem is stored as uint64 words, so rows hash like play_ids
+class _VideoCodec:
+    kind = 'video'
+
+    def __init__(self):
+        self.templates = _Dictionary()
+        self.width = None
+        self.hex = None
+
+    def encode(self, strings):
+        if strings.null_count:
+            return None
+        # ".../{stem}.{ext}", split with string kernels (much faster than a regex here)
+        path = pc.split_pattern(strings, '/', max_splits=1, reverse=True)
+        name = pc.split_pattern(pc.list_element(path, 1), '.', max_splits=1, reverse=True)
+        if pc.min(pc.list_value_length(path)).as_py() != 2 or pc.min(pc.list_value_length(name)).as_py() != 2:
+            return None
+        stems = pc.list_element(name, 0)
+        lengths = pc.binary_length(stems)
+        width = pc.min(lengths).as_py()
+        if width != pc.max(lengths).as_py() or pc.any(pc.match_substring(strings, '\x00')).as_py():
+            return None
+        if self.width not in (None, width):
+            return None
+        rows = _fixed_width(stems, width)
+        words = _pack_hex(rows) if width == 32 and self.hex is not False else None
+        if self.width is None:
+            self.width, self.hex = width, words is not None
+        elif self.hex and words is None:
+            return None
+        if words is None:
+            padded = np.zeros((len(rows), -(-width // 8) * 8), dtype=np.uint8)
+            padded[:, :width] = rows
+            words = padded.view(np.uint64)
+        keys = pc.binary_join_element_wise(pc.list_element(path, 0), pc.list_element(name, 1), '\x00')
+        return {'template': self.templates.encode(keys), 'words': words}
+
+    def decode(self, fields):
+        pieces = pc.split_pattern(self.templates.take(fields['template']), '\x00')
+        words = fields['words']
+        rows = _unpack_hex(words) if self.hex else np.ascontiguousarray(words).view(np.uint8).reshape(len(words), -1)[:, :self.width]
+        return pc.binary_join_element_wise(pc.list_element(pieces, 0), '/', _strings_from_rows(rows), '.', pc.list_element(pieces, 1), '')
+
+    def codes(self, fields):
+        return _row_codes(*fields['words'].T[::-1], fields['template'])
+
+    def keys(self, fields):
+        return _word_values(fields['template'], *fields['words'].T)
+
+    def isin(self, fields, values):
+        return np.isin(np.asarray(self.decode(fields).to_pylist(), dtype=object), values)
+
+    @property
+    def nbytes(self):
+        return self.templates.nbytes
+
+
+CODECS = {'play_id': _PlayIdCodec, 'title': _TitleCodec, 'video': _VideoCodec}
+
+
+class CompactDtype(ExtensionDtype):
+    type = str
+    kind = 'O'
+    na_value = np.nan
+    _metadata = ('codec',)
+
+    def __init__(self, codec):
+        self.codec = codec
+
+    @property
+    def name(self):
+        return f'compact[{self.codec.kind}]'
+
+    @classmethod
+    def construct_array_type(cls):
+        return CompactStringArray
+
+    def __hash__(self):
+        return hash((type(self), id(self.codec)))
+
+    def __eq__(self, other):
+        return isinstance(other, CompactDtype) and other.codec is self.codec
+
+    # Arrays with different dictionaries (or plain strings) combine as plain strings
+    def _get_common_dtype(self, dtypes):
+        return pd.StringDtype(na_value=np.nan)
+
+
+class CompactStringArray(ExtensionArray):
+    def __init__(self, codec, fields):
+        self._codec = codec
+        self._fields = fields
+        self._dtype = CompactDtype(codec)
+
+    # Encode strings with a fresh codec of the given kind; None when they don't fit it
+    @classmethod
+    def encode(cls, values, kind):
+        codec = CODECS[kind]()
+        fields = codec.encode(_strings(values))
+        return None if fields is None else cls(codec, fields)
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        kind = dtype.codec.kind if isinstance(dtype, CompactDtype) else 'title'
+        array = cls.encode(scalars, kind)
+        if array is None:
+            raise ValueError(f'Values do not fit the compact {kind} encoding')
+        return array
+
+    # `values` are keys from _values_for_factorize: each is rebuilt from the first row of `original` that has it
+    @classmethod
+    def _from_factorized(cls, values, original):
+        keys = pd.Index(original._codec.keys(original._fields))
+        first = np.flatnonzero(~keys.duplicated())
+        return original._subset(first[keys[first].get_indexer(values)])
+
+    def _subset(self, index):
+        return CompactStringArray(self._codec, {name: field[index] for name, field in self._fields.items()})
+
+    def decode(self):
+        return self._codec.decode(self._fields)
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def __len__(self):
+        return len(next(iter(self._fields.values())))
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._subset(slice(item, item + 1 if item != -1 else None)).decode()[0].as_py()
+        if isinstance(item, tuple) and len(item) == 1:
+            item = item[0]
+        if not isinstance(item, slice):
+            item = check_array_indexer(self, item)
+        return self._subset(item)
+
+    def __iter__(self):
+        return iter(self.decode().to_pylist())
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.decode().to_pylist(), dtype=object if dtype is None else dtype)
+
+    def __arrow_array__(self, type=None):
+        decoded = self.decode()
+        return decoded if type is None else decoded.cast(type)
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if isinstance(other, str):
+            return self.isin([other])
+        if isinstance(other, CompactStringArray) and other._codec is self._codec and len(other) == len(self):
+            return np.logical_and.reduce([(field == other._fields[name]).reshape(len(self), -1).all(axis=1)
+                                          for name, field in self._fields.items()])
+        return np.asarray(self) == np.asarray(other, dtype=object)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else ~result
+
+    @property
+    def nbytes(self):
+        return sum(field.nbytes for field in self._fields.values()) + self._codec.nbytes
+
+    # Plain string dtypes are built straight from the Arrow decoding
+    def astype(self, dtype, copy=True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, CompactDtype) and dtype == self.dtype:
+            return self.copy() if copy else self
+        if isinstance(dtype, pd.StringDtype):
+            return pd.array(self.decode(), dtype=dtype)
+        return super().astype(dtype, copy=copy)
+
+    def isna(self):
+        return np.zeros(len(self), dtype=bool)
+
+    def isin(self, values):
+        return self._codec.isin(self._fields, [value for value in values if isinstance(value, str)])
+
+    def take(self, indices, *, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.intp)
+        if allow_fill and (indices < 0).any():
+            # Missing values can't be encoded: fall back to plain strings
+            return self.astype(str).take(indices, allow_fill=True, fill_value=fill_value)
+        positions = take(np.arange(len(self)), indices)
+        return self._subset(positions)
+
+    def copy(self):
+        return CompactStringArray(self._codec, {name: field.copy() for name, field in self._fields.items()})
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        # Same dtype, so the same codec: the fields line up
+        first = to_concat[0]
+        return cls(first._codec, {name: np.concatenate([array._fields[name] for array in to_concat]) for name in first._fields})
+
+    def _values_for_factorize(self):
+        return self._codec.keys(self._fields), -1
+
+    # Within one array, rows are compared through their dense codes (integer hashing only)
+    def factorize(self, use_na_sentinel=True):
+        codes = self._codec.codes(self._fields)
+        first = np.flatnonzero(~pd.Index(codes).duplicated())
+        return codes.astype(np.intp), self._subset(first)
+
+    def duplicated(self, keep='first'):
+        return pd.Index(self._codec.codes(self._fields)).duplicated(keep=keep)
+
+    def unique(self):
+        return self.factorize()[1]
+
+    # Sort ranks of the decoded strings (Arrow sorts them much faster than an object argsort)
+    def _values_for_argsort(self):
+        return pc.rank(self.decode(), tiebreaker='min').to_numpy()
+
+    def _hash_pandas_object(self, *, encoding, hash_key, categorize):
+        return pd.util.hash_array(np.asarray(self), encoding=encoding, hash_key=hash_key, categorize=categorize)
+
+
+COLUMNS = ['play_id', 'title', 'video']
+
+
+# Frame with the string columns compacted (columns that don't fit their pattern stay as they are)
+def compact_frame(data):
+    columns = {}
+    for name in COLUMNS:
+        if name in data.columns:
+            array = CompactStringArray.encode(data[name], name)
+            if array is not None:
+                columns[name] = array
+    if not columns:
+        return data
+    result = data.copy(deep=False)
+    for name, array in columns.items():
+        result[name] = pd.Series(array, index=data.index)
+    return result
+
+
+# Player names and season home-run numbers straight from a compact title column,
+# as hit_data.parse_titles gives them; only titles stored whole go through the regex
+def parse_titles(titles):
+    codec, fields = titles.array._codec, titles.array._fields
+    raw = fields['player'] < 0
+    names = pc.utf8_trim_whitespace(codec.players.array).take(pa.array(fields['player'], mask=raw))
+    season_hr = pd.array(fields['n'], dtype='Int16')
+    season_hr[raw] = pd.NA
+    parsed = pd.DataFrame({
+        'player': pd.Series(names.to_numpy(zero_copy_only=False), index=titles.index, dtype=str),
+        'season_hr': pd.Series(season_hr, index=titles.index),
+    })
+    if raw.any():
+        parsed.loc[raw] = hit_data.parse_titles(titles[raw].astype(str))
+    return parsed
+
+
+# Compact index (e.g. from a groupby on a compact column) as plain strings; others as they are
+def plain_index(index):
+    if isinstance(index.dtype, CompactDtype):
+        return index.astype(str)
+    return index
+
+
+def is_compact(column):
+    return isinstance(getattr(column, 'array', None), CompactStringArray)
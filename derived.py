@@ -0,0 +1,123 @@
+from functools import lru_cache
+
+import numpy as np
+
+import hit_data
+import instrumentation
+
+# Derived metrics: columns computed from the cleaned dataset by vectorized
+# expressions. Each is declared once, with the metrics it depends on (base
+# columns or derived metrics declared before it):
+#
+#   @derived_metric('HitScore', 'Hit Score', depends=['ExitVelocity', 'HitDistance', 'LaunchAngle'])
+#   def hit_score(columns): ...
+#
+# A metric is computed the first time anything asks for it and cached with the
+# dataset, so pages don't recompute it on every rerun. The cache belongs to one
+# Dataset object, so a reload starts with an empty one; a live snapshot computes
+# its new rows only and appends them to the previous snapshot's columns. Every
+# registered metric can be picked by name wherever the apps offer a metric.
+
+REGISTRY = {}
+
+
+class DerivedMetric:
+    def __init__(self, name, label, depends, compute):
+        self.name = name
+        self.label = label
+        self.depends = depends
+        self.compute = compute
+
+
+# Register `compute(columns)` (a dict of NumPy arrays, one per dependency) as a metric
+def derived_metric(name, label, depends):
+    def register(compute):
+        for dependency in depends:
+            if dependency not in hit_data.METRICS and dependency not in REGISTRY:
+                raise ValueError(f'{name} depends on unknown metric {dependency}')
+        REGISTRY[name] = DerivedMetric(name, label, tuple(depends), compute)
+        return compute
+    return register
+
+
+# From the notebook: hard, long hits near a 25° launch angle score highest
+@derived_metric('HitScore', 'Hit Score', depends=['ExitVelocity', 'HitDistance', 'LaunchAngle'])
+def hit_score(columns):
+    return columns['ExitVelocity'] * columns['HitDistance'] * (90 - np.abs(columns['LaunchAngle'] - 25)) / 10000
+
+
+# Every metric the apps can show: the base columns, then the derived ones in declaration order
+def metric_names():
+    return [*hit_data.METRICS, *REGISTRY]
+
+
+def metric_label(name):
+    return hit_data.METRIC_LABELS.get(name) or REGISTRY[name].label
+
+
+# Without the unit: "Exit Velocity (mph)" -> "Exit Velocity"
+def short_label(name):
+    return metric_label(name).split(' (')[0]
+
+
+# Derived columns of one dataset, computed on first use
+class DerivedColumns:
+    def __init__(self, data):
+        self.data = data
+        self._columns = {}
+        # Append buffers behind the columns, once extend() has grown them
+        self._buffers = {}
+
+    # Columns over `data`, which is this one's rows plus new ones from row `start`:
+    # each metric computed so far is computed for the new rows and appended
+    def extend(self, data, start):
+        import live
+
+        columns = DerivedColumns(data)
+        new = DerivedColumns(data.iloc[start:])
+        for name, values in self._columns.items():
+            buffer = self._buffers.get(name)
+            if buffer is None or buffer.size != len(values):
+                buffer = live.AppendColumn(values, np.float64)
+            buffer.append(new.column(name))
+            columns._buffers[name] = buffer
+            columns._columns[name] = buffer.view()
+        return columns
+
+    # A metric's values for every row, as a read-only array
+    def column(self, name):
+        if name in hit_data.METRICS:
+            return self.data[name].to_numpy(dtype=np.float64)
+        values = self._columns.get(name)
+        if values is None:
+            metric = REGISTRY[name]
+            with instrumentation.timed('derived'):
+                values = np.asarray(metric.compute({dependency: self.column(dependency) for dependency in metric.depends}), dtype=np.float64)
+            values.flags.writeable = False
+            self._columns[name] = values
+        return values
+
+    # `rows` (a slice of the dataset, by index) with the derived metrics among `names` added
+    def with_metrics(self, rows, names):
+        missing = [name for name in dict.fromkeys(names) if name not in rows.columns]
+        if not missing:
+            return rows
+        positions = self.data.index.get_indexer(rows.index)
+        return rows.assign(**{name: self.column(name)[positions] for name in missing})
+
+
+# One cache per loaded dataset (Dataset objects are cached per process); live
+# snapshots extend the previous snapshot's instead
+def get_columns(dataset):
+    if hasattr(dataset, 'extend_index'):
+        return dataset.extend_index('derived', lambda snapshot: DerivedColumns(snapshot.data),
+                                    lambda columns, snapshot, start: columns.extend(snapshot.data, start))
+    return _get_columns(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_columns(dataset):
+    return DerivedColumns(dataset.data)
+
+
+instrumentation.register_cache('derived', _get_columns.cache_info)
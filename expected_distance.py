@@ -0,0 +1,150 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+# Expected distance: the league's mean and spread of HitDistance in each
+# ExitVelocity x LaunchAngle cell, so every hit can be read against what that
+# contact usually produces. The table is built in one pass (np.bincount over
+# cell codes) and each lookup is an array index. Live snapshots add their new
+# hits' counts and sums to the previous snapshot's table (ExpectedDistance.extend).
+#
+# Sparse cells are shrunk toward their 3x3 neighbourhood: a cell with n hits
+# gets (n * its mean + PRIOR_HITS * the neighbourhood mean) / (n + PRIOR_HITS),
+# and likewise for the second moment. Where the neighbourhood is empty too,
+# the league mean is used.
+
+EXIT_VELOCITY_BIN = 2  # mph
+LAUNCH_ANGLE_BIN = 2   # degrees
+PRIOR_HITS = 10
+# The launch angles the apps' guidance recommends for home runs
+SWEET_SPOT = (20, 30)  # degrees
+# 0 ft distances are missing measurements, not short home runs
+MIN_DISTANCE = 1
+
+
+# Bin edges covering `values`, aligned to multiples of `width`
+def _edges(values, width):
+    low = np.floor(values.min() / width) * width if len(values) else 0
+    high = np.floor(values.max() / width) * width + width if len(values) else width
+    return np.arange(low, high + width / 2, width)
+
+
+# Sum over each cell's 3x3 neighbourhood (zero outside the grid)
+def _neighbourhood(grid):
+    padded = np.pad(grid, 1)
+    rows, columns = grid.shape
+    return sum(padded[i:i + rows, j:j + columns] for i in range(3) for j in range(3))
+
+
+# Exit velocity, launch angle and distance of the hits with all three measured
+def _measured(data):
+    exit_velocity = data['ExitVelocity'].to_numpy(dtype=np.float64)
+    launch_angle = data['LaunchAngle'].to_numpy(dtype=np.float64)
+    distance = data['HitDistance'].to_numpy(dtype=np.float64)
+    measured = (distance >= MIN_DISTANCE) & ~np.isnan(exit_velocity) & ~np.isnan(launch_angle)
+    return exit_velocity[measured], launch_angle[measured], distance[measured]
+
+
+class ExpectedDistance:
+    def __init__(self, data):
+        exit_velocity, launch_angle, distance = _measured(data)
+        self.exit_velocity_edges = _edges(exit_velocity, EXIT_VELOCITY_BIN)
+        self.launch_angle_edges = _edges(launch_angle, LAUNCH_ANGLE_BIN)
+        shape = (len(self.exit_velocity_edges) - 1, len(self.launch_angle_edges) - 1)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self._sums, self._squares = np.zeros(shape), np.zeros(shape)
+        self._add(exit_velocity, launch_angle, distance)
+        self._smooth()
+
+    # Add hits to each cell's count, sum and sum of squares
+    def _add(self, exit_velocity, launch_angle, distance):
+        cells = self._cells(exit_velocity, launch_angle)
+        size = self.counts.size
+        self.counts += np.bincount(cells, minlength=size).reshape(self.counts.shape)
+        self._sums += np.bincount(cells, weights=distance, minlength=size).reshape(self.counts.shape)
+        self._squares += np.bincount(cells, weights=distance ** 2, minlength=size).reshape(self.counts.shape)
+
+    # A table over `data`, which is this table's rows plus new ones from row `start`:
+    # the new hits are added to the cells and the smoothing redone. Built over again
+    # when a new hit falls outside the grid. This table is left as it was
+    def extend(self, data, start):
+        exit_velocity, launch_angle, distance = _measured(data.iloc[start:])
+        if len(distance) and (exit_velocity.min() < self.exit_velocity_edges[0] or exit_velocity.max() >= self.exit_velocity_edges[-1]
+                              or launch_angle.min() < self.launch_angle_edges[0] or launch_angle.max() >= self.launch_angle_edges[-1]):
+            return ExpectedDistance(data)
+        table = copy.copy(self)
+        table.counts, table._sums, table._squares = self.counts.copy(), self._sums.copy(), self._squares.copy()
+        table._add(exit_velocity, launch_angle, distance)
+        table._smooth()
+        return table
+
+    # Each cell's mean and spread from its moments, shrunk toward its neighbourhood
+    def _smooth(self):
+        sums, squares = self._sums, self._squares
+        hits = self.counts.sum()
+        league_mean = sums.sum() / hits if hits else np.nan
+        league_square = squares.sum() / hits if hits else np.nan
+        nearby = _neighbourhood(self.counts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            prior_mean = np.where(nearby > 0, _neighbourhood(sums) / nearby, league_mean)
+            prior_square = np.where(nearby > 0, _neighbourhood(squares) / nearby, league_square)
+        weight = self.counts + PRIOR_HITS
+        self.mean = (sums + PRIOR_HITS * prior_mean) / weight
+        self.spread = np.sqrt(np.maximum((squares + PRIOR_HITS * prior_square) / weight - self.mean ** 2, 0))
+        # Cells with no hits in their neighbourhood only carry the league prior
+        self.supported = nearby > 0
+        self._heatmap = None
+
+    # Flat cell code of each (exit velocity, launch angle), by arithmetic on the
+    # fixed bin widths; values past the edges use the edge cells. Clipping at 0
+    # first makes the integer cast (truncation) a floor
+    def _cells(self, exit_velocity, launch_angle):
+        rows, columns = len(self.exit_velocity_edges) - 1, len(self.launch_angle_edges) - 1
+        row = np.clip((exit_velocity - self.exit_velocity_edges[0]) / EXIT_VELOCITY_BIN, 0, rows - 1).astype(np.intp)
+        column = np.clip((launch_angle - self.launch_angle_edges[0]) / LAUNCH_ANGLE_BIN, 0, columns - 1).astype(np.intp)
+        return row * columns + column
+
+    # Expected distance and spread for each (exit velocity, launch angle) pair (NaN where either is missing)
+    def lookup(self, exit_velocity, launch_angle):
+        exit_velocity = np.asarray(exit_velocity, dtype=np.float64)
+        launch_angle = np.asarray(launch_angle, dtype=np.float64)
+        known = ~(np.isnan(exit_velocity) | np.isnan(launch_angle))
+        cells = self._cells(np.where(known, exit_velocity, 0), np.where(known, launch_angle, 0))
+        return np.where(known, self.mean.ravel()[cells], np.nan), np.where(known, self.spread.ravel()[cells], np.nan)
+
+    # Each row's expected distance, its spread, and how far the hit went over (+) or under (-) it
+    def residuals(self, rows):
+        expected, spread = self.lookup(rows['ExitVelocity'].to_numpy(), rows['LaunchAngle'].to_numpy())
+        return pd.DataFrame({
+            'expected_distance': expected,
+            'expected_spread': spread,
+            'distance_over_expected': rows['HitDistance'].to_numpy(dtype=np.float64) - expected,
+        }, index=rows.index)
+
+    # Sweet-spot heatmap as PNG bytes (rendered once per table, see rendering.py)
+    def heatmap(self):
+        if self._heatmap is None:
+            import rendering
+
+            self._heatmap = rendering.submit(rendering.sweet_spot_heatmap, self, figsize=(5, 4)).result()
+        return self._heatmap
+
+
+# One table per loaded dataset (Dataset objects are cached per process); live
+# snapshots extend the previous snapshot's table instead
+def get_table(dataset):
+    if hasattr(dataset, 'extend_index'):
+        with instrumentation.timed('expected_distance'):
+            return dataset.extend_index('expected_distance', lambda snapshot: ExpectedDistance(snapshot.data),
+                                        lambda table, snapshot, start: table.extend(snapshot.data, start))
+    return _get_table(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_table(dataset):
+    with instrumentation.timed('expected_distance'):
+        return ExpectedDistance(dataset.data)
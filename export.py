@@ -0,0 +1,164 @@
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+import hit_data
+
+# Filtered exports to CSV or Parquet, streamed in chunks: each chunk of rows is
+# filtered, serialized and handed on (to a download response or a file) before
+# the next is read, so memory stays bounded by CHUNK_ROWS whatever the export size.
+#
+#   python export.py homeruns.parquet --min-distance 420 --player "Mike Trout homers (1) ..."
+
+CHUNK_ROWS = 65_536
+COLUMNS = ['play_id', 'title', 'ExitVelocity', 'HitDistance', 'LaunchAngle', 'video']
+MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+# Row predicate for one chunk; None exports everything
+def row_filter(players=None, min_exit_velocity=None, min_distance=None):
+    if not players and min_exit_velocity is None and min_distance is None:
+        return None
+
+    def keep(chunk):
+        mask = pd.Series(True, index=chunk.index)
+        if players:
+            mask &= chunk['title'].isin(players)
+        if min_exit_velocity is not None:
+            mask &= chunk['ExitVelocity'] >= min_exit_velocity
+        if min_distance is not None:
+            mask &= chunk['HitDistance'] >= min_distance
+        return mask.to_numpy()
+
+    return keep
+
+
+# Filtered row chunks (of CHUNK_ROWS rows by default); only the rows that pass
+# are copied, one chunk at a time
+def chunks(data, keep=None, columns=COLUMNS, chunk_rows=None):
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    for start in range(0, len(data), chunk_rows):
+        chunk = data.iloc[start:start + chunk_rows]
+        if keep is not None:
+            chunk = chunk[keep(chunk)]
+        if len(chunk):
+            yield chunk[columns]
+
+
+# Written bytes are collected here and handed out after each chunk
+class _Sink:
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+# Arrow writers for both formats (Arrow's CSV writer is ~10x faster than to_csv).
+# Plain strings throughout: a shared dataset's dictionary-encoded title would
+# otherwise give every chunk a different schema
+def _write_chunks(frames, columns, open_writer):
+    import pyarrow as pa
+
+    schema = pa.schema([(name, pa.float64() if name in hit_data.METRICS else pa.string()) for name in columns])
+    sink = _Sink()
+    writer = open_writer(sink, schema)
+    yield sink.drain()
+    for frame in frames:
+        categorical = [name for name in columns if isinstance(frame[name].dtype, pd.CategoricalDtype)]
+        frame = frame.astype({name: str for name in categorical})
+        writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_csv(frames, columns=COLUMNS):
+    import pyarrow.csv as csv
+
+    return _write_chunks(frames, columns, lambda sink, schema: csv.CSVWriter(sink, schema))
+
+
+# One Parquet row group per chunk
+def iter_parquet(frames, columns=COLUMNS):
+    import pyarrow.parquet as pq
+
+    return _write_chunks(frames, columns, lambda sink, schema: pq.ParquetWriter(sink, schema, compression='zstd'))
+
+
+def _check_format(fmt):
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f'Unknown export format: {fmt} (expected one of {list(MEDIA_TYPES)})')
+
+
+def stream(data, fmt='csv', keep=None, columns=COLUMNS):
+    _check_format(fmt)
+    frames = chunks(data, keep, columns)
+    if fmt == 'csv':
+        return iter_csv(frames, columns)
+    return iter_parquet(frames, columns)
+
+
+# Export to disk; the file only appears under its name once complete, and a
+# failed export leaves nothing behind
+def write(path, data, fmt=None, keep=None, columns=COLUMNS):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.')
+    _check_format(fmt)
+    tmp_path = f'{path}.tmp'
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for part in stream(data, fmt, keep, columns):
+                f.write(part)
+                size += len(part)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+# Export to an anonymous temporary file, rewound for reading (Streamlit download buttons)
+def to_file(data, fmt='csv', keep=None, columns=COLUMNS):
+    f = tempfile.TemporaryFile()
+    for part in stream(data, fmt, keep, columns):
+        f.write(part)
+    f.seek(0)
+    return f
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export filtered home runs to CSV or Parquet')
+    parser.add_argument('path', help='output file; the extension (.csv or .parquet) picks the format')
+    parser.add_argument('--player', action='append', dest='players', help='title to include (repeatable)')
+    parser.add_argument('--min-exit-velocity', type=float)
+    parser.add_argument('--min-distance', type=float)
+    args = parser.parse_args()
+
+    data = hit_data.current_dataset().data
+    size = write(args.path, data, keep=row_filter(args.players, args.min_exit_velocity, args.min_distance))
+    print(f"Wrote {size / 1e6:.1f} MB to {args.path}")
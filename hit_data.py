@@ -0,0 +1,224 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+import instrumentation
+
+# GitHub URL for dataset (set HIT_DATA_URL to use a local copy instead)
+DATA_URL = os.environ.get(
+    'HIT_DATA_URL',
+    "https://raw.githubusercontent.com/MajorLeagueBaseball/google-cloud-mlb-hackathon/8ce90f707e19fb46496715b1bbbe2b702c9673b4/datasets/2016-mlb-homeruns.csv",
+)
+
+# Arrow file published by shared_dataset.py; workers map it instead of loading
+SHARED_DATASET = os.environ.get('HIT_SHARED_DATASET')
+
+# Drop directory of new hits; when set, pages and the API serve the live feed (see live.py)
+LIVE_DIR = os.environ.get('HIT_LIVE_DIR')
+
+# Keep play_id, title and video binary-encoded in memory (see compact.py)
+COMPACT_STRINGS = os.environ.get('HIT_COMPACT_STRINGS', '') not in ('', '0')
+
+# Numeric columns we analyze, and the labels the apps show for them
+METRICS = ['ExitVelocity', 'HitDistance', 'LaunchAngle']
+METRIC_LABELS = {
+    'ExitVelocity': 'Exit Velocity (mph)',
+    'HitDistance': 'Hit Distance (feet)',
+    'LaunchAngle': 'Launch Angle (°)',
+}
+
+# The statistic the comparison table shows per metric (see compare_players)
+PLAYER_STATISTICS = {'ExitVelocity': 'mean', 'LaunchAngle': 'median', 'HitDistance': 'mean'}
+
+# Assuming 400 feet is a home run distance (same threshold as the apps)
+HOME_RUN_DISTANCE = 400
+
+
+# "Evan Longoria homers (34) on a fly ball to ..." -> batter and season home-run number.
+# Review titles ("Umpire reviewed (home run), call on the field was upheld: ...") carry it after the colon.
+TITLE_PATTERN = r'(?:^|: )(?P<player>[^:]+?)\s+homers \((?P<season_hr>\d+)\)'
+
+# "... on a line drive to left-center field." / "... on a fly ball down the right-field line."
+HIT_TYPES = ['fly ball', 'line drive', 'ground ball', 'pop up']
+FIELDS = ['left', 'left-center', 'center', 'right-center', 'right']
+BATTED_BALL_PATTERN = (r'on an? (?P<hit_type>fly ball|line drive|ground ball|pop up)'
+                       r'(?: to (?P<field>left|left-center|center|right-center|right) field'
+                       r'| down the (?P<line>left|right)-field line)?')
+
+
+# Handle missing values and duplicates the same way every app does
+def clean_data(data):
+    data['ExitVelocity'] = data['ExitVelocity'].fillna(data['ExitVelocity'].median())
+    data['HitDistance'] = data['HitDistance'].fillna(data['HitDistance'].median())
+    data['LaunchAngle'] = data['LaunchAngle'].fillna(data['LaunchAngle'].median())
+    data['title'] = data['title'].fillna('Unknown')
+    return data.drop_duplicates(subset=['play_id'])
+
+
+# Load the CSV file and clean it
+def load_data(url=None):
+    with instrumentation.timed('load_csv'):
+        data = pd.read_csv(url or DATA_URL)
+    with instrumentation.timed('clean'):
+        return clean_data(data)
+
+
+# Player name and season home-run number parsed from each title (NaN/<NA> when absent)
+def parse_titles(titles):
+    if COMPACT_STRINGS:
+        import compact
+
+        if compact.is_compact(titles):
+            return compact.parse_titles(titles)
+    parsed = titles.astype(str).str.extract(TITLE_PATTERN)
+    parsed['player'] = parsed['player'].str.strip()
+    parsed['season_hr'] = pd.to_numeric(parsed['season_hr']).astype('Int16')
+    return parsed
+
+
+# Hit type and field direction parsed from each title, as categoricals (NaN when absent)
+def parse_batted_balls(titles):
+    parsed = titles.astype(str).str.extract(BATTED_BALL_PATTERN)
+    field = parsed['field'].fillna(parsed['line'])
+    return pd.DataFrame({
+        'hit_type': pd.Categorical(parsed['hit_type'], categories=HIT_TYPES),
+        'field': pd.Categorical(field, categories=FIELDS),
+    }, index=titles.index)
+
+
+# Content hash of the cleaned frame, used for ETags and cache keys
+def data_version(data):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+# Per-title aggregates computed in one grouped pass
+def player_aggregates(data):
+    grouped = data.groupby('title', sort=False)
+    aggregates = grouped[METRICS].agg(['mean', 'median', 'min', 'max'])
+    aggregates.columns = [f'{column}_{stat}' for column, stat in aggregates.columns]
+    aggregates['hits'] = grouped.size()
+    aggregates['home_runs'] = (data['HitDistance'] > HOME_RUN_DISTANCE).groupby(data['title'], sort=False).sum()
+    if COMPACT_STRINGS:
+        import compact
+
+        # Lookups by title go through the index: keep it plain strings
+        aggregates.index = compact.plain_index(aggregates.index)
+    return aggregates
+
+
+# Stats shown on the player panels (average EV, median LA, 400+ ft home runs)
+def player_stats(data, player, aggregates=None):
+    if aggregates is None:
+        aggregates = player_aggregates(data[data['title'] == player])
+    if player not in aggregates.index:
+        return None
+    row = aggregates.loc[player]
+    return {
+        'player': player,
+        'hits': int(row['hits']),
+        'avg_exit_velocity': float(row['ExitVelocity_mean']),
+        'median_launch_angle': float(row['LaunchAngle_median']),
+        'home_runs': int(row['home_runs']),
+        'summary': {
+            metric: {stat: float(row[f'{metric}_{stat}']) for stat in ('mean', 'min', 'max')}
+            for metric in METRICS
+        },
+    }
+
+
+# Side-by-side comparison table (mean EV, median LA, mean distance per player)
+def compare_players(data, players, aggregates=None):
+    if aggregates is None:
+        return data[data['title'].isin(players)].groupby('title').agg({
+            'ExitVelocity': 'mean',
+            'LaunchAngle': 'median',
+            'HitDistance': 'mean'
+        }).reset_index()
+    selected = aggregates.loc[aggregates.index.intersection(players).sort_values()]
+    return pd.DataFrame({
+        'title': selected.index,
+        'ExitVelocity': selected['ExitVelocity_mean'].values,
+        'LaunchAngle': selected['LaunchAngle_median'].values,
+        'HitDistance': selected['HitDistance_mean'].values,
+    })
+
+
+# "Best of the Best": hardest-hit home runs that also went 400+ feet
+def top_home_runs(data, n=10, min_exit_velocity=110, min_distance=HOME_RUN_DISTANCE):
+    qualified = data[(data['ExitVelocity'] > min_exit_velocity) & (data['HitDistance'] > min_distance)]
+    return qualified.nlargest(n, 'ExitVelocity')
+
+
+# Fit the basic linear model and predict Exit Velocity for a future hit
+def predict_exit_velocity(data, launch_angle=22, hit_distance=410):
+    from sklearn.linear_model import LinearRegression
+
+    model = LinearRegression()
+    with instrumentation.timed('model_fit'):
+        model.fit(data[['LaunchAngle', 'HitDistance']].values, data['ExitVelocity'].values)
+    return float(model.predict([[launch_angle, hit_distance]])[0])
+
+
+# Points for the scatter/line charts, one series per player
+def chart_data(data, players, x='ExitVelocity', y='HitDistance'):
+    selected = data[data['title'].isin(players)]
+    return {
+        player: {
+            x: rows[x].tolist(),
+            y: rows[y].tolist(),
+            'video': rows['video'].tolist(),
+        }
+        for player, rows in selected.groupby('title', sort=False)
+    }
+
+
+# Cleaned frame plus the aggregates every consumer needs, built once
+class Dataset:
+    def __init__(self, data, version=None):
+        self.data = data
+        self.version = version or data_version(data)
+        self.aggregates = player_aggregates(data)
+        self.top_home_runs = top_home_runs(data, n=100)
+        self.players = data['title'].unique()
+
+    def player_stats(self, player):
+        return player_stats(self.data, player, self.aggregates)
+
+    def compare_players(self, players):
+        return compare_players(self.data, players, self.aggregates)
+
+    def top(self, n=10):
+        if n <= len(self.top_home_runs):
+            return self.top_home_runs.head(n)
+        return top_home_runs(self.data, n)
+
+
+# One shared, preloaded dataset per process; callers must not mutate it
+@lru_cache(maxsize=4)
+def get_dataset(url=None):
+    if SHARED_DATASET and os.path.exists(SHARED_DATASET):
+        import shared_dataset
+
+        return shared_dataset.attach(SHARED_DATASET)
+    data = load_data(url)
+    if COMPACT_STRINGS:
+        import compact
+
+        with instrumentation.timed('compact'):
+            data = compact.compact_frame(data)
+    return Dataset(data)
+
+
+instrumentation.register_cache('dataset', get_dataset.cache_info)
+
+
+# What pages and the API should show: the latest live snapshot in live mode, else the static dataset
+def current_dataset(url=None):
+    if LIVE_DIR:
+        import live
+
+        return live.get_feed(LIVE_DIR, url).refresh()
+    return get_dataset(url)
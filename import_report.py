@@ -0,0 +1,138 @@
+import ast
+import glob
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+# Import-time report for the multipage app (python -X importtime, summarized per page).
+#
+#   python import_report.py              # print the report
+#   python import_report.py --write      # also save it to IMPORT_TIMES.md
+#
+# "Startup" modules are imported at the top of a page and are paid for the first
+# time the page is opened; "lazy" ones are imported inside functions and only
+# when that code path runs (e.g. translation for non-English users).
+PAGES = ['streamlit_app.py', 'app.py', 'app2.py', 'app3.py', 'app4.py', 'app5.py', 'api.py']
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPORT_PATH = os.path.join(ROOT, 'IMPORT_TIMES.md')
+
+
+# The repo's own modules, by import name, and their files (relative to ROOT);
+# every other import is a dependency
+def local_modules(root=ROOT):
+    modules = {}
+    for path in glob.glob('**/*.py', root_dir=root, recursive=True):
+        name = os.path.splitext(path)[0].replace(os.sep, '.')
+        modules[name.removesuffix('.__init__')] = path
+    return modules
+
+
+LOCAL_MODULES = local_modules()
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+# Split a page's imports into module-level and function-level ones
+def page_imports(path):
+    with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    startup, lazy = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        target = startup if node in tree.body else lazy
+        target.extend(name for name in names if name not in target)
+    return startup, lazy
+
+
+# Follow local modules down to the third-party packages they pull in (stdlib is ignored)
+def resolve(path, seen=None):
+    seen = set() if seen is None else seen
+    seen.add(path)
+    startup, lazy = [], []
+    page_startup, page_lazy = page_imports(path)
+    for modules, is_lazy in ((page_startup, False), (page_lazy, True)):
+        for module in modules:
+            if module in LOCAL_MODULES:
+                if LOCAL_MODULES[module] in seen:
+                    continue
+                local_startup, local_lazy = resolve(LOCAL_MODULES[module], seen)
+                (lazy if is_lazy else startup).extend(local_startup)
+                lazy.extend(local_lazy)
+            elif module.split('.')[0] not in sys.stdlib_module_names:
+                (lazy if is_lazy else startup).append(module)
+    startup = list(dict.fromkeys(startup))
+    lazy = [module for module in dict.fromkeys(lazy) if module not in startup]
+    return startup, lazy
+
+
+def installed(module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+# Cumulative import time in ms of each module, in a fresh interpreter
+def measure(modules):
+    modules = [module for module in modules if installed(module)]
+    if not modules:
+        return 0.0, {}
+    code = '; '.join(f'import {module}' for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    timings = {}
+    total = 0
+    for match in _LINE.finditer(result.stderr):
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        if len(indent) == 1:
+            total += cumulative
+        timings[name] = cumulative / 1000
+    return total / 1000, {module: timings.get(module) for module in modules}
+
+
+def _format_modules(modules, timings):
+    parts = []
+    for module in modules:
+        if not installed(module):
+            parts.append(f'`{module}` (not installed)')
+        elif timings.get(module) is not None:
+            parts.append(f'`{module}` {timings[module]:.0f} ms')
+        else:
+            parts.append(f'`{module}`')
+    return ', '.join(parts) or '-'
+
+
+def report():
+    lines = [
+        '# Import-time report',
+        '',
+        f'Generated by `python import_report.py --write` with Python {sys.version.split()[0]}.',
+        'Times are cumulative `-X importtime` figures from a fresh interpreter; shared',
+        'dependencies are counted once per page.',
+        '',
+        '| Page | Startup cost | Startup imports | Lazy imports |',
+        '| --- | ---: | --- | --- |',
+    ]
+    for page in PAGES:
+        startup, lazy = resolve(page)
+        total, timings = measure(startup)
+        lazy_timings = {module: measure([module])[1].get(module) for module in lazy}
+        lines.append(
+            f'| `{page}` | {total:.0f} ms | {_format_modules(startup, timings)} '
+            f'| {_format_modules(lazy, lazy_timings)} |'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    text = report()
+    print(text)
+    if '--write' in sys.argv:
+        with open(REPORT_PATH, 'w', encoding='utf-8') as f:
+            f.write(text)
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from contextlib import ContextDecorator
+
+# Per-stage latency histograms and cache hit rates for the apps and the API.
+#
+# Enable with HIT_METRICS=1. Stages are timed with
+#
+#     with instrumentation.timed('filter'):
+#         player_data = data[data['title'] == player]
+#
+# or @instrumentation.timed('model_fit') on a function. When disabled, timed()
+# returns a shared no-op and decorators leave the function untouched.
+ENABLED = os.environ.get('HIT_METRICS', '') not in ('', '0')
+
+# Also write the Prometheus text to this file after each rerun (Streamlit can't serve /metrics)
+METRICS_FILE = os.environ.get('HIT_METRICS_FILE')
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+_lock = threading.Lock()
+_stages = {}
+_cache_lookups = {}
+_cache_misses = {}
+_registered_caches = {}
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    # Upper bound of the bucket holding the q-th quantile
+    def quantile(self, q):
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+def observe(stage, seconds):
+    with _lock:
+        histogram = _stages.get(stage)
+        if histogram is None:
+            histogram = _stages[stage] = _Histogram()
+        histogram.observe(seconds)
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+    # Fresh timer per decorated call, so concurrent calls don't share a start time
+    def _recreate_cm(self):
+        return _Timer(self.stage)
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, func):
+        return func
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage):
+    return _Timer(stage) if ENABLED else _NOOP
+
+
+# Caches that can't report their own stats: count lookups at the call site and
+# misses inside the cached function
+def cache_lookup(name):
+    if ENABLED:
+        with _lock:
+            _cache_lookups[name] = _cache_lookups.get(name, 0) + 1
+
+
+def cache_miss(name):
+    if ENABLED:
+        with _lock:
+            _cache_misses[name] = _cache_misses.get(name, 0) + 1
+
+
+# Caches that can (e.g. functools.lru_cache): `info()` returns an object with hits/misses
+def register_cache(name, info):
+    _registered_caches[name] = info
+
+
+def cache_stats():
+    stats = {}
+    with _lock:
+        for name, lookups in _cache_lookups.items():
+            misses = _cache_misses.get(name, 0)
+            stats[name] = (lookups - misses, misses)
+    for name, info in _registered_caches.items():
+        current = info()
+        stats[name] = (current.hits, current.misses)
+    return stats
+
+
+def stage_stats():
+    with _lock:
+        return {
+            stage: {
+                'count': histogram.count,
+                'mean': histogram.total / histogram.count,
+                'p50': histogram.quantile(0.5),
+                'p95': histogram.quantile(0.95),
+                'max': histogram.max,
+            }
+            for stage, histogram in _stages.items()
+        }
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _cache_lookups.clear()
+        _cache_misses.clear()
+
+
+def prometheus_text():
+    lines = [
+        '# HELP hit_stage_seconds Time spent in each analyzer stage.',
+        '# TYPE hit_stage_seconds histogram',
+    ]
+    with _lock:
+        for stage, histogram in sorted(_stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'hit_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'hit_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'hit_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+    lines += [
+        '# HELP hit_cache_requests_total Cache lookups by result.',
+        '# TYPE hit_cache_requests_total counter',
+    ]
+    for name, (hits, misses) in sorted(cache_stats().items()):
+        lines.append(f'hit_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+        lines.append(f'hit_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics_file(path=METRICS_FILE):
+    if path:
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+
+
+# Sidebar panel with the process-wide numbers; shown only when metrics are enabled
+def debug_panel():
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander('Performance (debug)'):
+        stages = pd.DataFrame(stage_stats()).T
+        if not stages.empty:
+            stages[['mean', 'p50', 'p95', 'max']] *= 1000
+            st.write('Stage latency (ms)')
+            st.dataframe(stages.round(2))
+        caches = pd.DataFrame(cache_stats(), index=['hits', 'misses']).T
+        if not caches.empty:
+            caches['hit rate'] = caches['hits'] / (caches['hits'] + caches['misses']).where(lambda total: total > 0)
+            st.write('Caches')
+            st.dataframe(caches)
+    write_metrics_file()
@@ -0,0 +1,395 @@
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import hit_data
+import instrumentation
+import percentiles
+
+# Live mode: new hits are dropped into a directory (one CSV or Parquet file per
+# batch) and appended to the in-memory dataset as they arrive.
+#
+#   HIT_LIVE_DIR=/tmp/hits streamlit run streamlit_app.py
+#   python -m benchmarks.live_feed /tmp/hits --rows 20 --interval 2   # a local simulated feed
+#
+# Nothing is recomputed over the full frame. Numeric columns live in append-only
+# NumPy buffers and strings in chunked Arrow arrays. Per-title aggregates are
+# running sums/min/max (with two-heap running medians for titles that repeat),
+# and the top home-run leaderboard is a bounded heap. Each ingested batch yields
+# a new Dataset snapshot that views the buffers without copying, so pages pick
+# up the new numbers on their next rerun at a cost proportional to the new rows.
+# The per-dataset indexes (search, similar hits, peers, ...) are extended from the
+# previous snapshot's rather than rebuilt (LiveFeed.extend_index).
+# Write batch files elsewhere and rename them into the directory, so a
+# half-written file is never read.
+
+POLL_INTERVAL = 1.0
+LEADERBOARD_SIZE = 100
+FILE_TYPES = {'.csv': pd.read_csv, '.parquet': pd.read_parquet}
+STRING_COLUMNS = ['play_id', 'title', 'video']
+
+# Feeds are numbered for their lineage (see LiveSnapshot)
+_feed_numbers = itertools.count()
+
+
+# Append-only NumPy buffer (of values or of rows); views of the filled prefix stay
+# valid after later appends. The per-snapshot indexes grow their arrays with it too
+class AppendColumn:
+    def __init__(self, values, dtype):
+        values = np.asarray(values, dtype=dtype)
+        self.buffer = np.empty((max(2 * len(values), 1024), *values.shape[1:]), dtype=dtype)
+        self.buffer[:len(values)] = values
+        self.size = len(values)
+
+    def append(self, values):
+        end = self.size + len(values)
+        if end > len(self.buffer):
+            buffer = np.empty((max(2 * len(self.buffer), end), *self.buffer.shape[1:]), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+        self.buffer[self.size:end] = values
+        self.size = end
+
+    def view(self):
+        view = self.buffer[:self.size]
+        view.flags.writeable = False
+        return view
+
+
+# Chunked Arrow strings. Like a binary counter, a chunk merges with the one before
+# it when that one is at most twice its size, so there are O(log n) chunks and
+# each row is copied O(log n) times over its life
+class _StringColumn:
+    def __init__(self, values):
+        self.chunks = [pa.array(values, type=pa.large_string())]
+
+    def append(self, values):
+        self.chunks.append(pa.array(values, type=pa.large_string()))
+        while len(self.chunks) > 1 and len(self.chunks[-2]) <= 2 * len(self.chunks[-1]):
+            last = self.chunks.pop()
+            self.chunks[-1] = pa.concat_arrays([self.chunks[-1], last])
+
+    # A few values by row position, without combining the chunks
+    def take(self, positions):
+        offsets = np.cumsum([0] + [len(chunk) for chunk in self.chunks])
+        chunk_ids = np.searchsorted(offsets, positions, side='right') - 1
+        return [self.chunks[c][int(p - offsets[c])].as_py() for c, p in zip(chunk_ids, positions)]
+
+    def array(self):
+        return pd.arrays.ArrowExtensionArray(pa.chunked_array(self.chunks, type=pa.large_string()))
+
+
+class _RunningMedian:
+    def __init__(self, values):
+        self.low = []   # max-heap (negated) of the smaller half
+        self.high = []  # min-heap of the larger half
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        if self.low and value > -self.low[0]:
+            heapq.heappush(self.high, value)
+        else:
+            heapq.heappush(self.low, -value)
+        if len(self.low) > len(self.high) + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+        elif len(self.high) > len(self.low):
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+
+    def median(self):
+        if len(self.low) > len(self.high):
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+# A point-in-time view of the feed, usable anywhere a hit_data.Dataset is.
+# Aggregates of titles that repeat are updated in place, so an old snapshot may
+# show slightly newer numbers for them; rows and the leaderboard are exact
+class LiveSnapshot(hit_data.Dataset):
+    def __init__(self, feed, data, version, titles, top_home_runs):
+        self.data = data
+        self.version = version
+        self.top_home_runs = top_home_runs
+        self._feed = feed
+        self._titles = titles
+        self._indexes = {}
+        # Snapshots of one feed share it, so caches keyed on it (selections.py) can
+        # extend an older snapshot's results instead of starting over
+        self.lineage = feed.lineage
+
+    @property
+    def players(self):
+        return self.data['title'].unique()
+
+    # Full per-title table, built on demand; pages use the per-player lookups below
+    @property
+    def aggregates(self):
+        return self._feed.aggregates(self._titles)
+
+    def _aggregates_for(self, players):
+        return self._feed.aggregates(self._titles, players)
+
+    def player_stats(self, player):
+        return hit_data.player_stats(self.data, player, self._aggregates_for([player]))
+
+    def compare_players(self, players):
+        return hit_data.compare_players(self.data, players, self._aggregates_for(players))
+
+    def league_ranks(self):
+        return self._feed.league_ranks(self)
+
+    # This snapshot's `name` index (player_search.get_index & co.), extended from
+    # the previous snapshot's by the feed
+    def extend_index(self, name, build, extend):
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = self._feed.extend_index(name, self, build, extend)
+        return index
+
+
+class LiveFeed:
+    def __init__(self, base, directory=None):
+        self.directory = directory
+        self.lineage = f'{base.version}+live{next(_feed_numbers)}'
+        data = base.data
+        self._lock = threading.Lock()
+        # Sessions and API workers refresh concurrently: one of them polls at a time
+        self._poll_lock = threading.Lock()
+        self._seen_files = set()
+        self._last_poll = 0.0
+        # Missing metrics in new rows are filled with the base file's medians, as clean_data does
+        self._fill = {metric: float(data[metric].median()) for metric in hit_data.METRICS}
+        self._play_ids = set(pd.util.hash_array(data['play_id'].astype(str).to_numpy()).tolist())
+
+        self._strings = {name: _StringColumn(data[name].astype(str)) for name in STRING_COLUMNS}
+        self._metrics = {metric: AppendColumn(data[metric].to_numpy(dtype=np.float64), np.float64) for metric in hit_data.METRICS}
+        self.rows = len(data)
+
+        # Per-title running aggregates, one row per title in first-seen order
+        aggregates = base.aggregates
+        self._title_names = aggregates.index.tolist()
+        self._title_positions = {title: i for i, title in enumerate(self._title_names)}
+        self._counts = AppendColumn(aggregates['hits'].to_numpy(), np.int64)
+        self._home_runs = AppendColumn(aggregates['home_runs'].to_numpy(), np.int64)
+        self._stats = {}
+        for metric in hit_data.METRICS:
+            self._stats[f'{metric}_sum'] = AppendColumn(aggregates[f'{metric}_mean'].to_numpy() * aggregates['hits'].to_numpy(), np.float64)
+            for stat in ('median', 'min', 'max'):
+                self._stats[f'{metric}_{stat}'] = AppendColumn(aggregates[f'{metric}_{stat}'].to_numpy(), np.float64)
+        # Two-heap medians, created the first time a title gets another row. Until then
+        # titles with several rows just remember where those rows are
+        self._medians = {}
+        titles = data['title'].to_numpy()
+        repeated = np.flatnonzero(data['title'].duplicated(keep=False).to_numpy())
+        groups = pd.Series(repeated).groupby(titles[repeated]).indices
+        self._title_rows = {title: repeated[rows] for title, rows in groups.items()}
+
+        # Leaderboard heap of (exit velocity, -row): the weakest entry is on top
+        qualified = (data['ExitVelocity'] > 110) & (data['HitDistance'] > hit_data.HOME_RUN_DISTANCE)
+        positions = np.flatnonzero(qualified.to_numpy())
+        velocities = data['ExitVelocity'].to_numpy()[positions]
+        self._leaders = []
+        self._push_leaders(velocities, positions)
+
+        # League percentile ranks of the latest snapshot asked for, extended batch by batch
+        self._ranks = None
+        # Same for the per-dataset indexes, by name: (rows, index), each behind its own lock
+        self._indexes = {}
+        self._index_locks = {}
+        self._snapshot = self._make_snapshot(base.version)
+
+    def _push_leaders(self, velocities, positions):
+        for velocity, position in zip(velocities.tolist(), positions.tolist()):
+            entry = (velocity, -position)
+            if len(self._leaders) < LEADERBOARD_SIZE:
+                heapq.heappush(self._leaders, entry)
+            elif entry > self._leaders[0]:
+                heapq.heapreplace(self._leaders, entry)
+
+    def _make_snapshot(self, version):
+        columns = {name: self._strings[name].array() for name in ['play_id', 'title']}
+        columns.update({metric: self._metrics[metric].view() for metric in hit_data.METRICS})
+        columns['video'] = self._strings['video'].array()
+        data = pd.DataFrame(columns, copy=False)
+        positions = np.array([-position for _, position in sorted(self._leaders, reverse=True)], dtype=np.int64)
+        top = pd.DataFrame({name: self._strings[name].take(positions) for name in ['play_id', 'title']}, index=positions)
+        for metric in hit_data.METRICS:
+            top[metric] = self._metrics[metric].view()[positions]
+        top['video'] = self._strings['video'].take(positions)
+        return LiveSnapshot(self, data, version, len(self._title_names), top)
+
+    def _clean(self, batch):
+        batch = batch.copy()
+        for metric in hit_data.METRICS:
+            batch[metric] = pd.to_numeric(batch[metric], errors='coerce').fillna(self._fill[metric])
+        batch['title'] = batch['title'].fillna('Unknown')
+        batch = batch.drop_duplicates(subset=['play_id'])
+        hashes = pd.util.hash_array(batch['play_id'].astype(str).to_numpy())
+        new = np.array([value not in self._play_ids for value in hashes.tolist()], dtype=bool)
+        self._play_ids.update(hashes[new].tolist())
+        return batch[new]
+
+    def _update_aggregates(self, batch):
+        grouped = batch.groupby('title', sort=False)
+        stats = grouped[hit_data.METRICS].agg(['sum', 'median', 'min', 'max'])
+        stats.columns = [f'{column}_{stat}' for column, stat in stats.columns]
+        counts = grouped.size()
+        home_runs = (batch['HitDistance'] > hit_data.HOME_RUN_DISTANCE).groupby(batch['title'], sort=False).sum()
+
+        known = np.array([title in self._title_positions for title in stats.index], dtype=bool)
+        # New titles: append a row each
+        new_titles = stats.index[~known]
+        for title in new_titles:
+            self._title_positions[title] = len(self._title_names)
+            self._title_names.append(title)
+        for title in new_titles[counts[new_titles].to_numpy() > 1]:
+            self._title_rows[title] = self.rows + np.flatnonzero((batch['title'] == title).to_numpy())
+        self._counts.append(counts[new_titles].to_numpy())
+        self._home_runs.append(home_runs[new_titles].to_numpy())
+        for name, column in self._stats.items():
+            column.append(stats.loc[new_titles, name].to_numpy())
+
+        # Titles seen before (rare: "Unknown", review titles): update their row in place
+        for title in stats.index[known]:
+            i = self._title_positions[title]
+            rows = batch.loc[batch['title'] == title]
+            self._counts.buffer[i] += len(rows)
+            self._home_runs.buffer[i] += int(home_runs[title])
+            if (title, hit_data.METRICS[0]) not in self._medians:
+                # A title with a single row so far has that row's values as its median
+                positions = self._title_rows.pop(title, None)
+                for metric in hit_data.METRICS:
+                    values = [self._stats[f'{metric}_median'].buffer[i]] if positions is None else self._metrics[metric].view()[positions].tolist()
+                    self._medians[(title, metric)] = _RunningMedian(values)
+            for metric in hit_data.METRICS:
+                values = rows[metric].tolist()
+                self._stats[f'{metric}_sum'].buffer[i] += sum(values)
+                self._stats[f'{metric}_min'].buffer[i] = min(self._stats[f'{metric}_min'].buffer[i], min(values))
+                self._stats[f'{metric}_max'].buffer[i] = max(self._stats[f'{metric}_max'].buffer[i], max(values))
+                median = self._medians[(title, metric)]
+                for value in values:
+                    median.add(value)
+                self._stats[f'{metric}_median'].buffer[i] = median.median()
+
+    # Append a batch of raw rows; returns the new snapshot
+    def ingest(self, batch):
+        with self._lock:
+            with instrumentation.timed('live_ingest'):
+                batch = self._clean(batch)
+                if batch.empty:
+                    return self._snapshot
+                self._update_aggregates(batch)
+                for name in STRING_COLUMNS:
+                    self._strings[name].append(batch[name].astype(str))
+                for metric in hit_data.METRICS:
+                    self._metrics[metric].append(batch[metric].to_numpy(dtype=np.float64))
+
+                positions = np.arange(self.rows, self.rows + len(batch))
+                qualified = ((batch['ExitVelocity'] > 110) & (batch['HitDistance'] > hit_data.HOME_RUN_DISTANCE)).to_numpy()
+                self._push_leaders(batch['ExitVelocity'].to_numpy()[qualified], positions[qualified])
+                self.rows += len(batch)
+
+                # Chained version: previous version plus a hash of just the new rows
+                digest = hashlib.sha1((self._snapshot.version + hit_data.data_version(batch)).encode())
+                self._snapshot = self._make_snapshot(digest.hexdigest()[:16])
+            return self._snapshot
+
+    # Per-title aggregates (the first `titles` titles), as hit_data.player_aggregates lays them out
+    def aggregates(self, titles, players=None):
+        if players is None:
+            positions = np.arange(titles)
+        else:
+            positions = [self._title_positions[player] for player in players
+                         if self._title_positions.get(player, titles) < titles]
+        counts = self._counts.view()[positions]
+        frame = pd.DataFrame(index=pd.Index([self._title_names[i] for i in positions], name='title'))
+        for metric in hit_data.METRICS:
+            frame[f'{metric}_mean'] = self._stats[f'{metric}_sum'].view()[positions] / counts
+            for stat in ('median', 'min', 'max'):
+                frame[f'{metric}_{stat}'] = self._stats[f'{metric}_{stat}'].view()[positions]
+        frame['hits'] = counts
+        frame['home_runs'] = self._home_runs.view()[positions]
+        return frame
+
+    # Each title's comparison stats (mean EV, median LA, mean distance) for the first `titles` titles
+    def _player_values(self, titles):
+        counts = self._counts.view()[:titles]
+        return {metric: self._stats[f'{metric}_median'].view()[:titles] if statistic == 'median' else self._stats[f'{metric}_sum'].view()[:titles] / counts
+                for metric, statistic in hit_data.PLAYER_STATISTICS.items()}
+
+    # Percentile ranks (percentiles.py) for a snapshot: the last ones built, extended
+    # with the hits and player stats that arrived since; built from scratch only for
+    # the first snapshot or an older one than last time
+    def league_ranks(self, snapshot):
+        with self._lock:
+            rows = len(snapshot.data)
+            ranks = self._ranks
+            if ranks is None or ranks.rows > rows:
+                ranks = percentiles.build(snapshot)
+            elif ranks.rows < rows:
+                new_hits = {metric: self._metrics[metric].view()[ranks.rows:rows] for metric in hit_data.METRICS}
+                ranks = ranks.extend(new_hits, self._player_values(snapshot._titles))
+            if self._ranks is None or ranks.rows >= self._ranks.rows:
+                self._ranks = ranks
+            return ranks
+
+    # The `name` index for a snapshot: the last one built, extended with the rows
+    # that arrived since by extend(index, snapshot, start) (new rows from `start`);
+    # build(snapshot) runs only for the first snapshot or an older one than last time.
+    # Indexes don't take the feed's lock, so ingesting doesn't wait for them
+    def extend_index(self, name, snapshot, build, extend):
+        with self._index_locks.setdefault(name, threading.Lock()):
+            rows = len(snapshot.data)
+            latest = self._indexes.get(name)
+            if latest is None or latest[0] > rows:
+                index = build(snapshot)
+            elif latest[0] < rows:
+                index = extend(latest[1], snapshot, latest[0])
+            else:
+                index = latest[1]
+            if latest is None or rows >= latest[0]:
+                self._indexes[name] = (rows, index)
+            return index
+
+    # Ingest any new files in the drop directory (at most once per POLL_INTERVAL).
+    # Callers arriving while another polls wait for it, then see its snapshot
+    def refresh(self):
+        if not self.directory:
+            return self._snapshot
+        with self._poll_lock:
+            now = time.monotonic()
+            if now - self._last_poll < POLL_INTERVAL:
+                return self._snapshot
+            self._last_poll = now
+            names = sorted(name for name in os.listdir(self.directory)
+                           if not name.startswith('.') and os.path.splitext(name)[1] in FILE_TYPES)
+            for name in names:
+                if name not in self._seen_files:
+                    self._seen_files.add(name)
+                    read = FILE_TYPES[os.path.splitext(name)[1]]
+                    self.ingest(read(os.path.join(self.directory, name)))
+            return self._snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+# One feed per drop directory, started from the static dataset
+def get_feed(directory, url=None):
+    with _feeds_lock:
+        feed = _feeds.get(directory)
+        if feed is None:
+            feed = _feeds[directory] = LiveFeed(hit_data.get_dataset(url), directory)
+        return feed
+
@@ -0,0 +1,146 @@
+import gc
+import os
+import resource
+import sys
+import tracemalloc
+
+# Memory diagnostics for long-lived servers: after every rerun, take a
+# tracemalloc snapshot and count live matplotlib Figures and large DataFrames,
+# so growth over time and the allocation sites behind it are visible.
+#
+# Enable with HIT_MEMORY_DIAGNOSTICS=1 (the multipage app then shows a sidebar
+# panel). Tracing slows everything down, so keep it off in production.
+ENABLED = os.environ.get('HIT_MEMORY_DIAGNOSTICS', '') not in ('', '0')
+
+# DataFrames at least this big (shallow bytes) are counted as "large"
+LARGE_FRAME_BYTES = 1_000_000
+TOP_SITES = 10
+TRACEBACK_FRAMES = 1
+
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+# Live matplotlib Figures, whether pyplot manages them or not: rendering.py
+# draws on plain Figures pyplot never sees (walks the gc heap, so it's slow)
+def live_figures():
+    figure = sys.modules.get('matplotlib.figure')
+    if figure is None:
+        return 0
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, figure.Figure))
+
+
+# Shallow sizes of live DataFrames above the threshold (walks the gc heap, so it's slow)
+def large_frames(min_bytes=LARGE_FRAME_BYTES):
+    pandas = sys.modules.get('pandas')
+    if pandas is None:
+        return []
+    sizes = [obj.memory_usage(index=True, deep=False).sum() for obj in gc.get_objects() if isinstance(obj, pandas.DataFrame)]
+    return [int(size) for size in sizes if size >= min_bytes]
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak rather than current RSS, but the best portable fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryDiagnostics:
+    def __init__(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        self.history = []
+        self.top_sites = []
+        self._baseline = None
+
+    # Call once per rerun, after the page has finished
+    def record(self):
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        current, peak = tracemalloc.get_traced_memory()
+        frames = large_frames()
+        if self._baseline is None:
+            self._baseline = snapshot
+        self.top_sites = snapshot.compare_to(self._baseline, 'lineno')[:TOP_SITES]
+        self.history.append({
+            'rerun': len(self.history) + 1,
+            'traced_mb': current / 1e6,
+            'peak_mb': peak / 1e6,
+            'rss_mb': rss_bytes() / 1e6,
+            'figures': live_figures(),
+            'large_frames': len(frames),
+            'large_frames_mb': sum(frames) / 1e6,
+        })
+        return self.history[-1]
+
+    # Stop tracing if this instance started it
+    def stop(self):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    # Growth between two recorded reruns (default: first to last)
+    def growth(self, key, start=0):
+        if len(self.history) < 2:
+            return 0
+        return self.history[-1][key] - self.history[start][key]
+
+    def report(self):
+        lines = [f'{"rerun":>5} {"traced MB":>10} {"RSS MB":>8} {"figures":>8} {"large frames":>13}']
+        for row in self.history:
+            lines.append(f'{row["rerun"]:>5} {row["traced_mb"]:>10.2f} {row["rss_mb"]:>8.1f} {row["figures"]:>8} '
+                         f'{row["large_frames"]:>6} ({row["large_frames_mb"]:.1f} MB)')
+        lines.append('')
+        lines.append('Top allocation sites since the first rerun:')
+        for stat in self.top_sites:
+            frame = stat.traceback[0]
+            lines.append(f'  {stat.size_diff / 1e3:+10.1f} kB {stat.count_diff:+7} blocks  {frame.filename}:{frame.lineno}')
+        return '\n'.join(lines)
+
+
+_diagnostics = None
+
+
+# Process-wide diagnostics for the Streamlit server; no-op unless enabled
+def record_rerun():
+    global _diagnostics
+    if not ENABLED:
+        return None
+    if _diagnostics is None:
+        _diagnostics = MemoryDiagnostics()
+    return _diagnostics.record()
+
+
+def panel():
+    if not ENABLED or _diagnostics is None:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander('Memory (debug)'):
+        history = pd.DataFrame(_diagnostics.history).set_index('rerun')
+        st.line_chart(history[['traced_mb', 'rss_mb']])
+        st.write(f"Live figures: {history['figures'].iloc[-1]}, "
+                 f"large DataFrames: {history['large_frames'].iloc[-1]} ({history['large_frames_mb'].iloc[-1]:.1f} MB)")
+        st.write('Top allocation sites since the first rerun')
+        st.dataframe(pd.DataFrame([
+            {
+                'site': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                'kB': round(stat.size_diff / 1e3, 1),
+                'blocks': stat.count_diff,
+            }
+            for stat in _diagnostics.top_sites
+        ]))
+
+
+# Start tracing as early as possible so the first rerun is captured too
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start(TRACEBACK_FRAMES)
@@ -0,0 +1,139 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import hit_data
+import instrumentation
+
+# League percentile ranks, to answer "how good is this?" next to the raw numbers.
+# Every hit's ExitVelocity, LaunchAngle and HitDistance is ranked against all
+# hits, and every player's comparison stats (mean EV, median LA, mean distance)
+# against every other player's. The league is sorted once per dataset; a rank is
+# a searchsorted into it, never a scan, and comes back as a uint8 column
+# (whole percentiles, 0-100).
+#
+# Live snapshots (live.py) extend the previous snapshot's ranks: new hits are
+# merged into the sorted arrays and players whose stats changed are moved,
+# instead of sorting the league again.
+
+SUFFIX = '_pct'
+# How the apps name each metric in a sentence
+LABELS = {'ExitVelocity': 'exit velocity', 'HitDistance': 'distance', 'LaunchAngle': 'launch angle'}
+
+
+# Mid-rank percentile of each value against a sorted league (ties count half)
+def percentile_ranks(league, values):
+    if len(league) == 0:
+        return np.zeros(len(values), dtype=np.uint8)
+    # Searching in sorted order keeps the lookups cache-friendly (about 4x faster for
+    # a whole column)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(values)
+    below = np.searchsorted(league, values[order], side='left')
+    at_or_below = np.searchsorted(league, values[order], side='right')
+    ranks = np.empty(len(values), dtype=np.uint8)
+    ranks[order] = np.rint((below + at_or_below) * (50 / len(league)))
+    return ranks
+
+
+# Add values to a sorted array without sorting it again (linear in its length)
+def _merge(league, values):
+    if len(values) == 0:
+        return league
+    values = np.sort(values)
+    return np.insert(league, np.searchsorted(league, values), values)
+
+
+# Remove values (each present, possibly repeated) from a sorted array
+def _remove(league, values):
+    if len(values) == 0:
+        return league
+    values = np.sort(values)
+    # Equal values sit side by side in the league: the k-th copy is k places after the first
+    repeat = np.arange(len(values)) - np.searchsorted(values, values)
+    return np.delete(league, np.searchsorted(league, values) + repeat)
+
+
+class LeagueRanks:
+    # `hits` are sorted arrays of every hit's metrics; `players` each player's
+    # comparison stats in a stable player order, and `player_league` those sorted
+    def __init__(self, hits, players, player_league):
+        self.rows = len(hits[hit_data.METRICS[0]])
+        self._hits = hits
+        self._players = players
+        self._player_league = player_league
+
+    @classmethod
+    def from_values(cls, hits, players):
+        players = {metric: np.array(values, dtype=np.float64) for metric, values in players.items()}
+        return cls({metric: np.sort(np.asarray(values, dtype=np.float64)) for metric, values in hits.items()},
+                   players, {metric: np.sort(values) for metric, values in players.items()})
+
+    # The ranks after `new_hits` were appended and the players' stats became
+    # `players` (same order as before, possibly with new players at the end)
+    def extend(self, new_hits, players):
+        hits = {metric: _merge(self._hits[metric], new_hits[metric]) for metric in hit_data.METRICS}
+        updated, player_league = {}, {}
+        for metric, values in players.items():
+            values = np.array(values, dtype=np.float64)
+            previous = self._players[metric]
+            known = values[:len(previous)]
+            changed = known != previous
+            league = _remove(self._player_league[metric], previous[changed])
+            player_league[metric] = _merge(league, np.concatenate([known[changed], values[len(previous):]]))
+            updated[metric] = values
+        return LeagueRanks(hits, updated, player_league)
+
+    # uint8 percentile columns ({metric}_pct) for each of `rows`' hits
+    def hit_ranks(self, rows):
+        return pd.DataFrame({f'{metric}{SUFFIX}': percentile_ranks(self._hits[metric], rows[metric].to_numpy(dtype=np.float64))
+                             for metric in hit_data.METRICS}, index=rows.index)
+
+    # uint8 percentile columns for players' comparison stats (a compare_players table)
+    def player_ranks(self, comparison):
+        ranks = pd.DataFrame({f'{metric}{SUFFIX}': percentile_ranks(self._player_league[metric], comparison[metric].to_numpy(dtype=np.float64))
+                              for metric in hit_data.PLAYER_STATISTICS})
+        ranks.index = pd.Index(comparison['title'], name='title')
+        return ranks
+
+
+# A dataset's ranks from scratch: its rows and its per-title aggregates
+def build(dataset):
+    aggregates = dataset.aggregates
+    return LeagueRanks.from_values(
+        {metric: dataset.data[metric].to_numpy() for metric in hit_data.METRICS},
+        {metric: aggregates[f'{metric}_{statistic}'].to_numpy() for metric, statistic in hit_data.PLAYER_STATISTICS.items()},
+    )
+
+
+# One ranking per loaded dataset (Dataset objects are cached per process);
+# live snapshots extend the feed's latest ranks instead
+def get_ranks(dataset):
+    if hasattr(dataset, 'league_ranks'):
+        with instrumentation.timed('percentiles'):
+            return dataset.league_ranks()
+    return _get_ranks(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_ranks(dataset):
+    with instrumentation.timed('percentiles'):
+        return build(dataset)
+
+
+# Percentile ranks of each player's comparison stats, indexed by title
+def player_ranks(dataset, players):
+    return get_ranks(dataset).player_ranks(dataset.compare_players(players))
+
+
+# "87th percentile"
+def format_percentile(rank):
+    rank = int(rank)
+    suffix = 'th' if 10 <= rank % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(rank % 10, 'th')
+    return f'{rank}{suffix} percentile'
+
+
+# "97th percentile exit velocity, 88th percentile distance, 40th percentile launch angle"
+def describe(ranks):
+    return ', '.join(f"{format_percentile(ranks[f'{metric}{SUFFIX}'])} {label}" for metric, label in LABELS.items())
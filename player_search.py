@@ -0,0 +1,206 @@
+import bisect
+import copy
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+import hit_data
+
+# Server-side player search: built once per dataset, then each keystroke is a
+# trie walk (prefix of any name token) with trigram fuzzy matching as the
+# fallback, so the page only ships a short candidate list instead of every title.
+
+# Generational suffixes are ignored when matching ("Souza Jr." == "Souza")
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+DEFAULT_LIMIT = 10
+# Best matches kept at each trie node, so a prefix lookup never scans a subtree
+NODE_CANDIDATES = 25
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+MIN_FUZZY_SCORE = 0.5
+
+
+# Lowercase, strip accents and punctuation, drop suffixes: "José Abreu Jr." -> "jose abreu"
+def normalize(name):
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    tokens = re.sub(r"[^a-z0-9 ]+", ' ', name).split()
+    return ' '.join(token for token in tokens if token not in SUFFIXES)
+
+
+# Each token is padded, so "tro" typed alone still lines up with the start of "trout"
+def trigrams(text):
+    padded = '  ' + text.replace(' ', '  ') + ' '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+    # `players` maps a display name to its titles; `popularity` orders ties (more home runs first)
+    def __init__(self, players, popularity):
+        self.names = list(players)
+        self.titles = [players[name] for name in self.names]
+        self.popularity = [popularity[name] for name in self.names]
+        self.keys = [normalize(name) for name in self.names]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        self._order = sorted(range(len(self.names)), key=lambda i: (-self.popularity[i], self.keys[i]))
+        self._trie = {}
+        postings = defaultdict(list)
+
+        # Insert every token start ("mike trout", "trout") so last names match too;
+        # walking ids in popularity order keeps each node's candidates best-first
+        for i in self._order:
+            key = self.keys[i]
+            tokens = key.split()
+            for start in range(len(tokens)):
+                node = self._trie
+                for char in ' '.join(tokens[start:]):
+                    node = node.setdefault(char, {})
+                    candidates = node.setdefault('', [])
+                    if len(candidates) < NODE_CANDIDATES and i not in candidates:
+                        candidates.append(i)
+            for gram in trigrams(key):
+                postings[gram].append(i)
+
+        self._trigrams = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = np.array([len(trigrams(key)) for key in self.keys], dtype=np.float32)
+        self._rank = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(*_group_titles(data['title']))
+
+    # Ordering of _order and of every node's candidates
+    def _sort_key(self, i):
+        return -self.popularity[i], self.keys[i], i
+
+    # A new index with the titles appended to `data` from row `start` on. New names
+    # are inserted and players with new home runs move up; popularity only grows,
+    # so each node's candidates stay exact by merging in the players that changed.
+    # Only the trie nodes on their paths are copied: this index is left as it was
+    def extend(self, data, start):
+        players, popularity = _group_titles(data['title'].iloc[start:])
+        index = copy.copy(self)
+        index.names, index.titles, index.popularity, index.keys = self.names[:], self.titles[:], self.popularity[:], self.keys[:]
+        index._positions = dict(self._positions)
+        index._order = self._order[:]
+        index._rank = None
+        changed = []
+        for name, titles in players.items():
+            i = index._positions.get(name)
+            if i is None:
+                i = index._positions[name] = len(index.names)
+                index.names.append(name)
+                index.titles.append([])
+                index.popularity.append(0)
+                index.keys.append(normalize(name))
+            else:
+                del index._order[bisect.bisect_left(index._order, self._sort_key(i), key=self._sort_key)]
+            index.titles[i] = index.titles[i] + titles
+            index.popularity[i] += popularity[name]
+            changed.append(i)
+        for i in changed:
+            bisect.insort(index._order, i, key=index._sort_key)
+
+        trie, copied = dict(self._trie), set()
+        for i in changed:
+            tokens = index.keys[i].split()
+            for start in range(len(tokens)):
+                node = trie
+                for char in ' '.join(tokens[start:]):
+                    child = node.get(char)
+                    if child is None or id(child) not in copied:
+                        child = node[char] = dict(child or {})
+                        copied.add(id(child))
+                    node = child
+                    node[''] = sorted({*node.get('', []), i}, key=index._sort_key)[:NODE_CANDIDATES]
+        index._trie = trie
+
+        new = range(len(self.names), len(index.names))
+        postings = defaultdict(list)
+        for i in new:
+            for gram in trigrams(index.keys[i]):
+                postings[gram].append(i)
+        index._trigrams = dict(self._trigrams)
+        for gram, ids in postings.items():
+            old = self._trigrams.get(gram)
+            ids = np.array(ids, dtype=np.int32)
+            index._trigrams[gram] = ids if old is None else np.concatenate([old, ids])
+        index._gram_counts = np.concatenate([self._gram_counts, np.array([len(trigrams(index.keys[i])) for i in new], dtype=np.float32)])
+        return index
+
+    # Each name's place in _order, for the fuzzy tie-break (built on first use)
+    def _ranks(self):
+        if self._rank is None:
+            rank = np.empty(len(self.names), dtype=np.float32)
+            rank[self._order] = np.arange(len(self.names))
+            self._rank = rank
+        return self._rank
+
+    def _prefix(self, key):
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get('', [])
+
+    # Trigram overlap: mostly the share of the query found in the name (typos, missing
+    # letters, partial words), with Dice similarity and popularity breaking ties
+    def _fuzzy(self, key, limit, exclude):
+        query = trigrams(key)
+        hits = [self._trigrams[gram] for gram in query if gram in self._trigrams]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names)).astype(np.float32)
+        containment = shared / len(query)
+        dice = 2 * shared / (len(query) + self._gram_counts)
+        score = containment + 0.1 * dice - 1e-6 * self._ranks()
+        score[list(exclude)] = -1
+        score[containment < MIN_FUZZY_SCORE] = -1
+        top = np.argpartition(-score, min(limit, len(score) - 1))[:limit]
+        top = top[np.argsort(-score[top])]
+        return [int(i) for i in top if score[i] >= 0]
+
+    # Top player names for a query; the most prolific players when it is empty
+    def search(self, query, limit=DEFAULT_LIMIT):
+        key = normalize(query or '')
+        if not key:
+            ids = self._order[:limit]
+        else:
+            ids = self._prefix(key)[:limit]
+            if len(ids) < limit:
+                ids = ids + self._fuzzy(key, limit - len(ids), set(ids))
+        return [self.names[i] for i in ids]
+
+    def home_runs(self, name):
+        return self.popularity[self._positions[name]]
+
+    # Titles (one per home run) of the given players, for the 'Select Player' widget
+    def titles_for(self, names, limit=None):
+        titles = [title for name in names for title in self.titles[self._positions[name]]]
+        return titles[:limit] if limit else titles
+
+
+# Display name -> titles, and name -> number of titles, in first-seen order. Titles
+# without a parsable batter (e.g. some review titles) are searchable by their full text
+def _group_titles(titles):
+    titles = titles.astype(str)
+    names = hit_data.parse_titles(titles)['player'].fillna(titles)
+    grouped = titles.groupby(names.values, sort=False)
+    return {name: list(group) for name, group in grouped}, grouped.size().to_dict()
+
+
+# One index per loaded dataset (Dataset objects are cached per process); live
+# snapshots extend the previous snapshot's index instead
+def get_index(dataset):
+    if hasattr(dataset, 'extend_index'):
+        return dataset.extend_index('player_search', lambda snapshot: PlayerSearchIndex.from_data(snapshot.data),
+                                    lambda index, snapshot, start: index.extend(snapshot.data, start))
+    return _get_index(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_index(dataset):
+    return PlayerSearchIndex.from_data(dataset.data)
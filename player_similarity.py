@@ -0,0 +1,252 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import hit_data
+import instrumentation
+
+# "Players like X": one feature vector per batter (distribution of EV, LA and
+# distance, plus hit-type and field-direction mix), cosine similarity between
+# them, and k-means clusters. The all-pairs matrix is computed in row blocks
+# and only each player's top peers are kept, so memory stays O(players * k).
+# Live snapshots update just the players with new hits (PlayerSimilarity.extend).
+
+# Batters with fewer home runs than this are too noisy to compare
+MIN_HITS = 3
+QUANTILES = [0.1, 0.5, 0.9]
+# Peers kept per player, and players per similarity block (block x players float32 at a time)
+TOP_PEERS = 20
+BLOCK_SIZE = 1024
+N_CLUSTERS = 8
+# Players updated by extend() (with the build's standardization and clusters)
+# before the next snapshot rebuilds, as a share of the roster
+MAX_DRIFT = 0.25
+
+
+# Per-player features, computed with grouped reductions over the whole frame
+def player_features(data, min_hits=MIN_HITS, names=None):
+    if names is None:
+        names = hit_data.parse_titles(data['title'])['player']
+    codes, players = pd.factorize(names)
+    valid = codes >= 0
+    codes, frame = codes[valid], data.loc[valid, hit_data.METRICS]
+    counts = np.bincount(codes, minlength=len(players))
+
+    grouped = frame.groupby(codes)
+    parts = [
+        grouped.mean().add_suffix('_mean'),
+        grouped.std(ddof=0).add_suffix('_std'),
+    ]
+    for q in QUANTILES:
+        parts.append(grouped.quantile(q).add_suffix(f'_p{int(q * 100)}'))
+
+    # Hit-type and field mixes: shares of each category, via one bincount per column
+    batted = hit_data.parse_batted_balls(data.loc[valid, 'title'])
+    for column in ['hit_type', 'field']:
+        categories = batted[column].cat.categories
+        category = batted[column].cat.codes.to_numpy()
+        known = category >= 0
+        mix = np.bincount(codes[known] * len(categories) + category[known], minlength=len(players) * len(categories))
+        mix = mix.reshape(len(players), len(categories)) / np.maximum(counts, 1)[:, None]
+        parts.append(pd.DataFrame(mix, columns=[f'{column}_{value}' for value in categories]))
+
+    features = pd.concat(parts, axis=1)
+    features.index = players
+    features.insert(0, 'hits', counts)
+    return features[features['hits'] >= min_hits]
+
+
+class PlayerSimilarity:
+    def __init__(self, features):
+        self.features = features
+        self.names = features.index
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        values = features.drop(columns='hits').to_numpy(dtype=np.float32)
+        # Standardize each feature, then unit-normalize each player: dot product = cosine similarity
+        std = values.std(axis=0)
+        self._mean, self._std = values.mean(axis=0), np.where(std > 0, std, 1)
+        self.vectors = self._vectors(values)
+        self._peers = None
+        self._clusters = None
+        self._model = None
+        self._rows = None
+
+    @classmethod
+    def from_data(cls, data):
+        names = hit_data.parse_titles(data['title'])['player']
+        similarity = cls(player_features(data, names=names))
+        # Every batter's rows (qualifying or not), for extend(): row positions sorted by
+        # player with each player's bounds, and the rows appended since, by name
+        codes, players = pd.factorize(names)
+        order = np.argsort(codes, kind='stable')
+        similarity._rows = (players, order, np.searchsorted(codes[order], np.arange(len(players) + 1)), {})
+        return similarity
+
+    def _vectors(self, values):
+        values = (values - self._mean) / self._std
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        return values / np.where(norms > 0, norms, 1)
+
+    # A similarity index over `data`, which is this index's rows plus new ones from
+    # row `start`. Only the batters with new rows get their features recomputed (from
+    # all their rows), standardized as at the build; peers and clusters, if already
+    # computed, are updated for them. Once too many players have drifted this way,
+    # the index is rebuilt. This index is left as it was
+    def extend(self, data, start):
+        if self._rows is None:
+            return PlayerSimilarity.from_data(data)
+        new_names = hit_data.parse_titles(data['title'].iloc[start:])['player']
+        new_rows = {name: start + rows for name, rows in new_names.groupby(new_names.to_numpy(), sort=False).indices.items()}
+        players, order, bounds, added = self._rows
+        added = dict(added)
+        for name, rows in new_rows.items():
+            added[name] = np.concatenate([added.get(name, np.empty(0, dtype=np.intp)), rows])
+        if len(added) > MAX_DRIFT * len(players):
+            return PlayerSimilarity.from_data(data)
+
+        changed = list(new_rows)
+        codes = players.get_indexer(changed)
+        rows = np.concatenate([order[bounds[code]:bounds[code + 1]] for code in codes if code >= 0] + [added[name] for name in changed])
+        # Batters still short of MIN_HITS come back with no features
+        features = player_features(data.iloc[np.sort(rows)])
+        index = copy.copy(self)
+        index._rows = (players, order, bounds, added)
+        if features.empty:
+            return index
+
+        index._positions = dict(self._positions)
+        updated = [self._positions[name] for name in features.index if name in self._positions]
+        appended = [name for name in features.index if name not in self._positions]
+        for name in appended:
+            index._positions[name] = len(index._positions)
+        index.features = pd.concat([self.features, features.loc[appended]])
+        index.features.loc[features.index] = features
+        index.names = index.features.index
+        ids = np.array([index._positions[name] for name in features.index], dtype=np.intp)
+        vectors = index._vectors(features.drop(columns='hits').to_numpy(dtype=np.float32))
+        index.vectors = np.concatenate([self.vectors, np.empty((len(appended), self.vectors.shape[1]), dtype=self.vectors.dtype)])
+        index.vectors[ids] = vectors
+        index._peers = index._update_peers(self._peers, ids, updated)
+        if self._clusters is not None:
+            # Nearest of the build's centroids
+            index._clusters = np.concatenate([self._clusters, np.empty(len(appended), dtype=self._clusters.dtype)])
+            index._clusters[ids] = self._model.predict(vectors)
+        return index
+
+    # Top peers after the players `ids` changed (`updated`) or were added: their rows
+    # are recomputed, as are the rows of players whose peers included an updated one
+    # (it may have dropped out); every other row only merges in the changed players
+    def _update_peers(self, peers, ids, updated):
+        n = len(self.vectors)
+        if peers is None or peers[0].shape[1] != min(TOP_PEERS, n - 1):
+            return None
+        old_ids, old_scores = peers
+        k = old_ids.shape[1]
+        rest = np.ones(len(old_ids), dtype=bool)
+        rest[ids[ids < len(old_ids)]] = False
+        rest &= ~np.isin(old_ids, updated).any(axis=1)
+        rest = np.flatnonzero(rest)
+
+        peer_ids = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float32)
+        merged_ids = np.concatenate([old_ids[rest], np.broadcast_to(ids, (len(rest), len(ids)))], axis=1)
+        merged_scores = np.concatenate([old_scores[rest], self.vectors[rest] @ self.vectors[ids].T], axis=1)
+        top = np.argsort(-merged_scores, axis=1, kind='stable')[:, :k]
+        peer_ids[rest] = np.take_along_axis(merged_ids, top, axis=1)
+        scores[rest] = np.take_along_axis(merged_scores, top, axis=1)
+
+        recompute = np.setdiff1d(np.arange(n), rest)
+        for start in range(0, len(recompute), BLOCK_SIZE):
+            own = recompute[start:start + BLOCK_SIZE]
+            peer_ids[own], scores[own] = _top_k(self.vectors[own] @ self.vectors.T, k, own)
+        return peer_ids, scores
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    # All-pairs similarity, one (block x players) slab at a time
+    def blocks(self, block_size=BLOCK_SIZE):
+        for start in range(0, len(self.vectors), block_size):
+            yield start, self.vectors[start:start + block_size] @ self.vectors.T
+
+    # Top peers of every player (indices and similarities), computed once in blocks.
+    # Worth it for bulk use (the API, prewarming); a single lookup doesn't need it
+    def top_peers(self):
+        if self._peers is None:
+            n = len(self.vectors)
+            k = min(TOP_PEERS, n - 1)
+            ids = np.empty((n, k), dtype=np.int32)
+            scores = np.empty((n, k), dtype=np.float32)
+            for start, block in self.blocks():
+                stop = start + len(block)
+                ids[start:stop], scores[start:stop] = _top_k(block, k, np.arange(start, stop))
+            self._peers = (ids, scores)
+        return self._peers
+
+    # The k most similar players to `name`, most similar first
+    def peers(self, name, k=5):
+        position = self._positions.get(name)
+        if position is None:
+            return pd.DataFrame(columns=['player', 'similarity', 'hits', 'cluster'])
+        if self._peers is not None and k <= self._peers[0].shape[1]:
+            ids, scores = self._peers[0][position, :k], self._peers[1][position, :k]
+        else:
+            # One row of the matrix: a single matrix-vector product
+            row = self.vectors[position:position + 1] @ self.vectors.T
+            ids, scores = _top_k(row, min(k, len(self.vectors) - 1), [position])
+            ids, scores = ids[0], scores[0]
+        return pd.DataFrame({
+            'player': self.names[ids],
+            'similarity': scores,
+            'hits': self.features['hits'].to_numpy()[ids],
+            'cluster': self.clusters()[ids],
+        })
+
+    # Similarity matrix for a handful of players (e.g. a heatmap of the comparison)
+    def matrix(self, names):
+        names = [name for name in names if name in self._positions]
+        vectors = self.vectors[[self._positions[name] for name in names]]
+        return pd.DataFrame(vectors @ vectors.T, index=names, columns=names)
+
+    # k-means cluster of every player (mini-batch, so it scales with the roster)
+    def clusters(self):
+        if self._clusters is None:
+            from sklearn.cluster import MiniBatchKMeans
+
+            model = MiniBatchKMeans(n_clusters=min(N_CLUSTERS, len(self.vectors)), random_state=0, n_init=3, batch_size=4096)
+            self._clusters = model.fit_predict(self.vectors)
+            self._model = model
+        return self._clusters
+
+    def cluster_of(self, name):
+        return int(self.clusters()[self._positions[name]])
+
+
+# Best k columns of each row of a similarity block, excluding each row's own player
+# (`own`, the players of the rows), most similar first
+def _top_k(block, k, own):
+    block[np.arange(len(block)), own] = -np.inf
+    if k <= 0:
+        return np.empty((len(block), 0), dtype=np.int32), np.empty((len(block), 0), dtype=np.float32)
+    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+# One similarity index per loaded dataset (Dataset objects are cached per process);
+# live snapshots extend the previous snapshot's index instead
+def get_similarity(dataset):
+    if hasattr(dataset, 'extend_index'):
+        with instrumentation.timed('player_similarity'):
+            return dataset.extend_index('player_similarity', lambda snapshot: PlayerSimilarity.from_data(snapshot.data),
+                                        lambda index, snapshot, start: index.extend(snapshot.data, start))
+    return _get_similarity(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_similarity(dataset):
+    with instrumentation.timed('player_similarity'):
+        return PlayerSimilarity.from_data(dataset.data)
@@ -0,0 +1,180 @@
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import bootstrap
+import derived
+import expected_distance
+import hit_data
+import percentiles
+import player_search
+import player_similarity
+import progression
+import selections
+import similar_hits
+
+# Fill this process's caches before it takes traffic, so the first users after a
+# deploy see steady-state latency: the dataset (download and cleaning), every
+# per-dataset index and table, the league model, and the stats, model and
+# Player Dashboard charts of the most-viewed players, plus the page translations.
+#
+#   python prewarm.py --serve [streamlit options]   # prewarm, then run streamlit_app.py in this process
+#   python prewarm.py                               # prewarm and print the timings
+#
+# Caches live in the serving process, so the app is started by prewarm.py
+# (--serve) and the API prewarms in its startup (see api.py): uvicorn accepts
+# requests only once that is done. HIT_READY_FILE (or --ready-file) is removed
+# at the start and written when prewarming has finished, for a readiness probe.
+
+READY_FILE = os.environ.get('HIT_READY_FILE')
+
+# No view counts are kept: the most-viewed players are taken to be the Player
+# Dashboard's default selection and the top home-run leaderboard every visitor sees
+TOP_PLAYERS = 10
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_app.py')
+
+
+# Titles to prewarm: the Player Dashboard's first player, then the leaderboard's
+def most_viewed(dataset, top=TOP_PLAYERS):
+    index = player_search.get_index(dataset)
+    return list(dict.fromkeys([*index.titles_for(index.search(''), limit=1), *dataset.top(top)['title']]))
+
+
+# The Player Dashboard's charts for a player, with the same cache keys and arguments as app3.py
+def _dashboard_charts(dataset, player):
+    import rendering
+
+    player_data = selections.rows(dataset, [player])
+    metric = next(iter(rendering.METRIC_AXES))
+    return [
+        selections.chart(dataset, [player], ('metric', metric), rendering.metric_scatter, player, player_data, metric),
+        selections.chart(dataset, [player], ('histogram', 'ExitVelocity'), rendering.metric_histogram, player, player_data['ExitVelocity'], 'ExitVelocity'),
+        selections.chart(dataset, [player], ('correlation',), rendering.correlation_heatmap, player, selections.correlation(dataset, [player]), figsize=(8, 6)),
+    ]
+
+
+# Every page's translated text, in every offered language; False (nothing to
+# warm) when google-cloud-translate isn't installed
+def _translations():
+    try:
+        if importlib.util.find_spec('google.cloud.translate_v2') is None:
+            return False
+    except ModuleNotFoundError:
+        return False
+    import translation
+
+    for language in translation.LANGUAGES.values():
+        for text in translation.TEXTS:
+            translation.translate_text(text, target_language=language)
+    return True
+
+
+# Run each step, recording (step, seconds, note); pages=False skips what only the Streamlit pages use
+def prewarm(players=None, top=TOP_PLAYERS, pages=True):
+    timings = []
+
+    # An optional step's error (e.g. missing cloud credentials) goes into its note
+    # instead of stopping the prewarm: the app can serve without it
+    @contextmanager
+    def step(name, optional=False):
+        start = time.perf_counter()
+        outcome = {'note': ''}
+        try:
+            yield outcome
+        except Exception as error:
+            if not optional:
+                raise
+            outcome['note'] = f'failed: {type(error).__name__}: {error}'
+        timings.append((name, time.perf_counter() - start, outcome['note']))
+
+    with step('dataset'):
+        dataset = hit_data.current_dataset()
+    with step('player_search'):
+        player_search.get_index(dataset)
+    with step('similar_hits'):
+        similar_hits.get_index(dataset)
+    with step('player_similarity'):
+        player_similarity.get_similarity(dataset).top_peers()
+    with step('progression'):
+        progression.get_progression(dataset)
+    with step('percentiles'):
+        percentiles.get_ranks(dataset)
+    with step('expected_distance'):
+        table = expected_distance.get_table(dataset)
+        if pages:
+            table.heatmap()
+    with step('derived'):
+        for name in derived.REGISTRY:
+            derived.get_columns(dataset).column(name)
+    with step('league_model'):
+        selections.prediction(dataset)
+
+    players = players or most_viewed(dataset, top)
+    with step(f'players ({len(players)})'):
+        charts = []
+        for player in players:
+            selections.summary(dataset, [player])
+            selections.prediction(dataset, [player])
+            percentiles.player_ranks(dataset, [player])
+            bootstrap.get_bootstrap(dataset).intervals({player: [player]})
+            if pages:
+                charts += _dashboard_charts(dataset, player)
+        for chart in charts:
+            chart.result()
+
+    if pages:
+        with step('translations', optional=True) as outcome:
+            if not _translations():
+                outcome['note'] = 'skipped: google-cloud-translate not installed'
+    return timings
+
+
+# Steps that failed (their caches are still cold)
+def failures(timings):
+    return [name for name, _, note in timings if note.startswith('failed')]
+
+
+def format_timings(timings):
+    lines = [f'{name:<20} {seconds:8.2f} s  {note}'.rstrip() for name, seconds, note in timings]
+    lines.append(f"{'total':<20} {sum(seconds for _, seconds, _ in timings):8.2f} s")
+    return '\n'.join(lines)
+
+
+def clear_ready(path=READY_FILE):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+# Written last and atomically: the file only exists once everything is warm
+def mark_ready(path=READY_FILE, text=''):
+    if path:
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text + '\n')
+        os.replace(tmp_path, path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prewarm the dataset, indexes, models, charts and translations')
+    parser.add_argument('--player', action='append', dest='players', help='title to prewarm (repeatable; default: the most-viewed players)')
+    parser.add_argument('--top', type=int, default=TOP_PLAYERS, help='how many leaderboard players to prewarm')
+    parser.add_argument('--ready-file', default=READY_FILE, help='written when prewarming has finished')
+    parser.add_argument('--serve', action='store_true', help='then run the Streamlit app in this process (other options go to streamlit run)')
+    args, streamlit_args = parser.parse_known_args()
+    if streamlit_args and not args.serve:
+        parser.error(f"unrecognized arguments: {' '.join(streamlit_args)}")
+
+    clear_ready(args.ready_file)
+    report = format_timings(prewarm(args.players, args.top))
+    print(report, flush=True)
+    mark_ready(args.ready_file, report)
+
+    if args.serve:
+        from streamlit.web import cli
+
+        sys.argv = ['streamlit', 'run', APP, *streamlit_args]
+        sys.exit(cli.main())
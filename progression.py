@@ -0,0 +1,132 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import hit_data
+import instrumentation
+
+# How each batter's power evolved over the season. The season home-run number
+# in the titles ("homers (34)") orders a player's hits; every player is sorted
+# by it once, then rolling means and streaks are computed for all players in
+# one pass with cumulative sums over the sorted arrays (no per-player loop).
+# Live snapshots rebuild only the players with new hits (Progression.extend).
+
+WINDOW = 5
+# A "hard-hit" home run, and the long-ball threshold the apps already use
+HARD_HIT_EXIT_VELOCITY = 110
+LONG_DISTANCE = hit_data.HOME_RUN_DISTANCE
+# Rows of players rebuilt by extend(), as a share of the sorted frame, before the
+# next snapshot sorts everything again
+MAX_EXTRA = 0.25
+
+
+# Rolling mean over the last `window` values of each group (groups contiguous in `starts`)
+def _rolling_mean(values, starts, window):
+    positions = np.arange(len(values))
+    totals = np.concatenate([[0.0], np.cumsum(values)])
+    first = np.maximum(positions - window + 1, starts)
+    return (totals[positions + 1] - totals[first]) / (positions - first + 1)
+
+
+# Length of the current run of True values, restarting at each group
+def _streak(condition, starts):
+    positions = np.arange(len(condition))
+    breaks = np.where(condition, starts - 1, positions)
+    return positions - np.maximum.accumulate(breaks)
+
+
+def build(data, window=WINDOW):
+    parsed = hit_data.parse_titles(data['title'])
+    valid = (parsed['player'].notna() & parsed['season_hr'].notna()).to_numpy()
+    names = parsed['player'].to_numpy()[valid]
+    ordinals = parsed['season_hr'].to_numpy()[valid].astype(np.int32)
+    codes, players = pd.factorize(names, sort=True)
+    order = np.lexsort((ordinals, codes))
+    codes = codes[order]
+
+    # Start position of each player's run, repeated for every hit
+    counts = np.bincount(codes, minlength=len(players))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    starts = np.repeat(offsets[:-1], counts)
+
+    rows = data.loc[valid, ['title', *hit_data.METRICS, 'video']].iloc[order]
+    frame = pd.DataFrame({'player': players[codes], 'season_hr': ordinals[order]})
+    frame['title'] = rows['title'].to_numpy()
+    for metric in hit_data.METRICS:
+        values = rows[metric].to_numpy(dtype=np.float64)
+        frame[metric] = values
+        frame[f'{metric}_rolling'] = _rolling_mean(values, starts, window)
+    frame['hard_hit_streak'] = _streak(frame['ExitVelocity'].to_numpy() >= HARD_HIT_EXIT_VELOCITY, starts)
+    frame['long_streak'] = _streak(frame['HitDistance'].to_numpy() >= LONG_DISTANCE, starts)
+    frame['video'] = rows['video'].to_numpy()
+    return Progression(frame, players, offsets, window)
+
+
+class Progression:
+    def __init__(self, frame, players, offsets, window):
+        self.frame = frame
+        self.window = window
+        self._slices = {name: slice(offsets[i], offsets[i + 1]) for i, name in enumerate(players)}
+        # Players rebuilt by extend(), in place of their slice of the frame
+        self._extra = {}
+
+    def __contains__(self, name):
+        return name in self._extra or name in self._slices
+
+    # One player's hits in season order (a slice of the sorted frame, no filtering)
+    def player(self, name):
+        extra = self._extra.get(name)
+        if extra is not None:
+            return extra
+        rows = self._slices.get(name)
+        if rows is None:
+            return self.frame.iloc[:0]
+        return self.frame.iloc[rows]
+
+    # A progression over `data`, which is this one's rows plus new ones from row
+    # `start`: each player with new hits is rebuilt from their hits so far and the
+    # new ones. This progression is left as it was
+    def extend(self, data, start):
+        new = data.iloc[start:][['title', *hit_data.METRICS, 'video']]
+        names = hit_data.parse_titles(new['title'])['player'].dropna().unique()
+        current = [self.player(name)[new.columns] for name in names if name in self]
+        players = build(pd.concat([*current, new], ignore_index=True), self.window)
+        progression = copy.copy(self)
+        progression._extra = {**self._extra, **{name: players.player(name).reset_index(drop=True) for name in players._slices}}
+        if sum(len(rows) for rows in progression._extra.values()) > MAX_EXTRA * len(self.frame):
+            return build(data, self.window)
+        return progression
+
+    # Longest streaks and first-to-last-window change per player
+    def summary(self, name):
+        rows = self.player(name)
+        if rows.empty:
+            return None
+        return {
+            'player': name,
+            'home_runs': len(rows),
+            'longest_hard_hit_streak': int(rows['hard_hit_streak'].max()),
+            'longest_long_streak': int(rows['long_streak'].max()),
+            **{
+                f'{metric}_change': float(rows[f'{metric}_rolling'].iloc[-1] - rows[f'{metric}_rolling'].iloc[min(self.window, len(rows)) - 1])
+                for metric in hit_data.METRICS
+            },
+        }
+
+
+# One progression table per loaded dataset (Dataset objects are cached per process);
+# live snapshots extend the previous snapshot's table instead
+def get_progression(dataset):
+    if hasattr(dataset, 'extend_index'):
+        with instrumentation.timed('progression'):
+            return dataset.extend_index('progression', lambda snapshot: build(snapshot.data),
+                                        lambda season, snapshot, start: season.extend(snapshot.data, start))
+    return _get_progression(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_progression(dataset):
+    with instrumentation.timed('progression'):
+        return build(dataset.data)
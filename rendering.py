@@ -0,0 +1,135 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import derived
+import expected_distance
+
+# Chart rendering off the script thread. Each chart is a draw function that
+# fills one Axes; it runs in a worker on its own Figure with the object-oriented
+# Agg API (no pyplot state machine, so nothing is shared between charts or
+# sessions) and comes back as PNG bytes. A page submits all its independent
+# charts first and collects them afterwards, so it waits for the slowest chart
+# instead of the sum of all of them.
+#
+# Workers are threads: arguments aren't copied, matplotlib caches fonts per
+# thread, and PNG encoding (about a third of a chart at 200 dpi) releases the
+# GIL, as does the script thread while it waits. Worker processes would re-run
+# the page: multiprocessing re-imports __main__, which under Streamlit is the
+# page script. HIT_RENDER_WORKERS sets the pool size.
+WORKERS = int(os.environ.get('HIT_RENDER_WORKERS') or min(4, os.cpu_count() or 1))
+# What st.pyplot uses, so charts look the same
+DPI = 200
+
+
+# One pool per process, shared by every session
+@lru_cache(maxsize=1)
+def get_pool():
+    return ThreadPoolExecutor(WORKERS, thread_name_prefix='render')
+
+
+# Draw one chart on a fresh Figure and encode it (runs in a worker)
+def render(draw, args=(), figsize=None):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw(fig.add_subplot(), *args)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+# Start rendering a chart; returns a Future of its PNG bytes
+def submit(draw, *args, figsize=None):
+    return get_pool().submit(render, draw, args, figsize)
+
+
+# app5.py charts
+
+# League expected distance over launch angle x exit velocity (an expected_distance
+# table), with the recommended launch-angle band marked
+def sweet_spot_heatmap(ax, table):
+    mean = np.ma.masked_where(~table.supported, table.mean)
+    mesh = ax.pcolormesh(table.launch_angle_edges, table.exit_velocity_edges, mean, cmap='viridis', shading='flat')
+    ax.figure.colorbar(mesh, ax=ax, label='Expected distance (feet)')
+    low, high = expected_distance.SWEET_SPOT
+    for angle in (low, high):
+        ax.axvline(angle, color='white', linestyle='--', linewidth=1)
+    ax.set_xlabel('Launch Angle (°)')
+    ax.set_ylabel('Exit Velocity (mph)')
+    ax.set_title(f'League Sweet Spot ({low}°–{high}° dashed)')
+
+
+# app3.py charts
+
+METRIC_AXES = {
+    'Exit Velocity': ('ExitVelocity', 'HitDistance', 'Exit Velocity (mph)', 'Hit Distance (feet)'),
+    'Launch Angle': ('LaunchAngle', 'HitDistance', 'Launch Angle (°)', 'Hit Distance (feet)'),
+    'Hit Distance': ('ExitVelocity', 'LaunchAngle', None, None),
+}
+
+
+# `metric` is one of METRIC_AXES or a derived metric's name, plotted against Hit Distance
+def metric_scatter(ax, player, player_data, metric):
+    if metric in METRIC_AXES:
+        x, y, xlabel, ylabel = METRIC_AXES[metric]
+    else:
+        x, y, xlabel, ylabel = metric, 'HitDistance', derived.metric_label(metric), derived.metric_label('HitDistance')
+        metric = derived.short_label(metric)
+    ax.scatter(player_data[x], player_data[y], label=player, alpha=0.6, edgecolors="w", s=100)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+    ax.set_title(f'{metric} vs Hit Distance for {player}')
+
+
+def metric_histogram(ax, player, values, metric):
+    ax.hist(values, bins=30, color='skyblue', edgecolor='black')
+    ax.set_xlabel(derived.metric_label(metric))
+    ax.set_ylabel('Frequency')
+    ax.set_title(f'{derived.short_label(metric)} Distribution for {player}')
+
+
+def correlation_heatmap(ax, player, correlation_matrix):
+    import seaborn as sns
+
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax)
+    ax.set_title(f'Correlation Matrix for {player}')
+
+
+def comparison_scatter(ax, players, comparison_data, x='ExitVelocity', y='HitDistance'):
+    import seaborn as sns
+
+    colors = sns.color_palette("hsv", len(players))  # Get a color palette for each player
+    for i, player in enumerate(players):
+        player_data = comparison_data[comparison_data['title'] == player]
+        ax.scatter(player_data[x], player_data[y], label=player, color=colors[i], alpha=0.7, edgecolors="w", s=100)
+    ax.set_xlabel(derived.metric_label(x))
+    ax.set_ylabel(derived.metric_label(y))
+    ax.set_title(f'{derived.short_label(x)} vs {derived.short_label(y)} Comparison')
+    ax.legend()
+
+
+def comparison_lines(ax, players, comparison_data, x='ExitVelocity', y='HitDistance'):
+    for player in players:
+        player_data = comparison_data[comparison_data['title'] == player]
+        ax.plot(player_data[x], player_data[y], label=player)
+    ax.set_xlabel(derived.metric_label(x))
+    ax.set_ylabel(derived.metric_label(y))
+    ax.set_title(f'{derived.short_label(x)} vs {derived.short_label(y)} Line Comparison')
+    ax.legend()
+
+
+# `means` has one row per player (title, title_short and each of `metrics`);
+# `errors` are the matching error bars, (metrics x 2 x players)
+def comparison_bars(ax, players, means, errors, metrics=('ExitVelocity', 'HitDistance')):
+    means.plot(kind='bar', x='title_short', y=list(metrics), yerr=errors, capsize=4, ax=ax)
+    ax.set_ylabel('Average Value (95% CI)')
+    ax.set_title(f'Bar Chart Comparison for {", ".join(players)}')
+
+    # Rotate the x-axis labels for readability
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
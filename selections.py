@@ -0,0 +1,259 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import derived
+import hit_data
+import instrumentation
+
+# Results for a player selection, shared by every session and API request in
+# the process: the second user to pick the same sluggers gets their rows,
+# stats, comparison table, model prediction and charts from memory instead of
+# filtering the frame (and fitting, and rendering) again.
+#
+# Keys are normalized: the data version, what was computed, the players as a
+# set and any thresholds or metrics, so ['B', 'A'] and ['A', 'B'] share an
+# entry and a new data version never sees an old one. Live snapshots share
+# their feed's entries instead: each entry records how many rows it was computed
+# over, and a later snapshot reuses it when none of the rows since are the
+# selection's (row positions are extended with the new matches); such lookups
+# are counted as `extended`, not as hits. Rows are kept as row positions, not
+# copies. The least recently used entries are evicted once the cache holds more
+# than MAX_BYTES, and every entry expires TTL seconds after it was computed.
+# Callers must not mutate what they get back.
+
+MAX_BYTES = int(float(os.environ.get('HIT_SELECTION_CACHE_MB') or 256) * 2 ** 20)
+TTL = float(os.environ.get('HIT_SELECTION_CACHE_TTL') or 600)  # seconds
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'extended', 'expired', 'evictions', 'entries', 'bytes'])
+
+
+# Approximate memory held by a cached value
+def _size(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_bytes=MAX_BYTES, ttl=TTL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires)
+        self._bytes = 0
+        self._hits = self._misses = self._extended = self._expired = self._evictions = 0
+
+    # The cached value for `key`, or None (expired entries are dropped). With
+    # count=False a found value isn't counted: the caller decides (see record)
+    def lookup(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self._clock():
+                self._drop(key)
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self._hits += 1
+            return entry[0]
+
+    # Count a value found with count=False: 'hits', 'misses' (it couldn't be
+    # used) or 'extended' (it was brought up to date instead of recomputed)
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, f'_{outcome}', getattr(self, f'_{outcome}') + 1)
+
+    def put(self, key, value):
+        size = _size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, self._clock() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    # The cached value for `key`, or compute() stored under it. compute() runs
+    # outside the lock: concurrent misses on one key both compute, the last one is kept
+    def get(self, key, compute):
+        value = self.lookup(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._extended, self._expired, self._evictions, len(self._entries), self._bytes)
+
+
+_cache = ResultCache()
+
+
+def cache_info():
+    return _cache.info()
+
+
+instrumentation.register_cache('selections', cache_info)
+
+
+# The dataset's version, or for a live snapshot its feed's (see live.py)
+def _lineage(dataset):
+    return getattr(dataset, 'lineage', dataset.version)
+
+
+# The value cached under `key` for this dataset, or None. An entry computed over
+# fewer rows (an earlier snapshot) is extended with extend(value, start), or else
+# reused unless a row since belongs to `titles` (None: every row counts)
+def _lookup(dataset, key, titles, extend=None):
+    entry = _cache.lookup((_lineage(dataset), *key), count=False)
+    if entry is None:
+        return None
+    computed, value = entry
+    if computed == len(dataset.data):
+        _cache.record('hits')
+        return value
+    stale = extend is None and (titles is None or dataset.data['title'].iloc[computed:].isin(list(titles)).any())
+    if computed > len(dataset.data) or stale:
+        _cache.record('misses')
+        return None
+    if extend is not None:
+        value = extend(value, computed)
+    _cache.record('extended')
+    _put(dataset, key, value)
+    return value
+
+
+def _put(dataset, key, value):
+    _cache.put((_lineage(dataset), *key), (len(dataset.data), value))
+
+
+# The value cached under `key`, or compute() stored under it (see ResultCache.get)
+def _get(dataset, key, titles, compute, extend=None):
+    value = _lookup(dataset, key, titles, extend)
+    if value is None:
+        value = compute()
+        _put(dataset, key, value)
+    return value
+
+
+# Row positions of the players' hits (at or above the thresholds, when given), in frame order
+def positions(dataset, players, min_exit_velocity=None, min_distance=None):
+    players = frozenset(players)
+
+    # Matching rows from `start` on
+    def matches(start):
+        data = dataset.data.iloc[start:]
+        mask = data['title'].isin(list(players)).to_numpy()
+        if min_exit_velocity is not None:
+            mask &= (data['ExitVelocity'] >= min_exit_velocity).to_numpy()
+        if min_distance is not None:
+            mask &= (data['HitDistance'] >= min_distance).to_numpy()
+        return start + np.flatnonzero(mask)
+
+    def compute():
+        found = matches(0)
+        found.flags.writeable = False
+        return found
+
+    def extend(found, start):
+        found = np.concatenate([found, matches(start)])
+        found.flags.writeable = False
+        return found
+
+    return _get(dataset, ('positions', players, min_exit_velocity, min_distance), players, compute, extend)
+
+
+# The players' hits (data[data['title'].isin(players)], thresholds optional)
+def rows(dataset, players, min_exit_velocity=None, min_distance=None):
+    return dataset.data.take(positions(dataset, players, min_exit_velocity, min_distance))
+
+
+# Mean, min and max of each metric over the players' hits
+def summary(dataset, players):
+    return _get(dataset, ('summary', frozenset(players)), players,
+                lambda: rows(dataset, players)[hit_data.METRICS].agg(['mean', 'min', 'max']))
+
+
+# Correlations between the metrics over the players' hits
+def correlation(dataset, players):
+    return _get(dataset, ('correlation', frozenset(players)), players,
+                lambda: rows(dataset, players)[hit_data.METRICS].corr())
+
+
+# Side-by-side comparison table (Dataset.compare_players)
+def comparison(dataset, players):
+    return _get(dataset, ('comparison', frozenset(players)), players, lambda: dataset.compare_players(players))
+
+
+# Mean of each metric (derived ones included) per label, one row per label in
+# sorted order. `groups` maps a label to its titles, as for bootstrap intervals
+def means(dataset, groups, metrics):
+    groups = {label: tuple(titles) for label, titles in groups.items()}
+    metrics = list(dict.fromkeys(metrics))
+
+    def compute():
+        labels = {title: label for label, titles in groups.items() for title in titles}
+        selected = derived.get_columns(dataset).with_metrics(rows(dataset, labels), metrics)
+        return selected.groupby(selected['title'].map(labels).rename('title'))[metrics].mean().reset_index()
+
+    key = ('means', frozenset((label, frozenset(titles)) for label, titles in groups.items()), tuple(metrics))
+    return _get(dataset, key, [title for titles in groups.values() for title in titles], compute)
+
+
+# Predicted exit velocity from the model fit on the players' hits (on every hit
+# when `players` is None, refit for every new live snapshot)
+def prediction(dataset, players=None, launch_angle=22, hit_distance=410):
+    def compute():
+        data = dataset.data if players is None else rows(dataset, players)
+        return hit_data.predict_exit_velocity(data, launch_angle, hit_distance)
+
+    selection = None if players is None else frozenset(players)
+    return _get(dataset, ('prediction', selection, launch_angle, hit_distance), selection, compute)
+
+
+# A chart of the players' hits as a Future of PNG bytes, like rendering.submit(draw, *args),
+# but rendered once per selection. `name` must identify what `draw` and `args` show
+def chart(dataset, players, name, draw, *args, figsize=None):
+    import rendering
+
+    key = ('chart', frozenset(players), name)
+    png = _lookup(dataset, key, players)
+    if png is not None:
+        cached = Future()
+        cached.set_result(png)
+        return cached
+
+    def store(rendered):
+        if rendered.exception() is None:
+            _put(dataset, key, rendered.result())
+
+    future = rendering.submit(draw, *args, figsize=figsize)
+    future.add_done_callback(store)
+    return future
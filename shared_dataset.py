@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import hit_data
+
+# Publish the cleaned dataset once per host and let every Streamlit/API worker
+# map it read-only instead of holding its own copy:
+#
+#   python shared_dataset.py publish            # loader process
+#   HIT_SHARED_DATASET=/dev/shm/hit_data.arrow streamlit run app5.py
+#
+# The file lives on tmpfs, so all workers share the same physical pages.
+SHARED_PATH = os.environ.get('HIT_SHARED_DATASET') or '/dev/shm/hit_data.arrow'
+
+# String columns stored as dictionary codes + one copy of each distinct value
+DICTIONARY_COLUMNS = ['title']
+
+
+# Convert the cleaned frame to an Arrow table: metrics as float arrays,
+# dictionary columns encoded with the same code width pandas would pick
+def to_table(data, version):
+    arrays = {}
+    for name in data.columns:
+        column = data[name]
+        if name in DICTIONARY_COLUMNS:
+            categorical = pd.Categorical(column)
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(categorical.codes), pa.array(categorical.categories.astype(str), type=pa.large_string())
+            )
+        elif name in hit_data.METRICS:
+            arrays[name] = pa.array(column.to_numpy(dtype='float64'))
+        else:
+            arrays[name] = pa.array(column.astype(str), type=pa.large_string())
+    table = pa.table(arrays)
+    return table.replace_schema_metadata({'version': version})
+
+
+# Write the Arrow IPC file atomically so attached workers never see a partial file
+def publish(dataset, path=SHARED_PATH):
+    table = to_table(dataset.data, dataset.version)
+    tmp_path = f'{path}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+# Map the published file and wrap its buffers without copying:
+# metrics become read-only NumPy views, dictionary columns pandas Categoricals
+# over the shared codes, other strings Arrow-backed arrays
+def attach(path=SHARED_PATH):
+    table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    columns = {}
+    for name in table.column_names:
+        chunks = table.column(name).chunks
+        array = chunks[0] if len(chunks) == 1 else table.column(name).combine_chunks()
+        if pa.types.is_dictionary(array.type):
+            categories = pd.Index(pd.arrays.ArrowExtensionArray(array.dictionary))
+            codes = array.indices.to_numpy(zero_copy_only=True)
+            columns[name] = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+        elif pa.types.is_floating(array.type):
+            columns[name] = array.to_numpy(zero_copy_only=True)
+        else:
+            columns[name] = pd.arrays.ArrowExtensionArray(array)
+    data = pd.DataFrame(columns, copy=False)
+    version = table.schema.metadata[b'version'].decode()
+    return hit_data.Dataset(data, version=version)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'publish'
+    path = sys.argv[2] if len(sys.argv) > 2 else SHARED_PATH
+    if command == 'publish':
+        dataset = hit_data.Dataset(hit_data.load_data())
+        size = publish(dataset, path)
+        print(f"Published {len(dataset.data)} rows ({size / 1e6:.1f} MB) to {path}, version {dataset.version}")
+    elif command == 'info':
+        dataset = attach(path)
+        print(f"{path}: {len(dataset.data)} rows, version {dataset.version}")
+        print(dataset.data.dtypes)
+    else:
+        sys.exit(f"Unknown command: {command} (expected 'publish' or 'info')")
@@ -0,0 +1,172 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+
+# "Hits like this one": nearest neighbours in (ExitVelocity, LaunchAngle,
+# HitDistance) space. A KD-tree is built once per dataset (and per scaling),
+# so a query costs O(log n) instead of a distance to every row. scipy comes
+# with scikit-learn; its cKDTree builds several times faster than sklearn's.
+
+FEATURES = ['ExitVelocity', 'LaunchAngle', 'HitDistance']
+DEFAULT_K = 10
+LEAF_SIZE = 40
+# Neighbours fetched per point before a filtered query gives up on the tree and
+# scans only the rows that pass the filter (a rare filter would otherwise walk most of it)
+MAX_FETCH = 4096
+# Rows a live snapshot appended after the trees were built are scanned instead; past
+# this many (or a quarter of the trees' rows) the next snapshot builds new trees
+MAX_DELTA = 65536
+
+
+class SimilarHitsIndex:
+    def __init__(self, data):
+        self.data = data
+        self.points = data[FEATURES].to_numpy(dtype=np.float64)
+        # Without scaling, feet dominate mph and degrees; z-scores weigh the features equally
+        self.scale = self.points.std(axis=0) if len(self.points) else np.ones(len(FEATURES))
+        self.scale[self.scale == 0] = 1
+        self._trees = {}
+        # Rows the trees cover; rows after them were appended by extend()
+        self._tree_rows = len(self.points)
+        self._column = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data)
+
+    # An index over `data`, which is this index's rows plus new ones from row `start`.
+    # The trees (and the scale) are kept and the new rows scanned, until there are
+    # too many of them to scan; this index is left as it was
+    def extend(self, data, start):
+        import live
+
+        if len(data) - self._tree_rows > min(MAX_DELTA, self._tree_rows // 4):
+            return SimilarHitsIndex(data)
+        index = copy.copy(self)
+        index.data = data
+        # The points grow in an append-only buffer, shared with the index extended next
+        column = self._column
+        if column is None or column.size != len(self.points):
+            column = live.AppendColumn(self.points, np.float64)
+        column.append(data[FEATURES].iloc[start:].to_numpy(dtype=np.float64))
+        index._column = column
+        index.points = column.view()
+        return index
+
+    def _tree(self, scaled):
+        tree = self._trees.get(scaled)
+        if tree is None:
+            from scipy.spatial import cKDTree
+
+            points = self.points[:self._tree_rows]
+            points = points / self.scale if scaled else points
+            # Unbalanced, non-compacted trees build ~2x faster and query just as fast here
+            tree = self._trees[scaled] = cKDTree(points, leafsize=LEAF_SIZE, balanced_tree=False, compact_nodes=False)
+        return tree
+
+    # Row positions of the k nearest hits to each query point, nearest first.
+    # `mask` (bool per row) restricts the results; the tree is asked for more
+    # neighbours until k of them pass it, so a filter doesn't mean a full scan.
+    # Nothing to return (no rows, none passing the mask, or k=0): empty results
+    def query(self, points, k=DEFAULT_K, scaled=True, mask=None, exclude=None):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if k <= 0 or len(self.points) == 0 or (mask is not None and not mask.any()):
+            return [(np.array([], dtype=np.intp), np.array([], dtype=np.float64)) for _ in points]
+        if scaled:
+            points = points / self.scale
+        tree = self._tree(scaled)
+        n = self._tree_rows
+        skip = np.full(len(points), -1) if exclude is None else np.asarray(exclude)
+        results = [None] * len(points)
+        pending = np.arange(len(points))
+        fetch = min(k + 1, n)
+        # One batched tree query per round; only points short of k filtered matches go again
+        while len(pending) and fetch <= MAX_FETCH:
+            distances, ids = tree.query(points[pending], k=fetch, workers=-1)
+            distances, ids = distances.reshape(len(pending), -1), ids.reshape(len(pending), -1)
+            short = []
+            for row, i in enumerate(pending):
+                keep = ids[row] != skip[i]
+                if mask is not None:
+                    keep &= mask[ids[row]]
+                if keep.sum() < k and fetch < n:
+                    short.append(i)
+                else:
+                    results[i] = (ids[row][keep][:k], distances[row][keep][:k])
+            pending = np.array(short, dtype=int)
+            if fetch == n:
+                break
+            fetch = min(fetch * 4, n)
+
+        if len(pending):
+            candidates = np.arange(n) if mask is None else np.flatnonzero(mask[:n])
+            for i, result in zip(pending, self._scan(points[pending], candidates, k, scaled, skip[pending])):
+                results[i] = result
+
+        # Rows appended after the trees were built: merge in the nearest of them
+        if n < len(self.points):
+            candidates = np.arange(n, len(self.points))
+            if mask is not None:
+                candidates = candidates[mask[n:]]
+            for i, (ids, distances) in enumerate(self._scan(points, candidates, k, scaled, skip)):
+                ids, distances = np.concatenate([results[i][0], ids]), np.concatenate([results[i][1], distances])
+                top = np.argsort(distances, kind='stable')[:k]
+                results[i] = (ids[top], distances[top])
+        return results
+
+    # The k nearest `candidates` (row positions) to each query point, by computing every distance
+    def _scan(self, points, candidates, k, scaled, skip):
+        candidate_points = (self.points[candidates] / self.scale) if scaled else self.points[candidates]
+        results = []
+        for point, skipped in zip(points, skip):
+            distances = np.sqrt(((candidate_points - point) ** 2).sum(axis=1))
+            distances[candidates == skipped] = np.inf
+            top = np.argsort(distances)[:k]
+            top = top[np.isfinite(distances[top])]
+            results.append((candidates[top], distances[top]))
+        return results
+
+    # The k most similar hits to each of the given rows (positions into `data`), as one frame
+    def similar_to(self, positions, k=DEFAULT_K, scaled=True, mask=None):
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.intp))
+        results = self.query(self.points[positions], k, scaled, mask, exclude=positions)
+        counts = [len(ids) for ids, _ in results]
+        ids = np.concatenate([ids for ids, _ in results]) if results else np.array([], dtype=int)
+        frame = self.data.iloc[ids].reset_index(drop=True)
+        frame.insert(0, 'query_play_id', self.data['play_id'].iloc[np.repeat(positions, counts)].to_numpy())
+        frame['rank'] = np.concatenate([np.arange(1, count + 1) for count in counts]) if results else []
+        frame['distance'] = np.concatenate([distances for _, distances in results]) if results else []
+        return frame
+
+    # Row positions of the given play ids (unknown ids are dropped). Only the
+    # matching rows are read, rather than indexing the whole column
+    def positions(self, play_ids):
+        column = self.data['play_id']
+        matches = np.flatnonzero(column.isin(play_ids).to_numpy())
+        lookup = dict(zip(column.iloc[matches].tolist(), matches.tolist()))
+        return np.array([lookup[play_id] for play_id in play_ids if play_id in lookup], dtype=np.intp)
+
+
+# Boolean row mask for the usual filters; None when nothing is filtered
+def filter_mask(data, min_distance=None, min_exit_velocity=None):
+    mask = np.ones(len(data), dtype=bool)
+    if min_distance is not None:
+        mask &= data['HitDistance'].to_numpy() >= min_distance
+    if min_exit_velocity is not None:
+        mask &= data['ExitVelocity'].to_numpy() >= min_exit_velocity
+    return None if mask.all() else mask
+
+
+# One index per loaded dataset (Dataset objects are cached per process); live
+# snapshots extend the previous snapshot's index instead
+def get_index(dataset):
+    if hasattr(dataset, 'extend_index'):
+        return dataset.extend_index('similar_hits', lambda snapshot: SimilarHitsIndex.from_data(snapshot.data),
+                                    lambda index, snapshot, start: index.extend(snapshot.data, start))
+    return _get_index(dataset)
+
+
+@lru_cache(maxsize=4)
+def _get_index(dataset):
+    return SimilarHitsIndex.from_data(dataset.data)
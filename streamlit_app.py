@@ -0,0 +1,28 @@
+import streamlit as st
+
+import instrumentation
+import memory_diagnostics
+
+# One multipage app for all the analyzer variants: streamlit run streamlit_app.py
+#
+# Keep this entry script light. Each page imports what it needs (seaborn,
+# scikit-learn, Google Cloud clients) only when it is opened, so a cold start
+# just pays for Streamlit itself. See import_report.py for the numbers.
+st.set_page_config(page_title="Baseball Hit Analyzer", page_icon="⚾")
+
+pages = [
+    st.Page('app5.py', title="Insights & Predictions", icon="🔮", default=True),
+    st.Page('app3.py', title="Player Dashboard", icon="📊"),
+    st.Page('app4.py', title="Compare Players", icon="🧑‍💼"),
+    st.Page('app2.py', title="Player Explorer", icon="🌍"),
+    st.Page('app.py', title="Quick View", icon="⚾"),
+]
+
+st.navigation(pages).run()
+
+# Stage timings and cache hit rates (HIT_METRICS=1; HIT_METRICS_FILE for a Prometheus text file)
+instrumentation.debug_panel()
+
+# Per-rerun memory snapshots and live figure counts (HIT_MEMORY_DIAGNOSTICS=1)
+memory_diagnostics.record_rerun()
+memory_diagnostics.panel()
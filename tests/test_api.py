@@ -0,0 +1,85 @@
+import io
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+from starlette.testclient import TestClient
+
+import api
+import export
+import hit_data
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return hit_data.Dataset(hit_data.clean_data(generate(3000)).reset_index(drop=True))
+
+
+# A client over the synthetic dataset with an empty response cache. Not used as
+# a context manager, so the lifespan's prewarm doesn't run
+@pytest.fixture
+def client(dataset, monkeypatch):
+    monkeypatch.setattr(api, '_dataset', lambda: dataset)
+    monkeypatch.setattr(api, '_response_cache', OrderedDict())
+    return TestClient(api.app)
+
+
+def test_etag_and_not_modified(client):
+    response = client.get('/top-home-runs', params={'n': 5})
+    assert response.status_code == 200
+    assert len(response.json()['top_home_runs']) == 5
+    etag = response.headers['ETag']
+
+    not_modified = client.get('/top-home-runs', params={'n': 5}, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.content == b''
+
+
+def test_repeat_request_is_served_from_cache(client, dataset, monkeypatch):
+    calls = []
+    top = dataset.top
+    monkeypatch.setattr(dataset, 'top', lambda n: calls.append(n) or top(n))
+    first = client.get('/top-home-runs', params={'n': 3})
+    second = client.get('/top-home-runs', params={'n': 3})
+    assert second.content == first.content
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert calls == [3]
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/similar', {'k': 'two'}),
+    ('/top-home-runs', {'n': '-1'}),
+    ('/players', {'limit': '1.5'}),
+    ('/predict', {'launch_angle': 'steep'}),
+    ('/chart-data', {'x': 'Spin'}),
+])
+def test_bad_parameter_is_a_400(client, dataset, path, params):
+    if path == '/similar':
+        params = {**params, 'play_id': dataset.data['play_id'].iloc[0]}
+    response = client.get(path, params=params)
+    assert response.status_code == 400
+    assert response.json()['error']
+
+
+def test_unknown_player_is_a_404(client):
+    response = client.get('/stats', params={'player': 'Nobody homers (1) on a fly ball to left field.'})
+    assert response.status_code == 404
+    assert 'Unknown player' in response.json()['error']
+    assert client.get('/stats').status_code == 400
+
+
+def test_export_streams_the_whole_csv(client, dataset):
+    players = list(dataset.players[:3])
+    response = client.get('/export', params={'players': players, 'min_distance': 400})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    expected = dataset.data[dataset.data['title'].isin(players) & (dataset.data['HitDistance'] >= 400)]
+    exported = pd.read_csv(io.BytesIO(response.content))
+    assert exported['play_id'].tolist() == expected['play_id'].tolist()
+    pd.testing.assert_frame_equal(exported[hit_data.METRICS], expected[hit_data.METRICS].reset_index(drop=True), check_dtype=False)
+
+    everything = pd.read_csv(io.BytesIO(client.get('/export').content))
+    assert len(everything) == len(dataset.data)
+    assert list(everything.columns) == export.COLUMNS
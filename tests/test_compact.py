@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+import hit_data
+from benchmarks.synthetic import generate
+
+# Titles the codec can't split into player / template / number, next to ones it can
+SENTINEL_TITLES = [
+    'Unknown',
+    'Mike Trout homers (07) on a fly ball to left field.',
+    'Umpire reviewed (home run), call on the field was upheld: Mike Trout homers (7) on a fly ball to left field.',
+    'Mike Trout homers (7) on a fly ball to left field.',
+]
+
+
+@pytest.fixture(scope='module')
+def plain():
+    data = hit_data.clean_data(generate(400)).reset_index(drop=True)
+    data.loc[:len(SENTINEL_TITLES) - 1, 'title'] = SENTINEL_TITLES
+    # A repeated row, so factorize and unique have something to collapse
+    return pd.concat([data, data.iloc[[5]]], ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def compacted(plain):
+    data = compact.compact_frame(plain)
+    assert all(compact.is_compact(data[name]) for name in compact.COLUMNS)
+    return data
+
+
+# Plain object values of a compact or plain array, with missing values as None
+def _values(array):
+    return [None if pd.isna(value) else value for value in np.asarray(array, dtype=object)]
+
+
+@pytest.fixture(params=compact.COLUMNS)
+def column(request):
+    return request.param
+
+
+def test_round_trip(plain, compacted, column):
+    assert list(compacted[column]) == list(plain[column])
+    assert compacted[column].astype(str).tolist() == plain[column].astype(str).tolist()
+
+
+def test_take(plain, compacted, column):
+    indices = [5, 0, 0, len(plain) - 1]
+    assert _values(compacted[column].array.take(indices)) == _values(plain[column].array.take(indices))
+    filled = [3, -1, 1]
+    assert _values(compacted[column].array.take(filled, allow_fill=True)) == _values(plain[column].array.take(filled, allow_fill=True))
+
+
+def test_concat(plain, compacted, column):
+    combined = pd.concat([compacted[column].iloc[:10], compacted[column].iloc[10:20]])
+    assert isinstance(combined.dtype, compact.CompactDtype)
+    assert combined.tolist() == pd.concat([plain[column].iloc[:10], plain[column].iloc[10:20]]).tolist()
+
+
+def test_isna(plain, compacted, column):
+    np.testing.assert_array_equal(compacted[column].isna(), plain[column].isna())
+
+
+def test_factorize_and_unique(plain, compacted, column):
+    codes, uniques = pd.factorize(compacted[column])
+    expected_codes, expected_uniques = pd.factorize(plain[column])
+    np.testing.assert_array_equal(codes, expected_codes)
+    assert list(uniques) == list(expected_uniques)
+    assert list(compacted[column].unique()) == list(plain[column].unique())
+
+
+def test_from_factorized(plain, compacted, column):
+    array = compacted[column].array
+    keys, _ = array._values_for_factorize()
+    rebuilt = compact.CompactStringArray._from_factorized(pd.unique(keys), array)
+    assert list(rebuilt) == list(plain[column].unique())
+
+
+def test_parse_titles(plain, compacted):
+    parsed = compact.parse_titles(compacted['title'])
+    expected = hit_data.parse_titles(plain['title'])
+    pd.testing.assert_frame_equal(parsed, expected)
+    # The first two are stored whole (no player code, n = -1) and parsed by the regex instead
+    assert (compacted['title'].array._fields['player'][:2] < 0).all()
+    assert pd.isna(parsed['player'].iloc[0]) and pd.isna(parsed['season_hr'].iloc[0])
+    assert parsed['season_hr'].iloc[1] == 7
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import derived
+import hit_data
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(derived, 'REGISTRY', dict(derived.REGISTRY))
+    return derived.REGISTRY
+
+
+@pytest.fixture
+def data():
+    # A non-default index, as a filtered or concatenated dataset would have
+    return pd.DataFrame({
+        'ExitVelocity': [100.0, 105.0, 110.0, 95.0, 112.0],
+        'HitDistance': [380.0, 410.0, 440.0, 360.0, 450.0],
+        'LaunchAngle': [20.0, 25.0, 30.0, 35.0, 27.0],
+    }, index=[40, 10, 30, 20, 50])
+
+
+# A registered metric is computed from its dependencies, derived ones included, once per dataset
+def test_registry_dispatch(registry, data):
+    calls = []
+
+    @derived.derived_metric('DoubleScore', 'Double Score', depends=['HitScore'])
+    def double_score(columns):
+        calls.append(sorted(columns))
+        return columns['HitScore'] * 2
+
+    columns = derived.DerivedColumns(data)
+    np.testing.assert_allclose(columns.column('DoubleScore'), 2 * derived.hit_score(data))
+    columns.column('DoubleScore')
+    assert calls == [['HitScore']]
+    assert derived.metric_names() == [*hit_data.METRICS, 'HitScore', 'DoubleScore']
+    assert derived.metric_label('DoubleScore') == 'Double Score'
+
+
+def test_unknown_dependency(registry):
+    with pytest.raises(ValueError, match='unknown metric Spin'):
+        derived.derived_metric('SpinScore', 'Spin Score', depends=['Spin'])(lambda columns: columns['Spin'])
+    assert 'SpinScore' not in registry
+
+
+# Values follow the rows' index labels, not their positions
+def test_with_metrics_on_filtered_rows(data):
+    columns = derived.DerivedColumns(data)
+    rows = data[data['HitDistance'] >= 400].iloc[::-1]
+    result = columns.with_metrics(rows, ['HitScore', 'ExitVelocity'])
+    assert result.index.tolist() == [50, 30, 10]
+    np.testing.assert_allclose(result['HitScore'], derived.hit_score(rows))
+    assert columns.with_metrics(result, ['HitScore']) is result
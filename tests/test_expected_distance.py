@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import expected_distance
+
+# 50 hits at 100 mph / 25 degrees going 400 ft, and a single one a cell over
+# (102 mph) going 300 ft: a 2 x 1 grid whose cells are each other's neighbourhood
+DENSE_HITS = 50
+
+
+@pytest.fixture(scope='module')
+def table():
+    data = pd.DataFrame({
+        'ExitVelocity': [100.0] * DENSE_HITS + [102.0],
+        'LaunchAngle': [25.0] * (DENSE_HITS + 1),
+        'HitDistance': [400.0] * DENSE_HITS + [300.0],
+    })
+    return expected_distance.ExpectedDistance(data)
+
+
+def test_grid(table):
+    assert table.counts.tolist() == [[DENSE_HITS], [1]]
+
+
+# The lone hit's cell is pulled most of the way toward the neighbourhood mean
+def test_sparse_cell_is_shrunk(table):
+    neighbourhood = (DENSE_HITS * 400 + 300) / (DENSE_HITS + 1)
+    prior = expected_distance.PRIOR_HITS
+    (dense, sparse), _ = table.lookup([100, 102], [25, 25])
+    assert sparse == pytest.approx((300 + prior * neighbourhood) / (1 + prior))
+    assert dense == pytest.approx((DENSE_HITS * 400 + prior * neighbourhood) / (DENSE_HITS + prior))
+    assert abs(sparse - neighbourhood) < abs(sparse - 300)
+
+
+# Values past the grid use the edge cells; a missing value gives NaN
+def test_lookup_past_the_edges(table):
+    (low, high), _ = table.lookup([100, 102], [25, 25])
+    expected, spread = table.lookup([40, 180, 100, 102, np.nan], [25, 25, -60, 90, 25])
+    np.testing.assert_allclose(expected[:4], [low, high, low, high])
+    assert np.isnan(expected[4]) and np.isnan(spread[4])
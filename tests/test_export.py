@@ -0,0 +1,81 @@
+import io
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import export
+import hit_data
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def data():
+    return hit_data.clean_data(generate(1000)).reset_index(drop=True)
+
+
+# Small chunks, so an export spans several of them
+@pytest.fixture(autouse=True)
+def chunk_rows(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 128)
+
+
+@pytest.fixture
+def keep(data):
+    return export.row_filter(players=list(data['title'].unique()[:40]), min_distance=380)
+
+
+# What the export should hold: the filtered rows, read back from to_csv. Dtypes
+# aren't compared: Arrow writes whole-number floats without the '.0'
+def _expected(data, keep, columns=export.COLUMNS):
+    selected = data[keep(data)] if keep is not None else data
+    return pd.read_csv(io.StringIO(selected[columns].to_csv(index=False)))
+
+
+@pytest.mark.parametrize('filtered', [False, True])
+def test_csv_matches_to_csv(data, keep, tmp_path, filtered):
+    keep = keep if filtered else None
+    path = tmp_path / 'homeruns.csv'
+    size = export.write(str(path), data, keep=keep)
+    assert size == path.stat().st_size
+    pd.testing.assert_frame_equal(pd.read_csv(path), _expected(data, keep), check_dtype=False)
+
+
+def test_parquet_round_trip(data, keep, tmp_path):
+    path = tmp_path / 'homeruns.parquet'
+    export.write(str(path), data, keep=keep)
+    expected = _expected(data, keep)
+    assert pq.ParquetFile(path).num_row_groups == len(list(export.chunks(data, keep)))
+    pd.testing.assert_frame_equal(pd.read_parquet(path), expected, check_dtype=False)
+
+
+def test_selected_columns(data, keep):
+    columns = ['title', 'HitDistance']
+    exported = b''.join(export.stream(data, 'csv', keep, columns))
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(exported)), _expected(data, keep, columns), check_dtype=False)
+
+
+def test_no_matching_rows(data, tmp_path):
+    path = tmp_path / 'empty.parquet'
+    export.write(str(path), data, keep=export.row_filter(min_distance=10_000))
+    assert list(pd.read_parquet(path).columns) == export.COLUMNS
+    assert pd.read_parquet(path).empty
+
+
+def test_failed_write_leaves_nothing(data, tmp_path):
+    path = tmp_path / 'homeruns.csv'
+    with pytest.raises(ValueError):
+        export.write(str(path), data, fmt='xlsx')
+
+    calls = []
+
+    def keep(chunk):
+        calls.append(len(chunk))
+        if len(calls) == 3:
+            raise RuntimeError('storage went away')
+        return chunk['HitDistance'].to_numpy() > 0
+
+    with pytest.raises(RuntimeError):
+        export.write(str(path), data, keep=keep)
+    assert os.listdir(tmp_path) == []
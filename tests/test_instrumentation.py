@@ -0,0 +1,61 @@
+from collections import namedtuple
+
+import pytest
+
+import instrumentation
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses')
+
+
+# Empty stats and no registered caches, whatever the other modules registered on import
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_registered_caches', {})
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+# Disabled: every timer is the shared no-op, decorators return the function itself, nothing is recorded
+def test_disabled_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', False)
+
+    def fit():
+        return 'fitted'
+
+    assert instrumentation.timed('filter') is instrumentation.timed('render')
+    assert instrumentation.timed('model_fit')(fit) is fit
+    with instrumentation.timed('filter'):
+        pass
+    instrumentation.cache_lookup('selections')
+    instrumentation.cache_miss('selections')
+    assert instrumentation.stage_stats() == {}
+    assert instrumentation.cache_stats() == {}
+
+
+def test_prometheus_text(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    instrumentation.observe('filter', 0.003)
+    instrumentation.observe('filter', 0.2)
+    for _ in range(3):
+        instrumentation.cache_lookup('selections')
+    instrumentation.cache_miss('selections')
+    instrumentation.register_cache('derived', lambda: CacheInfo(hits=5, misses=1))
+
+    lines = instrumentation.prometheus_text().splitlines()
+    assert lines[:2] == ['# HELP hit_stage_seconds Time spent in each analyzer stage.', '# TYPE hit_stage_seconds histogram']
+    buckets = [line for line in lines if line.startswith('hit_stage_seconds_bucket')]
+    assert len(buckets) == len(instrumentation.BUCKETS)
+    assert buckets[0] == 'hit_stage_seconds_bucket{stage="filter",le="0.001"} 0'
+    assert 'hit_stage_seconds_bucket{stage="filter",le="0.005"} 1' in buckets
+    assert 'hit_stage_seconds_bucket{stage="filter",le="0.1"} 1' in buckets
+    assert buckets[-1] == 'hit_stage_seconds_bucket{stage="filter",le="+Inf"} 2'
+    assert 'hit_stage_seconds_count{stage="filter"} 2' in lines
+    assert lines[-6:] == [
+        '# HELP hit_cache_requests_total Cache lookups by result.',
+        '# TYPE hit_cache_requests_total counter',
+        'hit_cache_requests_total{cache="derived",result="hit"} 5',
+        'hit_cache_requests_total{cache="derived",result="miss"} 1',
+        'hit_cache_requests_total{cache="selections",result="hit"} 2',
+        'hit_cache_requests_total{cache="selections",result="miss"} 1',
+    ]
@@ -0,0 +1,206 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bootstrap
+import derived
+import expected_distance
+import hit_data
+import live
+import percentiles
+import player_search
+import player_similarity
+import progression
+import selections
+import similar_hits
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture
+def feed():
+    return live.LiveFeed(hit_data.Dataset(hit_data.clean_data(generate(3000)).reset_index(drop=True)))
+
+
+# Batches as they'd arrive: duplicate play ids (within a batch, of the base file and
+# of an earlier batch, and a batch of nothing else), missing titles and metrics,
+# titles seen before (in place updates of their aggregates) and new leaders
+def _batches(base):
+    first = generate(60, seed=11)
+    first.loc[:2, 'title'] = base['title'].iloc[:3].to_numpy()
+    first.loc[3, 'play_id'] = base['play_id'].iloc[5]
+    first.loc[4, 'title'] = np.nan
+    first.loc[5, 'ExitVelocity'] = np.nan
+    second = generate(60, seed=12)
+    second.loc[0, 'play_id'] = first['play_id'].iloc[10]
+    second.loc[1:3, 'title'] = first['title'].iloc[20:23].to_numpy()
+    second.loc[4, 'title'] = base['title'].iloc[0]
+    second.loc[5, 'LaunchAngle'] = np.nan
+    third = generate(60, seed=13)
+    third.loc[:9, ['ExitVelocity', 'HitDistance']] = [[125.0, 450.0]] * 10
+    return [first, second, second.iloc[:5], third]
+
+
+# The cleaned frame a full reload would see: missing metrics filled with the base
+# file's medians (as the feed does) and the first row of each play id kept
+def _full_frame(base, batches):
+    frames = [base]
+    for batch in batches:
+        batch = batch.copy()
+        for metric in hit_data.METRICS:
+            batch[metric] = pd.to_numeric(batch[metric], errors='coerce').fillna(base[metric].median())
+        batch['title'] = batch['title'].fillna('Unknown')
+        frames.append(batch[base.columns])
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=['play_id']).reset_index(drop=True)
+
+
+def test_snapshots_match_full_recompute(feed):
+    base = feed.snapshot().data.copy()
+    batches = _batches(base)
+    for count, batch in enumerate(batches, start=1):
+        snapshot = feed.ingest(batch)
+        full = _full_frame(base, batches[:count])
+        expected = hit_data.Dataset(full)
+        pd.testing.assert_frame_equal(snapshot.data, full, check_dtype=False)
+
+        pd.testing.assert_frame_equal(snapshot.aggregates, expected.aggregates, check_dtype=False, check_index_type=False)
+        players = list(expected.players[:5]) + ['Unknown']
+        pd.testing.assert_frame_equal(snapshot.compare_players(players), expected.compare_players(players), check_dtype=False)
+
+        top = snapshot.top_home_runs
+        assert top.index.tolist() == expected.top_home_runs.index.tolist()
+        pd.testing.assert_frame_equal(top, expected.top_home_runs, check_dtype=False)
+
+        ranks, rebuilt = percentiles.get_ranks(snapshot), percentiles.build(expected)
+        assert ranks.rows == len(full)
+        pd.testing.assert_frame_equal(ranks.hit_ranks(full), rebuilt.hit_ranks(full))
+        comparison = expected.compare_players(list(expected.players))
+        pd.testing.assert_frame_equal(ranks.player_ranks(comparison), rebuilt.player_ranks(comparison))
+
+
+# New players' hits, plus a few more for players already in the feed
+def _batch(base, rows=40, seed=1):
+    batch = generate(rows, seed=seed)
+    batch.loc[:4, 'title'] = base['title'].iloc[[0, 10, 20, 30, 40]].to_numpy()
+    return batch
+
+
+# Every per-dataset index and cache, as the pages and the API use them
+def _use_indexes(snapshot, players):
+    player_search.get_index(snapshot).search('mi')
+    similar_hits.get_index(snapshot).similar_to([0])
+    similarity = player_similarity.get_similarity(snapshot)
+    similarity.top_peers()
+    similarity.clusters()
+    progression.get_progression(snapshot)
+    expected_distance.get_table(snapshot)
+    for name in derived.REGISTRY:
+        derived.get_columns(snapshot).column(name)
+    bootstrap.get_bootstrap(snapshot).intervals({player: [player] for player in players})
+    selections.summary(snapshot, players)
+
+
+# Rows handed to each full build (index constructors, grouped feature passes, derived metrics)
+@pytest.fixture
+def builds(monkeypatch):
+    sizes = []
+
+    def record(owner, name, rows=lambda *args: len(args[0])):
+        original = getattr(owner, name)
+
+        def recorded(*args, **kwargs):
+            sizes.append((name, rows(*args)))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(owner, name, staticmethod(recorded) if name == 'from_data' else recorded)
+
+    record(player_search.PlayerSearchIndex, 'from_data')
+    record(similar_hits.SimilarHitsIndex, '__init__', lambda index, data: len(data))
+    record(player_similarity, 'player_features')
+    record(progression, 'build')
+    record(expected_distance.ExpectedDistance, '__init__', lambda table, data: len(data))
+    for metric in derived.REGISTRY.values():
+        record(metric, 'compute', lambda columns: len(next(iter(columns.values()))))
+    return sizes
+
+
+def test_batch_extends_indexes(feed, builds):
+    first = feed.snapshot()
+    players = list(first.data['title'].iloc[[0, 50]])
+    _use_indexes(first, players)
+    assert max(size for _, size in builds) == len(first.data)
+
+    builds.clear()
+    second = feed.ingest(_batch(first.data))
+    _use_indexes(second, players)
+    # Only the new rows (and the rows of players with new hits) went through a build
+    assert builds and max(size for _, size in builds) < len(first.data) // 4
+
+    full = second.data.copy()
+    assert player_search.get_index(second).search('') == player_search.PlayerSearchIndex.from_data(full).search('')
+    for query in ['mi', 'trout', 'jose ab']:
+        assert player_search.get_index(second).search(query) == player_search.PlayerSearchIndex.from_data(full).search(query)
+
+    positions = np.array([0, len(full) - 1])
+    extended = similar_hits.get_index(second).query(full[similar_hits.FEATURES].to_numpy()[positions], k=15, scaled=False, exclude=positions)
+    rebuilt = similar_hits.SimilarHitsIndex(full).query(full[similar_hits.FEATURES].to_numpy()[positions], k=15, scaled=False, exclude=positions)
+    for (_, distances), (_, expected) in zip(extended, rebuilt):
+        np.testing.assert_allclose(distances, expected)
+
+    similarity = player_similarity.get_similarity(second)
+    features = player_similarity.player_features(full)
+    pd.testing.assert_frame_equal(similarity.features.loc[features.index], features)
+    ids, scores = similarity.top_peers()
+    all_pairs = similarity.vectors @ similarity.vectors.T
+    np.fill_diagonal(all_pairs, -np.inf)
+    np.testing.assert_allclose(scores, -np.sort(-all_pairs, axis=1)[:, :ids.shape[1]], atol=1e-5)
+    assert len(similarity.clusters()) == len(similarity.names)
+
+    season, rebuilt_season = progression.get_progression(second), progression.build(full)
+    for name in rebuilt_season._slices:
+        pd.testing.assert_frame_equal(season.player(name).reset_index(drop=True), rebuilt_season.player(name).reset_index(drop=True))
+
+    table, rebuilt_table = expected_distance.get_table(second), expected_distance.ExpectedDistance(full)
+    np.testing.assert_allclose(table.mean, rebuilt_table.mean)
+    np.testing.assert_allclose(table.spread, rebuilt_table.spread, atol=1e-6)
+
+    for name in derived.REGISTRY:
+        np.testing.assert_allclose(derived.get_columns(second).column(name), derived.DerivedColumns(full).column(name))
+        assert len(derived.get_columns(first).column(name)) == len(first.data)
+
+    pd.testing.assert_frame_equal(selections.rows(second, players), full[full['title'].isin(players)])
+    # The first player got a new hit: their interval is recomputed, the other's is kept
+    assert bootstrap.get_bootstrap(second).intervals({players[0]: [players[0]]})['hits'].iloc[0] == (full['title'] == players[0]).sum()
+    assert (players[1],) in bootstrap.get_bootstrap(second)._intervals
+
+
+# Sessions and API workers refreshing at once ingest each batch file once, in order
+def test_concurrent_refresh_ingests_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(live, 'POLL_INTERVAL', 0.0)
+    base = hit_data.Dataset(hit_data.clean_data(generate(500)).reset_index(drop=True))
+    feed = live.LiveFeed(base, str(tmp_path))
+    batches = [generate(30, seed=21), generate(40, seed=22)]
+    for i, batch in enumerate(batches):
+        batch.to_csv(tmp_path / f'batch-{i}.csv', index=False)
+
+    # The first file is slow to read: without the poll lock, another thread
+    # would skip it (already seen) and ingest the second one first
+    def read(path):
+        if path.endswith('batch-0.csv'):
+            time.sleep(0.1)
+        return pd.read_csv(path)
+
+    ingested = []
+    ingest = feed.ingest
+    monkeypatch.setattr(live, 'FILE_TYPES', {'.csv': read})
+    monkeypatch.setattr(feed, 'ingest', lambda batch: ingested.append(len(batch)) or ingest(batch))
+    threads = [threading.Thread(target=feed.refresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert ingested == [len(batch) for batch in batches]
+    assert len(feed.snapshot().data) == len(_full_frame(base.data, batches))
@@ -0,0 +1,69 @@
+import gc
+import os
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import pytest
+from matplotlib.figure import Figure
+from streamlit.testing.v1 import AppTest
+
+import hit_data
+import memory_diagnostics
+from benchmarks.load_test import ROOT, install_stand_ins
+from benchmarks.synthetic import write_csv
+from memory_diagnostics import MemoryDiagnostics
+
+# Repeated reruns of the same page must not leave figures or memory behind
+WARMUP_RERUNS = 3
+RERUNS = 5
+MAX_GROWTH_MB = 1.0
+
+
+@pytest.fixture(scope='module', autouse=True)
+def local_dataset(tmp_path_factory):
+    path = write_csv(2000, tmp_path_factory.mktemp('data') / 'homeruns.csv')
+    original_url = hit_data.DATA_URL
+    hit_data.DATA_URL = str(path)
+    hit_data.get_dataset.cache_clear()
+    install_stand_ins()
+    yield
+    hit_data.DATA_URL = original_url
+    hit_data.get_dataset.cache_clear()
+
+
+def _select_players(at):
+    picker = next(box for box in at.multiselect if box.label.startswith('Select Players'))
+    picker.set_value(list(picker.options[:3]))
+
+
+# Figures drawn without pyplot (as rendering.py does) are counted too
+def test_live_figures_counts_plain_figures():
+    before = memory_diagnostics.live_figures()
+    figures = [Figure() for _ in range(3)]
+    assert memory_diagnostics.live_figures() == before + len(figures)
+    del figures
+    gc.collect()  # Figures hold reference cycles
+    assert memory_diagnostics.live_figures() == before
+
+
+@pytest.mark.parametrize('page', ['app3.py', 'app5.py'])
+def test_reruns_do_not_grow_figures_or_memory(page):
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120).run()
+    _select_players(at)
+    for _ in range(WARMUP_RERUNS):
+        at.run()
+    assert not at.exception
+
+    diagnostics = MemoryDiagnostics()
+    try:
+        for _ in range(RERUNS):
+            at.run()
+            diagnostics.record()
+    finally:
+        diagnostics.stop()
+
+    assert not at.exception
+    assert diagnostics.growth('figures') == 0, diagnostics.report()
+    assert diagnostics.growth('traced_mb', start=1) < MAX_GROWTH_MB, diagnostics.report()
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import hit_data
+import percentiles
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return hit_data.Dataset(hit_data.clean_data(generate(2000)).reset_index(drop=True))
+
+
+# Ranks are whole percentiles: within half a point of percentileofscore(kind='mean')
+def _assert_percentiles(ranks, league, values):
+    expected = np.array([stats.percentileofscore(league, value, kind='mean') for value in values])
+    assert ranks.dtype == np.uint8
+    assert np.abs(ranks.astype(float) - expected).max() <= 0.5 + 1e-9
+
+
+def test_hit_ranks_match_scipy(dataset):
+    data = dataset.data
+    ranks = percentiles.get_ranks(dataset).hit_ranks(data)
+    for metric in hit_data.METRICS:
+        _assert_percentiles(ranks[f'{metric}{percentiles.SUFFIX}'].to_numpy(), data[metric], data[metric])
+        # Also pandas' average-rank percentiles, less half a rank
+        pandas_ranks = data[metric].rank(pct=True) * 100 - 50 / len(data)
+        assert np.abs(ranks[f'{metric}{percentiles.SUFFIX}'] - pandas_ranks).max() <= 0.5 + 1e-9
+
+
+# Hits that aren't in the league (another sample) rank against it all the same
+def test_outside_values_match_scipy(dataset):
+    others = hit_data.clean_data(generate(300, seed=7))
+    ranks = percentiles.get_ranks(dataset).hit_ranks(others)
+    for metric in hit_data.METRICS:
+        _assert_percentiles(ranks[f'{metric}{percentiles.SUFFIX}'].to_numpy(), dataset.data[metric], others[metric])
+
+
+def test_player_ranks_match_scipy(dataset):
+    comparison = dataset.compare_players(list(dataset.players))
+    ranks = percentiles.get_ranks(dataset).player_ranks(comparison)
+    assert ranks.index.tolist() == comparison['title'].tolist()
+    for metric in hit_data.PLAYER_STATISTICS:
+        _assert_percentiles(ranks[f'{metric}{percentiles.SUFFIX}'].to_numpy(), comparison[metric], comparison[metric])
@@ -0,0 +1,61 @@
+import pytest
+
+import player_search
+
+PLAYERS = {
+    'José Abreu': 30,
+    'Lourdes Gurriel Jr.': 20,
+    'Mike Trout': 40,
+    'Mike Moustakas': 25,
+    'Yoenis Céspedes': 10,
+    'Steven Souza Jr.': 5,
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    titles = {name: [f'{name} homers ({i}) on a fly ball to left field.' for i in range(1, count + 1)] for name, count in PLAYERS.items()}
+    return player_search.PlayerSearchIndex(titles, PLAYERS)
+
+
+@pytest.mark.parametrize('name, key', [
+    ('José Abreu', 'jose abreu'),
+    ('Steven Souza Jr.', 'steven souza'),
+    ("Travis d'Arnaud", 'travis d arnaud'),
+    ('Ronald Acuña Jr', 'ronald acuna'),
+    ('Cal Ripken III', 'cal ripken'),
+])
+def test_normalize_strips_accents_and_suffixes(name, key):
+    assert player_search.normalize(name) == key
+
+
+# Accents and suffixes are optional in the query too
+@pytest.mark.parametrize('query, name', [
+    ('jose', 'José Abreu'),
+    ('Cespedes', 'Yoenis Céspedes'),
+    ('Souza Jr.', 'Steven Souza Jr.'),
+    ('gurriel', 'Lourdes Gurriel Jr.'),
+])
+def test_search_ignores_accents_and_suffixes(index, query, name):
+    assert index.search(query)[0] == name
+
+
+# Any token's prefix matches; ties go to the most prolific player
+def test_prefix_matches_every_token(index):
+    assert index.search('mike') == ['Mike Trout', 'Mike Moustakas']
+    assert index.search('mous') == ['Mike Moustakas']
+    assert index.search('') == sorted(PLAYERS, key=PLAYERS.get, reverse=True)
+
+
+@pytest.mark.parametrize('query, name', [
+    ('mike trot', 'Mike Trout'),  # missing letter
+    ('moustaks', 'Mike Moustakas'),
+    ('cespdes', 'Yoenis Céspedes'),
+    ('abrue', 'José Abreu'),  # transposed letters
+])
+def test_trigram_typo_matches(index, query, name):
+    assert index.search(query, limit=1) == [name]
+
+
+def test_no_match(index):
+    assert index.search('zzzz') == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import progression
+
+# Two batters' home runs, out of season order and interleaved, plus a title without a number
+HITS = [
+    ('Mike Trout', 3, 115, 410, 30),
+    ('Jose Abreu', 2, 111, 405, 25),
+    ('Mike Trout', 1, 100, 380, 20),
+    ('Mike Trout', 5, 111, 430, 28),
+    ('Jose Abreu', 1, 112, 420, 27),
+    ('Mike Trout', 2, 112, 420, 26),
+    ('Mike Trout', 4, 108, 400, 31),
+]
+
+
+@pytest.fixture(scope='module')
+def season():
+    data = pd.DataFrame(HITS, columns=['player', 'number', 'ExitVelocity', 'HitDistance', 'LaunchAngle'])
+    data['title'] = [f'{player} homers ({number}) on a fly ball to left field.' for player, number in zip(data['player'], data['number'])]
+    data['video'] = [f'https://example.com/{i}.mp4' for i in range(len(data))]
+    data.loc[len(data)] = {'title': 'Unknown', 'ExitVelocity': 120, 'HitDistance': 450, 'LaunchAngle': 30, 'video': ''}
+    return progression.build(data.drop(columns=['player', 'number']), window=3)
+
+
+def test_hits_in_season_order(season):
+    trout = season.player('Mike Trout')
+    assert trout['season_hr'].tolist() == [1, 2, 3, 4, 5]
+    assert trout['ExitVelocity'].tolist() == [100, 112, 115, 108, 111]
+    assert 'Unknown' not in season
+
+
+# Mean of the last three home runs, fewer at the start, never across players
+def test_rolling_mean(season):
+    np.testing.assert_allclose(season.player('Mike Trout')['ExitVelocity_rolling'], [100, 106, 109, 335 / 3, 334 / 3])
+    np.testing.assert_allclose(season.player('Jose Abreu')['HitDistance_rolling'], [420, 412.5])
+
+
+# Consecutive home runs of 110+ mph and of 400+ ft, restarting for each player
+def test_streaks(season):
+    trout = season.player('Mike Trout')
+    assert trout['hard_hit_streak'].tolist() == [0, 1, 2, 0, 1]
+    assert trout['long_streak'].tolist() == [0, 1, 2, 3, 4]
+    assert season.player('Jose Abreu')['hard_hit_streak'].tolist() == [1, 2]
+
+
+def test_summary(season):
+    summary = season.summary('Mike Trout')
+    assert summary['home_runs'] == 5
+    assert (summary['longest_hard_hit_streak'], summary['longest_long_streak']) == (2, 4)
+    # Last rolling mean against the first full window's
+    assert summary['ExitVelocity_change'] == pytest.approx(334 / 3 - 109)
+    assert season.summary('Nobody') is None
@@ -0,0 +1,31 @@
+import io
+import threading
+
+import matplotlib.image
+import numpy as np
+
+import rendering
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+# A chart is drawn in a pool worker, on the Axes it is handed, and comes back as a decodable PNG
+def test_pool_returns_png_bytes():
+    threads = []
+
+    def draw(ax, values):
+        threads.append(threading.current_thread().name)
+        ax.plot(values)
+
+    png = rendering.submit(draw, np.arange(10), figsize=(2, 2)).result(timeout=30)
+    assert png.startswith(PNG_SIGNATURE)
+    assert threads[0].startswith('render')
+    image = matplotlib.image.imread(io.BytesIO(png), format='png')
+    assert image.ndim == 3 and image.shape[0] > 0 and image.shape[1] > 0
+
+
+# Several charts in flight at once each come back whole
+def test_concurrent_charts():
+    charts = [rendering.submit(rendering.metric_histogram, f'Player {i}', np.random.default_rng(i).normal(400, 20, 100), 'HitDistance')
+              for i in range(8)]
+    assert all(chart.result(timeout=30).startswith(PNG_SIGNATURE) for chart in charts)
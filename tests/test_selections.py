@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import hit_data
+import live
+import selections
+from benchmarks.synthetic import generate
+
+
+# A clock the tests move by hand
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+# Three 800-byte values fill the cache: a fourth evicts the least recently used
+@pytest.fixture
+def cache(clock):
+    return selections.ResultCache(max_bytes=2400, ttl=60, clock=clock)
+
+
+def _value(fill=0):
+    return np.full(100, fill, dtype=np.float64)
+
+
+def test_hits_and_misses(cache):
+    assert cache.lookup('a') is None
+    cache.put('a', _value(1))
+    assert cache.lookup('a')[0] == 1
+    assert cache.get('a', lambda: _value(2))[0] == 1
+    assert cache.get('b', lambda: _value(2))[0] == 2
+    info = cache.info()
+    assert (info.hits, info.misses, info.entries, info.bytes) == (2, 2, 2, 1600)
+
+
+def test_least_recently_used_is_evicted(cache):
+    for key in 'abc':
+        cache.put(key, _value())
+    cache.lookup('a')
+    cache.put('d', _value())
+    assert cache.lookup('b') is None
+    assert all(cache.lookup(key) is not None for key in 'acd')
+    assert cache.info().evictions == 1
+
+
+def test_byte_budget(cache):
+    cache.put('small', _value())
+    cache.put('large', np.zeros(250))  # 2000 bytes: 'small' has to go
+    assert cache.lookup('small') is None
+    assert cache.info().bytes == 2000
+    cache.put('too large', np.zeros(400))  # larger than the whole budget: not kept
+    assert cache.lookup('too large') is None
+    assert cache.lookup('large') is not None
+    # Replacing an entry releases its old size
+    cache.put('large', _value())
+    assert cache.info().bytes == 800
+
+
+def test_entries_expire(cache, clock):
+    cache.put('a', _value())
+    clock.now = 59
+    assert cache.lookup('a') is not None
+    clock.now = 60
+    assert cache.lookup('a') is None
+    info = cache.info()
+    assert (info.hits, info.misses, info.expired, info.entries, info.bytes) == (1, 1, 1, 0, 0)
+
+
+# (hits, misses, extended) so far
+def _counts():
+    info = selections.cache_info()
+    return info.hits, info.misses, info.extended
+
+
+def test_live_reuse_is_counted_as_extended(monkeypatch):
+    monkeypatch.setattr(selections, '_cache', selections.ResultCache())
+    feed = live.LiveFeed(hit_data.Dataset(hit_data.clean_data(generate(500)).reset_index(drop=True)))
+    first = feed.snapshot()
+    players = list(first.data['title'].iloc[[0]])
+    selections.positions(first, players)
+    selections.positions(first, players)
+    selections.summary(first, players)
+    assert _counts() == (2, 2, 0)
+
+    # Positions are extended with the new rows; the summary (no new hits of the
+    # player) is reused as it is. Neither counts as a hit
+    second = feed.ingest(generate(20, seed=5))
+    assert len(selections.positions(second, players)) == (second.data['title'] == players[0]).sum()
+    assert _counts() == (2, 2, 1)
+    selections.summary(second, players)
+    assert _counts() == (2, 2, 2)
+
+    # A new hit of the player: the summary is a miss, recomputed over extended positions
+    batch = generate(20, seed=6)
+    batch.loc[0, 'title'] = players[0]
+    third = feed.ingest(batch)
+    selections.summary(third, players)
+    assert _counts() == (2, 3, 3)
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import hit_data
+import shared_dataset
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return hit_data.Dataset(hit_data.clean_data(generate(500)).reset_index(drop=True))
+
+
+@pytest.fixture
+def attached(dataset, tmp_path):
+    path = str(tmp_path / 'hit_data.arrow')
+    assert shared_dataset.publish(dataset, path) == os.path.getsize(path)
+    assert not (tmp_path / 'hit_data.arrow.tmp').exists()
+    return shared_dataset.attach(path)
+
+
+# The Arrow array a NumPy view was made from, if any
+def _arrow_source(values):
+    while isinstance(values, np.ndarray):
+        values = values.base
+    return values
+
+
+def test_round_trip(dataset, attached):
+    assert attached.version == dataset.version
+    assert isinstance(attached.data['title'].dtype, pd.CategoricalDtype)
+    for name in dataset.data.columns:
+        if name in hit_data.METRICS:
+            np.testing.assert_array_equal(attached.data[name].to_numpy(), dataset.data[name].to_numpy())
+        else:
+            assert attached.data[name].astype(str).tolist() == dataset.data[name].astype(str).tolist()
+
+
+# Metrics are views of the mapped file: nothing copied, and nothing a worker can write to
+def test_metrics_are_read_only_views(attached):
+    for name in hit_data.METRICS:
+        values = attached.data[name].to_numpy()
+        assert not values.flags.writeable
+        source = _arrow_source(values)
+        assert isinstance(source, pa.Array)
+        assert values.__array_interface__['data'][0] == source.buffers()[1].address
+        with pytest.raises(ValueError):
+            values[0] = 0
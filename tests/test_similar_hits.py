@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import hit_data
+import similar_hits
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def index():
+    return similar_hits.SimilarHitsIndex(hit_data.clean_data(generate(500)).reset_index(drop=True))
+
+
+# Past MAX_FETCH the query scans the rows instead of the tree; without a filter that is every row
+@pytest.mark.parametrize('mask', [None, 'long'])
+def test_scan_fallback_matches_tree(index, monkeypatch, mask):
+    if mask == 'long':
+        mask = similar_hits.filter_mask(index.data, min_distance=hit_data.HOME_RUN_DISTANCE)
+    positions = np.arange(5)
+    expected = index.query(index.points[positions], k=20, mask=mask, exclude=positions)
+    monkeypatch.setattr(similar_hits, 'MAX_FETCH', 8)
+    scanned = index.query(index.points[positions], k=20, mask=mask, exclude=positions)
+    for position, (ids, distances), (scanned_ids, scanned_distances) in zip(positions, expected, scanned):
+        assert len(scanned_ids) == 20
+        np.testing.assert_allclose(scanned_distances, distances)
+        assert position not in scanned_ids
+
+
+# No rows, no row passing the filter, or k=0: empty results rather than a tree query for 0 neighbours
+def test_nothing_to_return(index):
+    empty = similar_hits.SimilarHitsIndex(index.data.iloc[:0])
+    ids, distances = empty.query(index.points[:1])[0]
+    assert len(ids) == len(distances) == 0
+
+    nothing = np.zeros(len(index.data), dtype=bool)
+    assert index.similar_to([0, 1], mask=nothing).empty
+    assert all(len(ids) == 0 for ids, _ in index.query(index.points[:2], k=0))
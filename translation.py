@@ -0,0 +1,27 @@
+import streamlit as st
+
+import instrumentation
+
+# Google Cloud Translate for the pages' non-English titles, cached per process
+# (st.cache_data), so reruns and other sessions don't call the API again.
+
+# Languages the pages offer besides English, and their Translate codes
+LANGUAGES = {'Spanish': 'es', 'Japanese': 'ja'}
+# Page text that goes through the API (everything else is written out per language)
+TEXTS = ["Exit Velocity vs Hit Distance for"]
+
+
+@st.cache_data(show_spinner=False)
+def _translate(text, target_language):
+    from google.cloud import translate_v2 as translate  # only needed for non-English pages
+
+    instrumentation.cache_miss('translation')
+    with instrumentation.timed('translation'):
+        translate_client = translate.Client()
+        result = translate_client.translate(text, target_language=target_language)
+    return result['translatedText']
+
+
+def translate_text(text, target_language='es'):
+    instrumentation.cache_lookup('translation')
+    return _translate(text, target_language)